@@ -1,7 +1,10 @@
 import json
-from google import genai
 
-gemini_client = genai.Client()
+from llm_manager import generate_chat_with_fallback
+from llm_scheduler import Priority
+from metrics import log
+
+AGGREGATOR_FALLBACK_SUMMARY = "Evaluation failed due to an error."
 
 AGGREGATOR_MASTER_PROMPT = """
 You are the Final Evaluation Aggregator Agent for technical interviews.
@@ -12,8 +15,10 @@ Input Format:
   "code_judge": { ... },
   "communication_eval": { ... },
   "reasoning_eval": { ... },
+  "complexity_profile": { "estimated_complexity": "...", "reference_complexity": "...", "peak_memory_kb": 0 },
   "proctor_warnings": ["..."],
-  "browser_warnings": [{"type": "...", "message": "...", "is_terminal": false}],
+  "browser_warnings": [{"type": "...", "message": "...", "is_terminal": false, "count": 1}],
+  "code_similarity": { "max_similarity": 0.0, "problem_typical_similarity": 0.0, "prior_submissions": 0, "closest_matches": [0.0] },
   "session_summary": "..."
 }
 
@@ -25,10 +30,20 @@ Apply these weights to calculate the final score (0-100%):
 - Communication: 10%
 - Interview Readiness: 10%
 
+`complexity_profile` is measured empirically by running the candidate's code on growing inputs.
+If present, use it as hard evidence for efficiency when scoring Technical Correctness and Code Quality.
+
 🚨 ANTI-CHEAT INTEGRITY SCORE (0-100%):
 Based on the `proctor_warnings` (webcam behavior) and `browser_warnings` (tab switch, copy/paste), deduct from 100%.
 - Minus 10 points per `proctor_warnings` occurrence.
-- Minus 20 points per `browser_warnings` occurrence.
+- Minus 20 points per `browser_warnings` entry. Each entry is one episode: repeats of the same event within a few
+  seconds are folded into it and `count` says how many there were. Minus a further 10 points for an episode with
+  `count` of 5 or more.
+- `code_similarity.max_similarity` is the estimated token-level similarity (0-1) of the submitted code to the
+  closest earlier submission by another candidate for the same problem, with names and literals ignored.
+  Judge it against `problem_typical_similarity` (how alike independent solutions to this problem usually are):
+  minus 30 points if it is >= 0.9, minus 15 points if it is >= 0.8 and clearly above the typical similarity.
+  Treat it as evidence, not proof, and mention it in the justification when you deduct for it.
 - If Integrity Score is < 50%, reduce the final performance_level to 'No Hire' with a strict justification.
 
 Return ONLY valid JSON in this exact format, with no markdown code blocks:
@@ -57,23 +72,22 @@ Return ONLY valid JSON in this exact format, with no markdown code blocks:
 
 async def call_aggregator_agent(payload: dict) -> dict:
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                {"role": "user", "parts": [{"text": AGGREGATOR_MASTER_PROMPT}]},
-                {"role": "model", "parts": [{"text": "Understood. Awaiting final session data."}]},
-                {"role": "user", "parts": [{"text": json.dumps(payload)}]}
+        response_text = await generate_chat_with_fallback(
+            [
+                {"role": "user", "text": AGGREGATOR_MASTER_PROMPT},
+                {"role": "model", "text": "Understood. Awaiting final session data."},
+                {"role": "user", "text": json.dumps(payload)}
             ],
-            config={
-                "temperature": 0.1, # Keep it deterministic for math and scoring
-                "response_mime_type": "application/json"
-            }
+            expect_json=True,
+            temperature=0.1,  # Keep it deterministic for math and scoring
+            agent="aggregator",
+            priority=Priority.REPORT
         )
-        return json.loads(response.text)
+        return json.loads(response_text)
     except Exception as e:
-        print(f"[AGGREGATOR AGENT ERROR] {e}")
+        log("AGGREGATOR AGENT ERROR", str(e))
         return {
-            "summary": "Evaluation failed due to an error.",
+            "summary": AGGREGATOR_FALLBACK_SUMMARY,
             "scores": {
                 "technical_correctness": 0, "problem_solving": 0, "reasoning": 0,
                 "code_quality": 0, "communication": 0, "interview_readiness": 0,
@@ -1,7 +1,8 @@
 import json
-from google import genai
 
-gemini_client = genai.Client()
+from llm_manager import generate_chat_with_fallback
+from llm_scheduler import Priority
+from metrics import log
 
 BRAIN_MASTER_PROMPT = """
 You are an expert Senior Technical Interviewer with 12+ years of experience in software engineering and hiring across top-tier technology companies.
@@ -313,20 +314,19 @@ async def call_brain_agent(payload: dict) -> dict:
     Returns: {"utterance": "...", "tone": "...", "action": "..."}
     """
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                {"role": "user", "parts": [{"text": BRAIN_MASTER_PROMPT}]},
-                {"role": "model", "parts": [{"text": "Understood. I am ready to conduct the interview. Provide the first input."}]},
-                {"role": "user", "parts": [{"text": json.dumps(payload)}]}
+        response_text = await generate_chat_with_fallback(
+            [
+                {"role": "user", "text": BRAIN_MASTER_PROMPT},
+                {"role": "model", "text": "Understood. I am ready to conduct the interview. Provide the first input."},
+                {"role": "user", "text": json.dumps(payload)}
             ],
-            config={
-                "response_mime_type": "application/json"
-            }
+            expect_json=True,
+            agent="brain",
+            priority=Priority.INTERACTIVE
         )
-        return json.loads(response.text)
+        return json.loads(response_text)
     except Exception as e:
-        print(f"[BRAIN AGENT ERROR] {e}")
+        log("BRAIN AGENT ERROR", str(e))
         return {
             "utterance": "Could you repeat that? I didn't quite catch it.",
             "tone": "neutral",
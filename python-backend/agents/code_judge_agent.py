@@ -1,7 +1,8 @@
 import json
-from google import genai
 
-gemini_client = genai.Client()
+from llm_manager import generate_chat_with_fallback
+from llm_scheduler import Priority
+from metrics import log
 
 JUDGE_MASTER_PROMPT = """
 You are an expert Technical Code Judge.
@@ -14,9 +15,19 @@ Input Format:
   "language": "python",
   "problem": "...",
   "constraints": "...",
-  "test_results": { ... }
+  "test_results": { ... },
+  "complexity_profile": {
+    "estimated_complexity": "O(n log n)",
+    "reference_complexity": "O(n)",
+    "peak_memory_kb": 0,
+    "samples": [{"n": 0, "runtime_ms": 0, "peak_memory_kb": 0}]
+  }
 }
 
+`test_results` and `complexity_profile` are measured by actually running the code.
+Treat them as ground truth: base `efficiency_rating` on the measured complexity
+(compared to `reference_complexity` when present) rather than on reading the code.
+
 Evaluate:
 1. Pass rate & Correctness
 2. Time & Space Complexity
@@ -36,21 +47,20 @@ Return ONLY valid JSON in this exact format, with no markdown code blocks:
 
 async def call_code_judge_agent(payload: dict) -> dict:
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                {"role": "user", "parts": [{"text": JUDGE_MASTER_PROMPT}]},
-                {"role": "model", "parts": [{"text": "Understood. Awaiting code."}]},
-                {"role": "user", "parts": [{"text": json.dumps(payload)}]}
+        response_text = await generate_chat_with_fallback(
+            [
+                {"role": "user", "text": JUDGE_MASTER_PROMPT},
+                {"role": "model", "text": "Understood. Awaiting code."},
+                {"role": "user", "text": json.dumps(payload)}
             ],
-            config={
-                "temperature": 0.2, # Low temp for deterministic grading
-                "response_mime_type": "application/json"
-            }
+            expect_json=True,
+            temperature=0.2,  # Low temp for deterministic grading
+            agent="code_judge",
+            priority=Priority.SUBMISSION
         )
-        return json.loads(response.text)
+        return json.loads(response_text)
     except Exception as e:
-        print(f"[JUDGE AGENT ERROR] {e}")
+        log("JUDGE AGENT ERROR", str(e))
         return {
             "technical_correctness": 0, "code_quality": 0,
             "efficiency_rating": 0, "edge_case_handling": 0,
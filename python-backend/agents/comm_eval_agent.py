@@ -1,7 +1,8 @@
 import json
-from google import genai
 
-gemini_client = genai.Client()
+from llm_manager import generate_chat_with_fallback
+from llm_scheduler import Priority
+from metrics import log
 
 COMM_MASTER_PROMPT = """
 You are an expert Communication Evaluator Agent for technical interviews.
@@ -30,20 +31,19 @@ Return ONLY valid JSON in this exact format, with no markdown code blocks:
 
 async def call_comm_eval_agent(payload: dict) -> dict:
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                {"role": "user", "parts": [{"text": COMM_MASTER_PROMPT}]},
-                {"role": "model", "parts": [{"text": "Understood. Awaiting transcript."}]},
-                {"role": "user", "parts": [{"text": json.dumps(payload)}]}
+        response_text = await generate_chat_with_fallback(
+            [
+                {"role": "user", "text": COMM_MASTER_PROMPT},
+                {"role": "model", "text": "Understood. Awaiting transcript."},
+                {"role": "user", "text": json.dumps(payload)}
             ],
-            config={
-                "response_mime_type": "application/json"
-            }
+            expect_json=True,
+            agent="comm_eval",
+            priority=Priority.BACKGROUND
         )
-        return json.loads(response.text)
+        return json.loads(response_text)
     except Exception as e:
-        print(f"[COMM AGENT ERROR] {e}")
+        log("COMM AGENT ERROR", str(e))
         return {
             "communication_score": 5, "clarity_score": 5,
             "structure_score": 5, "confidence_score": 5,
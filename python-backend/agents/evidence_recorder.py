@@ -0,0 +1,172 @@
+"""
+Evidence Recorder — one video clip and one thumbnail per suspicious episode.
+
+The proctor loop hands every annotated frame to `add_frame`, which keeps the last
+PRE_ROLL_SECONDS as JPEG bytes in a ring buffer (the newest one doubles as the MJPEG preview,
+so frames are encoded once). When behaviour turns suspicious an episode opens with the
+buffered pre-roll; frames keep being added while it stays suspicious and for
+POST_ROLL_SECONDS after, then the episode is handed to a background writer thread that
+encodes it as a compressed clip next to a JPEG thumbnail of the triggering frame:
+
+    evidence/<YYYY-MM-DD>/<session_id>/<HH-MM-SS>_<behavior>.mp4 / .jpg
+"""
+
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+import metrics
+
+PRE_ROLL_SECONDS = 5.0
+POST_ROLL_SECONDS = 3.0
+MAX_EPISODE_SECONDS = 60.0
+# Bounds the ring buffer even if the camera runs much faster than expected
+MAX_BUFFERED_FRAMES = 300
+JPEG_QUALITY = 70
+THUMBNAIL_WIDTH = 320
+# Clips are downscaled to at most this width; enough to review posture, a fraction of the bytes
+CLIP_MAX_WIDTH = int(os.getenv("EVIDENCE_CLIP_MAX_WIDTH", "480"))
+CLIP_FOURCC = os.getenv("EVIDENCE_FOURCC", "mp4v")
+
+# Encoding is CPU-bound and rare; one thread keeps it off the proctor loop without competing for cores
+EVIDENCE_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evidence-writer")
+
+EVIDENCE_CLIPS = metrics.Counter("proctor_evidence_clips_total", "Evidence clips written by outcome.", ("outcome",))
+EVIDENCE_BYTES = metrics.Counter("proctor_evidence_bytes_total", "Bytes of evidence clips and thumbnails written.")
+
+
+def encode_jpeg(frame, quality: int = JPEG_QUALITY) -> Optional[bytes]:
+    import cv2
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
+
+
+def write_episode(episode: dict) -> dict:
+    """Runs on the writer thread: decodes the buffered frames into one clip plus a thumbnail."""
+    import cv2
+    import numpy as np
+    os.makedirs(os.path.dirname(episode["clip_path"]), exist_ok=True)
+    frames = episode["frames"]
+    span = frames[-1][0] - frames[0][0]
+    # Play back at the rate the frames were actually captured
+    fps = max(1.0, min(30.0, (len(frames) - 1) / span)) if span > 0 else 10.0
+    first = cv2.imdecode(np.frombuffer(frames[0][1], np.uint8), cv2.IMREAD_COLOR)
+    height, width = first.shape[:2]
+    if width > CLIP_MAX_WIDTH:
+        height, width = int(height * CLIP_MAX_WIDTH / width) // 2 * 2, CLIP_MAX_WIDTH
+    writer = cv2.VideoWriter(episode["clip_path"], cv2.VideoWriter_fourcc(*CLIP_FOURCC), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"No video encoder for fourcc {CLIP_FOURCC}")
+    try:
+        for _, jpeg in frames:
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            writer.write(frame)
+    finally:
+        writer.release()
+
+    thumbnail = cv2.imdecode(np.frombuffer(episode["trigger_jpeg"], np.uint8), cv2.IMREAD_COLOR)
+    scale = THUMBNAIL_WIDTH / thumbnail.shape[1]
+    thumbnail = cv2.resize(thumbnail, (THUMBNAIL_WIDTH, int(thumbnail.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    cv2.imwrite(episode["thumbnail_path"], thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return {
+        "clip": episode["clip_path"],
+        "thumbnail": episode["thumbnail_path"],
+        "frames": len(frames),
+        "duration_s": round(span, 2),
+        "bytes": os.path.getsize(episode["clip_path"]) + os.path.getsize(episode["thumbnail_path"]),
+    }
+
+
+class EvidenceRecorder:
+    """Ring buffer and episode state for one proctored camera."""
+
+    def __init__(self, session_id: str, evidence_dir: str, on_written: Callable[[dict, dict], None] = None):
+        self.session_id = session_id
+        self.evidence_dir = evidence_dir
+        self.on_written = on_written
+        self.ring: deque = deque(maxlen=MAX_BUFFERED_FRAMES)  # (timestamp, jpeg bytes)
+        self.episode: Optional[dict] = None
+        self.episodes_written = 0
+
+    def latest_jpeg(self) -> Optional[bytes]:
+        return self.ring[-1][1] if self.ring else None
+
+    def add_frame(self, frame, now: float = None):
+        """Buffers an annotated frame and advances (or closes) the open episode."""
+        now = now or time.time()
+        jpeg = encode_jpeg(frame)
+        if jpeg is None:
+            return
+        self.ring.append((now, jpeg))
+        while self.ring and now - self.ring[0][0] > PRE_ROLL_SECONDS:
+            self.ring.popleft()
+
+        if self.episode is not None:
+            self.episode["frames"].append((now, jpeg))
+            if (now - self.episode["last_trigger"] > POST_ROLL_SECONDS
+                    or now - self.episode["started"] > MAX_EPISODE_SECONDS):
+                self.close_episode()
+
+    def trigger(self, behavior: str, now: float = None) -> Optional[dict]:
+        """
+        Marks the latest buffered frame as suspicious. Opens an episode (pre-roll included) if
+        none is open and returns it; otherwise extends the open one and returns None.
+        """
+        now = now or time.time()
+        if self.episode is not None:
+            self.episode["last_trigger"] = now
+            self.episode["behaviors"].add(behavior)
+            return None
+        if not self.ring:
+            return None
+        started = datetime.fromtimestamp(now)
+        name = f"{started.strftime('%H-%M-%S')}_{re.sub(r'[^A-Za-z0-9]+', '-', behavior).strip('-').lower()}"
+        directory = os.path.join(self.evidence_dir, started.strftime("%Y-%m-%d"), self.session_id)
+        self.episode = {
+            "behavior": behavior,
+            "behaviors": {behavior},
+            "started": now,
+            "last_trigger": now,
+            "frames": list(self.ring),
+            "trigger_jpeg": self.ring[-1][1],
+            "clip_path": os.path.join(directory, f"{name}.mp4"),
+            "thumbnail_path": os.path.join(directory, f"{name}.jpg"),
+        }
+        return self.episode
+
+    def close_episode(self):
+        """Hands the open episode to the background writer."""
+        episode, self.episode = self.episode, None
+        if episode is None:
+            return
+        future = EVIDENCE_WRITER.submit(write_episode, episode)
+        future.add_done_callback(lambda f: self._written(episode, f))
+
+    def _written(self, episode: dict, future):
+        try:
+            artifact = future.result()
+        except Exception as e:
+            EVIDENCE_CLIPS.inc(outcome="failed")
+            metrics.log("PROCTOR WARNING", f"Could not write evidence clip {episode['clip_path']}: {e}")
+            return
+        self.episodes_written += 1
+        EVIDENCE_CLIPS.inc(outcome="ok")
+        EVIDENCE_BYTES.inc(artifact["bytes"])
+        if self.on_written:
+            self.on_written(episode, artifact)
+
+    def close(self):
+        """Flushes any open episode and drops the buffered frames."""
+        self.close_episode()
+        self.ring.clear()
+
+
+def flush_writer(timeout: float = None):
+    """Waits for queued clips to finish writing (shutdown and tests)."""
+    EVIDENCE_WRITER.submit(lambda: None).result(timeout)
@@ -1,33 +1,62 @@
-import cv2
 import time
 import os
 import asyncio
 from datetime import datetime
-from ultralytics import YOLO
+
+from metrics import PROCTOR_INFERENCE_SECONDS, PROCTOR_FPS, log
+from registry import components
+from event_log import event_log
+
+from agents.proctor_backends import build_detector, RoiTracker, PROCTOR_ROI_TRACKING, ROI_IMGSZ
+from agents.evidence_recorder import EvidenceRecorder
 
 # Detection parameters
-CONF_THRESHOLD = 0.4
 SUSPICIOUS_TIME = 3  # seconds
 LOG_DIR = "logs"
+# Set PROCTOR_ENABLED=0 to run without a webcam (load tests, headless servers)
+PROCTOR_ENABLED = os.getenv("PROCTOR_ENABLED", "1") != "0"
 EVIDENCE_DIR = "evidence"
+# Analyse frames in this many worker processes (0: in the API process); see proctor_pool.py
+PROCTOR_WORKERS = int(os.getenv("PROCTOR_WORKERS", "0"))
+# Run one dummy inference when the model loads so the first real frame isn't slow
+YOLO_WARMUP_INFERENCE = os.getenv("YOLO_WARMUP_INFERENCE", "1") != "0"
 
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(EVIDENCE_DIR, exist_ok=True)
 
-try:
-    model = YOLO("yolov8n.pt")
-except Exception as e:
-    print(f"[PROCTOR WARNING] Could not load YOLO model: {e}")
-    model = None
+
+def _load_detector():
+    # The backend (ultralytics or ONNX) is picked by PROCTOR_BACKEND; see proctor_backends.py
+    detector = build_detector()
+    if PROCTOR_ROI_TRACKING:
+        detector.roi_detector = detector.with_imgsz(ROI_IMGSZ)
+    if YOLO_WARMUP_INFERENCE:
+        import numpy as np
+        detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+        if PROCTOR_ROI_TRACKING:
+            detector.roi_detector.detect(np.zeros((ROI_IMGSZ, ROI_IMGSZ, 3), dtype=np.uint8))
+    return detector
+
+components.register("proctor_detector", _load_detector)
 
 class ProctorAgent:
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, emit=None, on_warning=None):
         self.session_id = session_id
+        # Where interview events go: the event log here, the IPC channel inside a pool worker
+        self.emit = emit or event_log.append
+        # Called with no arguments whenever a new warning lands (the draft report goes stale)
+        self.on_warning = on_warning
         self.is_running = False
         self.behavior_tracker = {}
         self.warnings = []
         self._cap = None
-        self.latest_frame = None  # Shared frame for video streaming
+        self.fps = 0.0
+        # Recent frames as JPEG; suspicious episodes become one clip + thumbnail each
+        self.recorder = EvidenceRecorder(session_id, EVIDENCE_DIR, on_written=self._evidence_written)
+        self._loop = None
+        # Set when frames are analysed by a proctor pool worker instead of in this process
+        self._pool_handle = None
+        self.preview_jpeg = None
 
     def classify_behavior(self, x1, y1, x2, y2):
         w = x2 - x1
@@ -56,26 +85,87 @@ class ProctorAgent:
             }
             return 0
 
-    def log_cheating(self, frame, behavior):
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        img_path = os.path.join(EVIDENCE_DIR, f"{self.session_id}_{timestamp}.jpg")
-        cv2.imwrite(img_path, frame)
-        
+    def log_cheating(self, behavior):
+        episode = self.recorder.trigger(behavior)
+        if episode is None:
+            # Still the same episode; the clip keeps recording
+            return
+        timestamp = datetime.fromtimestamp(episode["started"]).strftime("%Y-%m-%d_%H-%M-%S")
+
         # We append to warnings so the orchestrator can read it
         warning_msg = f"Candidate exhibited sustained '{behavior}' at {timestamp}."
         if warning_msg not in self.warnings:
-             self.warnings.append(warning_msg)
+             self.add_warning(warning_msg)
+             self.emit(self.session_id, "proctor_warning", {"behavior": behavior, "message": warning_msg,
+                                                            "evidence": episode["clip_path"],
+                                                            "thumbnail": episode["thumbnail_path"]})
+
+    def _evidence_written(self, episode, artifact):
+        payload = {"behaviors": sorted(episode["behaviors"]), **artifact}
+        # Called on the writer thread; the event log belongs to the event loop
+        if self._loop is not None:
+            if not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self.emit, self.session_id, "proctor_evidence", payload)
+        else:
+            self.emit(self.session_id, "proctor_evidence", payload)
+
+    def process_frame(self, frame, detector) -> float:
+        """Detects, classifies and annotates one frame in place, recording evidence. Returns inference seconds."""
+        import cv2
+        inference_start = time.perf_counter()
+        boxes = detector.detect(frame)
+        inference_seconds = time.perf_counter() - inference_start
+
+        suspicious = None
+        for x1, y1, x2, y2, _ in boxes:
+            behavior = self.classify_behavior(x1, y1, x2, y2)
+            duration = self.track_behavior(self.session_id, behavior)
+
+            # Draw visual bounding box for local debug window
+            color = (0, 255, 0) # Green normal
+            if behavior == "Leaning":
+                color = (0, 165, 255) # Orange
+            elif behavior == "Looking Around":
+                color = (0, 0, 255) # Red
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, behavior, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+            if duration > SUSPICIOUS_TIME and behavior != "Normal":
+                # Mark red if recording cheat
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
+                suspicious = behavior
+
+        # Buffer the annotated frame first so an episode opening now includes it
+        self.recorder.add_frame(frame)
+        if suspicious:
+            self.log_cheating(suspicious)
+        return inference_seconds
 
     async def start_monitoring(self):
         """Runs the OpenCV camera loop safely without blocking FastAPI."""
-        if not model:
-            print("[PROCTOR AGENT] YOLO model missing. Proctoring disabled.")
+        if not PROCTOR_ENABLED:
             return
-
+        import cv2
+        if PROCTOR_WORKERS:
+            # Detection happens in a pool worker process; this loop only captures and ships frames
+            from agents.proctor_pool import get_pool
+            self._pool_handle = get_pool().attach(self)
+        else:
+            detector = await components.aget("proctor_detector")
+            if not detector:
+                log("PROCTOR AGENT", "YOLO model missing. Proctoring disabled.")
+                return
+            # Tracking state is per camera; the detector (and its weights) is shared
+            if PROCTOR_ROI_TRACKING:
+                detector = RoiTracker(detector)
+
+        self._loop = asyncio.get_running_loop()
         self.is_running = True
         # Note: In a real server environment, cv2.VideoCapture(0) opens the server's webcam.
         # This implementation assumes the student/candidate is running the backend locally for demo.
         self._cap = cv2.VideoCapture(0)
+        last_frame_at = time.perf_counter()
         
         while self.is_running and self._cap.isOpened():
             ret, frame = self._cap.read()
@@ -84,38 +174,23 @@ class ProctorAgent:
                 continue
                 
             frame = cv2.flip(frame, 1)
-            results = model(frame, conf=CONF_THRESHOLD, verbose=False)
-            
-            for r in results:
-                for box in r.boxes:
-                    if int(box.cls[0]) != 0: # 0 is person
-                        continue
-                        
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    behavior = self.classify_behavior(x1, y1, x2, y2)
-                    duration = self.track_behavior(self.session_id, behavior)
-                    
-                    # Draw visual bounding box for local debug window
-                    color = (0, 255, 0) # Green normal
-                    if behavior == "Leaning":
-                        color = (0, 165, 255) # Orange
-                    elif behavior == "Looking Around":
-                        color = (0, 0, 255) # Red
-                        
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(frame, behavior, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-                    if duration > SUSPICIOUS_TIME and behavior != "Normal":
-                        # Mark red if recording cheat
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-                        self.log_cheating(frame, behavior)
-
-            # Show the diagnostic window locally
-            cv2.imshow("Proctoring Integrity Monitor (AI Interviewer)", frame)
-            cv2.waitKey(1) # Required for cv2.imshow to update
-
-            # Store the latest annotated frame for MJPEG streaming
-            self.latest_frame = frame.copy()
+            if self._pool_handle is not None:
+                # Dropped (not queued) while the worker is still busy with the previous frame
+                self._pool_handle.submit(frame)
+            else:
+                inference_seconds = self.process_frame(frame, detector)
+                PROCTOR_INFERENCE_SECONDS.observe(inference_seconds, backend=detector.name)
+
+                # Show the diagnostic window locally
+                cv2.imshow("Proctoring Integrity Monitor (AI Interviewer)", frame)
+                cv2.waitKey(1) # Required for cv2.imshow to update
+
+            # Smoothed frames-per-second of the whole capture → inference → annotate loop
+            now = time.perf_counter()
+            instant_fps = 1.0 / max(now - last_frame_at, 1e-6)
+            last_frame_at = now
+            self.fps = instant_fps if self.fps == 0 else 0.9 * self.fps + 0.1 * instant_fps
+            PROCTOR_FPS.set(round(self.fps, 2), session_id=self.session_id)
 
             # Prevent CPU hogging in the background thread
             await asyncio.sleep(0.1) # Faster update rate for smoother video
@@ -126,16 +201,28 @@ class ProctorAgent:
 
     def stop_monitoring(self):
         self.is_running = False
+        self.recorder.close()
+        if self._pool_handle is not None:
+            self._pool_handle.close()
+            self._pool_handle = None
+        PROCTOR_FPS.remove(session_id=self.session_id)
         if self._cap:
              self._cap.release()
-        cv2.destroyAllWindows()
+             import cv2
+             cv2.destroyAllWindows()
+
+    def add_warning(self, message: str):
+        self.warnings.append(message)
+        if self.on_warning is not None:
+            self.on_warning()
 
     def get_warnings(self):
         return self.warnings
 
     def get_latest_frame_jpeg(self):
         """Returns the latest annotated frame as JPEG bytes for streaming."""
-        if self.latest_frame is None:
-            return None
-        _, buffer = cv2.imencode('.jpg', self.latest_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-        return buffer.tobytes()
+        if self.preview_jpeg is not None:
+            # Annotated and encoded by the pool worker
+            return self.preview_jpeg
+        # Already encoded once for the evidence ring buffer
+        return self.recorder.latest_jpeg()
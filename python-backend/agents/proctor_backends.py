@@ -0,0 +1,257 @@
+"""
+Proctor Backends — person detectors the ProctorAgent can run on camera frames.
+
+  ultralytics  stock PyTorch yolov8n.pt through ultralytics (default)
+  onnx         the same model exported to ONNX and run with onnxruntime, optionally
+               INT8-quantized; usually several times cheaper per frame on CPU
+
+Select with PROCTOR_BACKEND; PROCTOR_IMGSZ sets the inference size and PROCTOR_INT8=1
+quantizes the ONNX model. Exported models are cached under PROCTOR_MODEL_DIR. If the ONNX
+backend can't be built (onnxruntime missing, export failed), the ultralytics one is used.
+
+RoiTracker wraps a detector for one camera: once the person has been found, it only looks
+at an expanded box around them, at a smaller inference size. It is opt-in
+(PROCTOR_ROI_TRACKING=1): between full-frame re-scans it can miss anyone outside the tracked
+region, so check its agreement with full-frame scans (benchmarks/proctor_backends.py, `roi`
+candidates) before turning it on.
+
+Every backend returns person boxes as (x1, y1, x2, y2, confidence) in the pixel
+coordinates of the frame it was given, so classify_behavior doesn't care which one ran.
+"""
+
+import glob
+import os
+from typing import List, Tuple
+
+from metrics import log, PROCTOR_INFERENCES
+
+CONF_THRESHOLD = 0.4
+NMS_IOU_THRESHOLD = 0.45
+PERSON_CLASS = 0
+
+PROCTOR_BACKEND = os.getenv("PROCTOR_BACKEND", "ultralytics")
+PROCTOR_IMGSZ = int(os.getenv("PROCTOR_IMGSZ", "640"))
+PROCTOR_INT8 = os.getenv("PROCTOR_INT8", "0") == "1"
+PROCTOR_MODEL_DIR = os.getenv("PROCTOR_MODEL_DIR", "models")
+# Frames used to calibrate static INT8 quantization
+CALIBRATION_GLOB = os.getenv("PROCTOR_CALIBRATION_GLOB", "evidence/*.jpg")
+CALIBRATION_FRAMES = 32
+BASE_WEIGHTS = "yolov8n.pt"
+
+PROCTOR_ROI_TRACKING = os.getenv("PROCTOR_ROI_TRACKING", "0") == "1"
+ROI_IMGSZ = int(os.getenv("PROCTOR_ROI_IMGSZ", "320"))
+# The crop extends this fraction of the person box's width/height beyond each side
+ROI_EXPAND = 0.5
+# Track only from confident detections; anything weaker triggers a full-frame re-scan
+ROI_MIN_CONFIDENCE = 0.6
+FULL_RESCAN_EVERY_FRAMES = 15
+
+Box = Tuple[int, int, int, int, float]
+
+
+class UltralyticsDetector:
+    name = "ultralytics"
+
+    def __init__(self, imgsz: int = PROCTOR_IMGSZ, weights: str = BASE_WEIGHTS):
+        # torch + ultralytics take seconds to import, so this only runs on first use or during warm-up
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+        self.imgsz = imgsz
+
+    def with_imgsz(self, imgsz: int) -> "UltralyticsDetector":
+        """A detector sharing these weights that infers at another size."""
+        other = object.__new__(UltralyticsDetector)
+        other.model, other.imgsz = self.model, imgsz
+        return other
+
+    def detect(self, frame) -> List[Box]:
+        results = self.model(frame, conf=CONF_THRESHOLD, imgsz=self.imgsz, classes=[PERSON_CLASS], verbose=False)
+        boxes = []
+        for r in results:
+            for box in r.boxes:
+                if int(box.cls[0]) != PERSON_CLASS:
+                    continue
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                boxes.append((x1, y1, x2, y2, float(box.conf[0])))
+        return boxes
+
+
+def letterbox(frame, imgsz: int):
+    """Resizes keeping aspect ratio and pads to imgsz×imgsz, as ultralytics does. Returns (image, scale, pad)."""
+    import cv2
+    import numpy as np
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = round(w * scale), round(h * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+
+def to_input_tensor(image):
+    """BGR uint8 HWC → RGB float32 NCHW in [0, 1]."""
+    import numpy as np
+    return np.ascontiguousarray(image[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def decode_person_boxes(output, scale: float, pad: Tuple[int, int], frame_shape) -> List[Box]:
+    """
+    Decodes a raw YOLOv8 head output of shape (1, 4 + classes, anchors) into person boxes in
+    frame coordinates: confidence filter, NMS, then undo the letterbox.
+    """
+    import cv2
+    import numpy as np
+    predictions = output[0]
+    scores = predictions[4 + PERSON_CLASS]
+    keep = scores >= CONF_THRESHOLD
+    if not keep.any():
+        return []
+    cx, cy, w, h = predictions[:4, keep]
+    scores = scores[keep]
+    rects = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+    indices = cv2.dnn.NMSBoxes(rects.tolist(), scores.tolist(), CONF_THRESHOLD, NMS_IOU_THRESHOLD)
+    frame_h, frame_w = frame_shape[:2]
+    boxes = []
+    for i in np.array(indices).reshape(-1):
+        x, y, bw, bh = rects[i]
+        x1 = (x - pad[0]) / scale
+        y1 = (y - pad[1]) / scale
+        x2 = (x + bw - pad[0]) / scale
+        y2 = (y + bh - pad[1]) / scale
+        boxes.append((int(max(0, x1)), int(max(0, y1)), int(min(frame_w, x2)), int(min(frame_h, y2)), float(scores[i])))
+    return boxes
+
+
+class _CalibrationReader:
+    """Feeds letterboxed fixture frames to onnxruntime's static quantizer."""
+
+    def __init__(self, input_name: str, imgsz: int, paths: List[str]):
+        import cv2
+        self._batches = iter([
+            {input_name: to_input_tensor(letterbox(frame, imgsz)[0])}
+            for frame in (cv2.imread(p) for p in paths) if frame is not None
+        ])
+
+    def get_next(self):
+        return next(self._batches, None)
+
+
+def export_onnx_model(imgsz: int = PROCTOR_IMGSZ, int8: bool = PROCTOR_INT8) -> str:
+    """Exports (and optionally quantizes) yolov8n for this input size once; returns the cached path."""
+    os.makedirs(PROCTOR_MODEL_DIR, exist_ok=True)
+    fp32_path = os.path.join(PROCTOR_MODEL_DIR, f"yolov8n_{imgsz}.onnx")
+    if not os.path.exists(fp32_path):
+        from ultralytics import YOLO
+        exported = YOLO(BASE_WEIGHTS).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+        os.replace(exported, fp32_path)
+    if not int8:
+        return fp32_path
+
+    int8_path = os.path.join(PROCTOR_MODEL_DIR, f"yolov8n_{imgsz}_int8.onnx")
+    if not os.path.exists(int8_path):
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+        paths = sorted(glob.glob(CALIBRATION_GLOB))[:CALIBRATION_FRAMES]
+        if paths:
+            input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+            quantize_static(fp32_path, int8_path, _CalibrationReader(input_name, imgsz, paths),
+                            quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+                            weight_type=QuantType.QInt8)
+        else:
+            # No fixture frames to calibrate activations with; weights-only quantization
+            log("PROCTOR WARNING", f"No calibration frames match {CALIBRATION_GLOB}; using dynamic INT8 quantization")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+class OnnxDetector:
+    name = "onnx"
+
+    def __init__(self, imgsz: int = PROCTOR_IMGSZ, int8: bool = PROCTOR_INT8, model_path: str = None):
+        import onnxruntime as ort
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.model_path = model_path or export_onnx_model(imgsz, int8)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # One frame at a time per session; more threads than this mostly contend with the event loop
+        options.intra_op_num_threads = int(os.getenv("PROCTOR_ORT_THREADS", "2"))
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        if int8:
+            self.name = "onnx-int8"
+
+    def with_imgsz(self, imgsz: int) -> "OnnxDetector":
+        # Exported models have a fixed input size, so another size is another model
+        return OnnxDetector(imgsz, self.int8)
+
+    def detect(self, frame) -> List[Box]:
+        image, scale, pad = letterbox(frame, self.imgsz)
+        output = self.session.run(None, {self.input_name: to_input_tensor(image)})[0]
+        return decode_person_boxes(output, scale, pad, frame.shape)
+
+
+def build_detector(backend: str = PROCTOR_BACKEND, imgsz: int = PROCTOR_IMGSZ, int8: bool = PROCTOR_INT8):
+    """The configured detector, or the ultralytics one if it can't be built."""
+    if backend == "onnx":
+        try:
+            return OnnxDetector(imgsz, int8)
+        except Exception as e:
+            log("PROCTOR WARNING", f"ONNX backend unavailable ({type(e).__name__}: {e}); falling back to ultralytics")
+    elif backend != "ultralytics":
+        log("PROCTOR WARNING", f"Unknown PROCTOR_BACKEND '{backend}'; using ultralytics")
+    return UltralyticsDetector(imgsz)
+
+
+class RoiTracker:
+    """
+    Detects on a crop around the last confidently seen person, at ROI_IMGSZ, and maps the
+    boxes back to full-frame coordinates. Falls back to a full-frame scan every
+    FULL_RESCAN_EVERY_FRAMES frames, when confidence drops or the person reaches the crop's edge.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        # Normally built once alongside the shared detector (see proctor_agent._load_detector)
+        if getattr(detector, "roi_detector", None) is None:
+            detector.roi_detector = detector.with_imgsz(ROI_IMGSZ)
+        self.roi_detector = detector.roi_detector
+        self.name = f"{detector.name}+roi"
+        self.last_box = None
+        self.frames_since_full = 0
+
+    def _crop(self, frame_shape):
+        x1, y1, x2, y2 = self.last_box[:4]
+        h, w = frame_shape[:2]
+        dx, dy = (x2 - x1) * ROI_EXPAND, (y2 - y1) * ROI_EXPAND
+        return int(max(0, x1 - dx)), int(max(0, y1 - dy)), int(min(w, x2 + dx)), int(min(h, y2 + dy))
+
+    def _full_scan(self, frame) -> List[Box]:
+        PROCTOR_INFERENCES.inc(mode="full")
+        boxes = self.detector.detect(frame)
+        best = max(boxes, key=lambda b: b[4], default=None)
+        self.last_box = best if best is not None and best[4] >= ROI_MIN_CONFIDENCE else None
+        self.frames_since_full = 0
+        return boxes
+
+    def detect(self, frame) -> List[Box]:
+        if self.last_box is None or self.frames_since_full >= FULL_RESCAN_EVERY_FRAMES:
+            return self._full_scan(frame)
+
+        cx1, cy1, cx2, cy2 = self._crop(frame.shape)
+        PROCTOR_INFERENCES.inc(mode="roi")
+        boxes = [(x1 + cx1, y1 + cy1, x2 + cx1, y2 + cy1, conf)
+                 for x1, y1, x2, y2, conf in self.roi_detector.detect(frame[cy1:cy2, cx1:cx2])]
+        best = max(boxes, key=lambda b: b[4], default=None)
+        h, w = frame.shape[:2]
+        # A box cut off by the crop (but not by the frame) has the wrong shape for classify_behavior
+        clipped = best is not None and (
+            (best[0] <= cx1 and cx1 > 0) or (best[1] <= cy1 and cy1 > 0)
+            or (best[2] >= cx2 and cx2 < w) or (best[3] >= cy2 and cy2 < h)
+        )
+        if best is None or best[4] < ROI_MIN_CONFIDENCE or clipped:
+            return self._full_scan(frame)
+        self.last_box = best
+        self.frames_since_full += 1
+        return boxes
@@ -0,0 +1,352 @@
+"""
+Proctor Pool — YOLO proctoring sharded across worker processes.
+
+With PROCTOR_WORKERS=N the API process no longer runs detection. Each session is assigned to
+one of N worker processes by consistent hashing on its session id, so adding a worker only
+moves about 1/N of the sessions. Frames travel through one shared-memory slot per session
+(the API process writes, the worker reads) and only small control tuples go over the
+worker's pipe:
+
+    API → worker   ("open", session_id, shm_name, shape) / ("frame", session_id, seq)
+                   ("close", session_id) / ("stop",)
+    worker → API   ("ready", backend) / ("result", session_id, seq, inference_s, preview_jpeg)
+                   ("event", session_id, kind, payload)
+
+A session has at most one frame in flight; frames captured while its worker is busy are
+dropped rather than queued, so a slow shard never builds a backlog. A worker that dies is
+restarted and its sessions re-opened; sessions on other shards don't notice.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import metrics
+
+VIRTUAL_NODES = 64
+STOP_TIMEOUT_SECONDS = 5.0
+# A worker that dies sooner than this after starting is restarted with exponential backoff
+MIN_HEALTHY_SECONDS = 30.0
+MAX_RESTART_DELAY_SECONDS = 60.0
+
+POOL_SESSIONS = metrics.Gauge("proctor_pool_sessions", "Proctored sessions per worker shard.", ("shard",))
+POOL_FRAMES = metrics.Counter("proctor_pool_frames_total", "Frames offered to the proctor pool by outcome.",
+                              ("outcome",))
+POOL_WORKER_RESTARTS = metrics.Counter("proctor_pool_worker_restarts_total", "Proctor workers restarted after dying.",
+                                       ("shard",))
+
+
+class HashRing:
+    """Consistent hashing of keys onto shards, with virtual nodes for an even spread."""
+
+    def __init__(self, shards, virtual_nodes: int = VIRTUAL_NODES):
+        self._points = sorted(
+            (self._hash(f"{shard}#{replica}"), shard) for shard in shards for replica in range(virtual_nodes)
+        )
+        self._keys = [point for point, _ in self._points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def get(self, key: str):
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._points[index][1]
+
+
+# ─── Worker process ───────────────────────────────────────────────────────
+
+def _worker_main(shard_id: int, conn):
+    """Entry point of a worker process: one shared detector, per-session tracking and evidence."""
+    import numpy as np
+    from agents.proctor_agent import ProctorAgent, _load_detector
+    from agents.proctor_backends import RoiTracker, PROCTOR_ROI_TRACKING
+    from agents.evidence_recorder import flush_writer
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        # The evidence writer thread sends too
+        with send_lock:
+            conn.send(message)
+
+    def emit(session_id, kind, payload):
+        send(("event", session_id, kind, payload))
+
+    detector = _load_detector()
+    send(("ready", detector.name))
+    sessions: Dict[str, dict] = {}
+
+    def close_session(session_id):
+        entry = sessions.pop(session_id, None)
+        if entry is not None:
+            entry["agent"].recorder.close()
+            del entry["frame"]
+            entry["shm"].close()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        op = message[0]
+        if op == "open":
+            _, session_id, shm_name, shape = message
+            close_session(session_id)
+            try:
+                shm = shared_memory.SharedMemory(name=shm_name)
+            except FileNotFoundError:
+                # The session closed (or re-allocated) before this open arrived
+                continue
+            sessions[session_id] = {
+                "shm": shm,
+                "frame": np.ndarray(shape, dtype=np.uint8, buffer=shm.buf),
+                "agent": ProctorAgent(session_id, emit=emit),
+                "detector": RoiTracker(detector) if PROCTOR_ROI_TRACKING else detector,
+            }
+        elif op == "frame":
+            _, session_id, seq = message
+            entry = sessions.get(session_id)
+            if entry is None:
+                continue
+            # Annotation draws on the frame; the shared slot belongs to the API process
+            frame = entry["frame"].copy()
+            inference_seconds = entry["agent"].process_frame(frame, entry["detector"])
+            send(("result", session_id, seq, inference_seconds, entry["agent"].recorder.latest_jpeg()))
+        elif op == "close":
+            close_session(message[1])
+        elif op == "stop":
+            break
+
+    for session_id in list(sessions):
+        close_session(session_id)
+    flush_writer()
+
+
+# ─── API process side ─────────────────────────────────────────────────────
+
+class SessionHandle:
+    """The API-side end of one session's frame channel."""
+
+    def __init__(self, pool: "ProctorPool", agent):
+        self.pool = pool
+        self.agent = agent
+        self.session_id = agent.session_id
+        self.shard = pool.ring.get(agent.session_id)
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._frame = None
+        self.in_flight = False
+        self.seq = 0
+
+    def _allocate(self, shape):
+        import numpy as np
+        self._release_shm()
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._frame = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def open_message(self):
+        return ("open", self.session_id, self.shm.name, self._frame.shape)
+
+    def submit(self, frame) -> bool:
+        """Copies the frame into shared memory and hands it to the worker, unless one is in flight."""
+        if self.in_flight:
+            POOL_FRAMES.inc(outcome="dropped")
+            return False
+        if self._frame is None or self._frame.shape != frame.shape:
+            # First frame, or the camera changed resolution: a new slot, and the worker re-attaches
+            self._allocate(frame.shape)
+            if not self.pool.send(self.shard, self.open_message()):
+                return False
+        self._frame[...] = frame
+        self.seq += 1
+        self.in_flight = True
+        if not self.pool.send(self.shard, ("frame", self.session_id, self.seq)):
+            self.in_flight = False
+            return False
+        POOL_FRAMES.inc(outcome="sent")
+        return True
+
+    def on_result(self, seq: int, inference_seconds: float, preview_jpeg: Optional[bytes]):
+        if seq == self.seq:
+            self.in_flight = False
+        if preview_jpeg is not None:
+            self.agent.preview_jpeg = preview_jpeg
+        metrics.PROCTOR_INFERENCE_SECONDS.observe(inference_seconds, backend=self.pool.backend_name)
+
+    def _release_shm(self):
+        self._frame = None
+        if self.shm is not None:
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+    def close(self):
+        self.pool.detach(self)
+        self._release_shm()
+
+
+class _Shard:
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.process = None
+        self.conn = None
+        self.started_at = 0.0
+        self.restart_delay = 0.0
+        self.send_lock = threading.Lock()
+        self.sessions: Dict[str, SessionHandle] = {}
+
+
+class ProctorPool:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.ring = HashRing(range(workers))
+        self.shards = {i: _Shard(i) for i in range(workers)}
+        self.backend_name = "pool"
+        self._context = multiprocessing.get_context("spawn")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        for shard in self.shards.values():
+            self._start_worker(shard)
+
+    def _start_worker(self, shard: _Shard):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(shard.shard_id, child_conn),
+                                        name=f"proctor-worker-{shard.shard_id}", daemon=True)
+        process.start()
+        child_conn.close()
+        shard.process, shard.conn, shard.started_at = process, parent_conn, time.monotonic()
+        threading.Thread(target=self._read, args=(shard, parent_conn), daemon=True,
+                         name=f"proctor-pool-reader-{shard.shard_id}").start()
+
+    def _read(self, shard: _Shard, conn):
+        """Reader thread per worker: hands every message to the event loop."""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._dispatch, shard, message)
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._worker_died, shard, conn)
+
+    def _dispatch(self, shard: _Shard, message):
+        op = message[0]
+        if op == "result":
+            _, session_id, seq, inference_seconds, preview_jpeg = message
+            handle = shard.sessions.get(session_id)
+            if handle is not None:
+                handle.on_result(seq, inference_seconds, preview_jpeg)
+        elif op == "event":
+            _, session_id, kind, payload = message
+            handle = shard.sessions.get(session_id)
+            if kind == "proctor_warning" and handle is not None:
+                handle.agent.add_warning(payload["message"])
+            from event_log import event_log
+            event_log.append(session_id, kind, payload)
+        elif op == "ready":
+            self.backend_name = message[1]
+            metrics.log("PROCTOR POOL", f"Worker {shard.shard_id} ready ({message[1]})")
+
+    def _worker_died(self, shard: _Shard, conn):
+        if self._closing or conn is not shard.conn:
+            return
+        exitcode = shard.process.exitcode if shard.process is not None else None
+        metrics.log("PROCTOR POOL ERROR", f"Worker {shard.shard_id} died (exit code {exitcode}); restarting "
+                                          f"and re-opening {len(shard.sessions)} sessions")
+        POOL_WORKER_RESTARTS.inc(shard=str(shard.shard_id))
+        # Frames sent to the dead worker will never be answered
+        for handle in shard.sessions.values():
+            handle.in_flight = True
+        if time.monotonic() - shard.started_at < MIN_HEALTHY_SECONDS:
+            # Crash-looping (e.g. the model fails to load): back off instead of spinning
+            shard.restart_delay = min(max(shard.restart_delay * 2, 1.0), MAX_RESTART_DELAY_SECONDS)
+        else:
+            shard.restart_delay = 0.0
+        self._loop.call_later(shard.restart_delay, self._restart_worker, shard)
+
+    def _restart_worker(self, shard: _Shard):
+        if self._closing:
+            return
+        self._start_worker(shard)
+        for handle in shard.sessions.values():
+            handle.in_flight = False
+            if handle.shm is not None:
+                self.send(shard.shard_id, handle.open_message())
+
+    def send(self, shard_id: int, message) -> bool:
+        shard = self.shards[shard_id]
+        try:
+            with shard.send_lock:
+                shard.conn.send(message)
+            return True
+        except (BrokenPipeError, OSError):
+            # The reader thread notices the dead worker and restarts it
+            return False
+
+    def attach(self, agent) -> SessionHandle:
+        handle = SessionHandle(self, agent)
+        self.shards[handle.shard].sessions[handle.session_id] = handle
+        POOL_SESSIONS.set(len(self.shards[handle.shard].sessions), shard=str(handle.shard))
+        return handle
+
+    def detach(self, handle: SessionHandle):
+        shard = self.shards[handle.shard]
+        if shard.sessions.pop(handle.session_id, None) is not None:
+            self.send(handle.shard, ("close", handle.session_id))
+            POOL_SESSIONS.set(len(shard.sessions), shard=str(handle.shard))
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "backend": self.backend_name,
+            "shards": {
+                shard_id: {"pid": shard.process.pid if shard.process else None,
+                           "alive": bool(shard.process and shard.process.is_alive()),
+                           "sessions": len(shard.sessions)}
+                for shard_id, shard in self.shards.items()
+            },
+        }
+
+    def close(self):
+        self._closing = True
+        for shard in self.shards.values():
+            for handle in list(shard.sessions.values()):
+                handle.close()
+            self.send(shard.shard_id, ("stop",))
+        deadline = time.monotonic() + STOP_TIMEOUT_SECONDS
+        for shard in self.shards.values():
+            if shard.process is not None:
+                shard.process.join(max(0.0, deadline - time.monotonic()))
+                if shard.process.is_alive():
+                    shard.process.terminate()
+
+
+_pool: Optional[ProctorPool] = None
+
+
+def get_pool() -> ProctorPool:
+    """The process-wide pool, started on first use from the event loop."""
+    global _pool
+    if _pool is None:
+        from agents.proctor_agent import PROCTOR_WORKERS
+        _pool = ProctorPool(PROCTOR_WORKERS)
+        _pool.start()
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -1,7 +1,8 @@
 import json
-from google import genai
 
-gemini_client = genai.Client()
+from llm_manager import generate_chat_with_fallback
+from llm_scheduler import Priority
+from metrics import log
 
 REASONING_MASTER_PROMPT = """
 You are an expert Reasoning Analyzer Agent.
@@ -33,20 +34,19 @@ Return ONLY valid JSON in this exact format, with no markdown code blocks:
 
 async def call_reasoning_agent(payload: dict) -> dict:
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                {"role": "user", "parts": [{"text": REASONING_MASTER_PROMPT}]},
-                {"role": "model", "parts": [{"text": "Understood. Awaiting candidate explanation."}]},
-                {"role": "user", "parts": [{"text": json.dumps(payload)}]}
+        response_text = await generate_chat_with_fallback(
+            [
+                {"role": "user", "text": REASONING_MASTER_PROMPT},
+                {"role": "model", "text": "Understood. Awaiting candidate explanation."},
+                {"role": "user", "text": json.dumps(payload)}
             ],
-            config={
-                "response_mime_type": "application/json"
-            }
+            expect_json=True,
+            agent="reasoning",
+            priority=Priority.BACKGROUND
         )
-        return json.loads(response.text)
+        return json.loads(response_text)
     except Exception as e:
-        print(f"[REASONING AGENT ERROR] {e}")
+        log("REASONING AGENT ERROR", str(e))
         return {
             "problem_solving_score": 5, "reasoning_score": 5,
             "complexity_awareness": 5, "debugging_skill": 5,
@@ -43,6 +43,7 @@ HINT_SYSTEM_PROMPT = """You are a senior technical interviewer giving a subtle n
 
 Rules:
 - Give exactly ONE small, actionable hint about the immediate next step
+- Hint level {level} of {max_level}: {level_guidance}
 - Do NOT reveal the algorithm, pattern name, or full approach
 - Frame it as a question or gentle observation, like a real interviewer would
 - Keep it to 1-2 sentences maximum
@@ -57,6 +58,13 @@ Current code:
 {user_code}
 """
 
+# Progressive hint levels, from a gentle question to a concrete next step
+HINT_LEVEL_GUIDANCE = {
+    1: "ask a gentle guiding question that points them at what to think about",
+    2: "point out the key observation or property of the input they are missing",
+    3: "describe the concrete next step to take in their code, still without writing code",
+}
+
 STUCK_ANALYSIS_PROMPT = """You are analyzing whether a coding interview candidate appears stuck.
 They have not made any code changes for {idle_seconds} seconds.
 
@@ -104,8 +112,12 @@ def format_interviewer_prompt(problem_title: str, problem_description: str,
 
 
 def format_hint_prompt(problem_title: str, problem_description: str,
-                        language: str, user_code: str) -> str:
+                        language: str, user_code: str, level: int = 1) -> str:
+    level = max(1, min(level, len(HINT_LEVEL_GUIDANCE)))
     return HINT_SYSTEM_PROMPT.format(
+        level=level,
+        max_level=len(HINT_LEVEL_GUIDANCE),
+        level_guidance=HINT_LEVEL_GUIDANCE[level],
         problem_title=problem_title,
         problem_description=problem_description,
         language=language,
@@ -0,0 +1,206 @@
+"""
+Analytics — incrementally maintained cohort aggregates over interview reports.
+
+Each persisted report is folded into a handful of summary documents in `analytics_summaries`
+(overall, per role, per difficulty, per topic, per role × difficulty, per day) with a single
+bulk $inc. Dashboards read those documents directly, so a query costs O(groups) no matter
+how many sessions have been run.
+
+Each report document records what it contributed (`counted`: its groups and increments), so a
+re-saved report (a re-ended session, or a failed aggregation that later succeeded) applies
+only the difference. Saves and rebuilds are serialized by SUMMARIES_LOCK, so a rebuild never
+races the live updates.
+"""
+
+import asyncio
+import math
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from database import db
+import metrics
+
+DIMENSIONS = ("overall", "role", "difficulty", "topic", "role_difficulty", "day")
+REPORT_SCORE_FIELDS = ("technical_correctness", "problem_solving", "reasoning", "code_quality", "communication")
+# Headline score reported by each evaluator agent
+AGENT_SCORE_FIELDS = {
+    "code_judge": "technical_correctness",
+    "comm_eval": "communication_score",
+    "reasoning_eval": "reasoning_score",
+}
+INTEGRITY_BUCKET_WIDTH = 10
+REBUILD_COLLECTION = "analytics_summaries_rebuild"
+
+# Held around "replace a report + apply its summary delta" and around a whole rebuild
+SUMMARIES_LOCK = asyncio.Lock()
+
+
+def agent_scores(evaluations: dict) -> Dict[str, float]:
+    """Headline score from each evaluator that produced one."""
+    scores = {}
+    for agent, field in AGENT_SCORE_FIELDS.items():
+        value = (evaluations.get(agent) or {}).get(field)
+        if isinstance(value, (int, float)):
+            scores[agent] = value
+    return scores
+
+
+def _field_key(value) -> str:
+    """Makes a value safe to use as a Mongo field name."""
+    return re.sub(r"[.$]", "_", str(value)) or "unknown"
+
+
+def _groups(document: dict) -> List[Tuple[str, str]]:
+    # Keys are plain strings: an array key would make the unique (dimension, key) index multikey
+    created_at = document.get("created_at") or datetime.now(timezone.utc)
+    role = document.get("role") or "unknown"
+    difficulty = document.get("difficulty") or "unknown"
+    topic = document.get("topic") or "unknown"
+    return [
+        ("overall", "all"),
+        ("role", role),
+        ("difficulty", difficulty),
+        ("topic", topic),
+        ("role_difficulty", f"{role} / {difficulty}"),
+        ("day", created_at.strftime("%Y-%m-%d")),
+    ]
+
+
+def _increments(document: dict) -> dict:
+    scores = document.get("scores") or {}
+    inc = {"count": 1}
+    final_score = scores.get("final_score_percent")
+    if isinstance(final_score, (int, float)):
+        inc["final_score.sum"] = final_score
+        inc["final_score.sum_sq"] = final_score * final_score
+        inc["final_score.count"] = 1
+    for field in REPORT_SCORE_FIELDS:
+        value = scores.get(field)
+        if isinstance(value, (int, float)):
+            inc[f"scores.{field}.sum"] = value
+            inc[f"scores.{field}.count"] = 1
+    integrity = scores.get("integrity_score")
+    if isinstance(integrity, (int, float)):
+        bucket = min(int(integrity) // INTEGRITY_BUCKET_WIDTH * INTEGRITY_BUCKET_WIDTH, 100)
+        inc[f"integrity_histogram.{bucket}"] = 1
+    if document.get("performance_level"):
+        inc[f"performance_levels.{_field_key(document['performance_level'])}"] = 1
+    for agent, value in (document.get("agent_scores") or {}).items():
+        inc[f"agents.{agent}.sum"] = value
+        inc[f"agents.{agent}.count"] = 1
+    return inc
+
+
+def counted_entry(document: dict) -> Optional[dict]:
+    """What a report contributes to the summaries; failed aggregations contribute nothing."""
+    if document.get("aggregation_failed"):
+        return None
+    # Pairs rather than a dict: the increment paths contain dots, which field names shouldn't
+    return {"groups": [list(group) for group in _groups(document)],
+            "inc": [[field, value] for field, value in _increments(document).items()]}
+
+
+def previously_counted(previous: Optional[dict]) -> Optional[dict]:
+    """The contribution of a stored report; reports saved before `counted` existed are recomputed."""
+    if previous is None:
+        return None
+    if "counted" in previous:
+        return previous["counted"]
+    return counted_entry(previous)
+
+
+def summary_updates(previous: Optional[dict], current: Optional[dict]) -> List[UpdateOne]:
+    """$inc updates taking the summaries from `previous`'s contribution to `current`'s."""
+    deltas: Dict[Tuple[str, str], dict] = {}
+    for entry, sign in ((previous, -1), (current, 1)):
+        if not entry:
+            continue
+        for dimension, key in entry["groups"]:
+            group = deltas.setdefault((dimension, key), {})
+            for field, value in entry["inc"]:
+                group[field] = group.get(field, 0) + sign * value
+    now = datetime.now(timezone.utc)
+    updates = []
+    for (dimension, key), inc in deltas.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if inc:
+            updates.append(UpdateOne({"dimension": dimension, "key": key},
+                                     {"$inc": inc, "$set": {"updated_at": now}}, upsert=True))
+    return updates
+
+
+async def record_report(session_id: str, previous: Optional[dict], current: Optional[dict]):
+    """Applies the change in one report's contribution to every summary involved, in one round trip."""
+    updates = summary_updates(previous, current)
+    if not updates:
+        return
+    try:
+        await db.analytics_summaries.bulk_write(updates, ordered=False)
+    except Exception as e:
+        metrics.log("ANALYTICS ERROR", f"Could not update summaries for {session_id}: {e}")
+
+
+async def rebuild_summaries(batch_size: int = 1000) -> int:
+    """
+    Recomputes every summary from interview_reports (backfills, or after changing the schema)
+    into a scratch collection that then replaces the live one. Report saves wait meanwhile.
+    """
+    async with SUMMARIES_LOCK:
+        scratch = db[REBUILD_COLLECTION]
+        await scratch.drop()
+        await scratch.create_index([("dimension", 1), ("key", 1)], unique=True, name="summaries_dimension_key")
+        processed, pending, recounted = 0, [], []
+        async for document in db.interview_reports.find({"aggregation_failed": {"$ne": True}}, {"report": 0}):
+            entry = counted_entry(document)
+            pending.extend(summary_updates(None, entry))
+            # Later re-saves subtract what the rebuilt summaries actually contain
+            recounted.append(UpdateOne({"_id": document["_id"]}, {"$set": {"counted": entry}}))
+            processed += 1
+            if len(pending) >= batch_size:
+                await scratch.bulk_write(pending, ordered=False)
+                await db.interview_reports.bulk_write(recounted, ordered=False)
+                pending, recounted = [], []
+        if pending:
+            await scratch.bulk_write(pending, ordered=False)
+            await db.interview_reports.bulk_write(recounted, ordered=False)
+        await scratch.rename("analytics_summaries", dropTarget=True)
+    return processed
+
+
+def _mean(stat: Optional[dict]) -> Optional[float]:
+    if not stat or not stat.get("count"):
+        return None
+    return round(stat["sum"] / stat["count"], 2)
+
+
+def describe_summary(summary: dict) -> dict:
+    """Turns the raw running sums of one summary document into averages and distributions."""
+    final_score = summary.get("final_score") or {}
+    stddev = None
+    if final_score.get("count"):
+        mean = final_score["sum"] / final_score["count"]
+        variance = max(final_score["sum_sq"] / final_score["count"] - mean * mean, 0.0)
+        stddev = round(math.sqrt(variance), 2)
+    return {
+        "key": summary["key"],
+        "sessions": summary.get("count", 0),
+        "avg_final_score_percent": _mean(final_score),
+        "final_score_stddev": stddev,
+        "avg_scores": {field: _mean(stat) for field, stat in (summary.get("scores") or {}).items()},
+        "agent_averages": {agent: _mean(stat) for agent, stat in (summary.get("agents") or {}).items()},
+        "integrity_histogram": dict(sorted((summary.get("integrity_histogram") or {}).items(), key=lambda kv: int(kv[0]))),
+        "performance_levels": summary.get("performance_levels") or {},
+        "updated_at": summary.get("updated_at"),
+    }
+
+
+async def get_dimension(dimension: str, limit: int = 500) -> List[dict]:
+    """All groups of one dimension; for "day" the most recent `limit` days, oldest first."""
+    newest_first = dimension == "day"
+    cursor = (db.analytics_summaries.find({"dimension": dimension}, {"_id": 0})
+              .sort("key", -1 if newest_first else 1).limit(limit))
+    groups = [describe_summary(summary) async for summary in cursor]
+    return groups[::-1] if newest_first else groups
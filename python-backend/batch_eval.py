@@ -0,0 +1,280 @@
+"""
+Batch Evaluation — offline grading of many standalone submissions as one job.
+
+Identical submissions (same problem, language and code up to trailing whitespace) are graded
+once. Unique submissions go through a bounded worker pool at BACKGROUND LLM priority with
+retry and exponential backoff. Results can be streamed while the job runs.
+
+A job is stored in Mongo before it starts: metadata in `batch_jobs`, one `batch_items` document
+per unique submission and one `batch_suites` document per problem, so no single document grows
+with the size of the cohort. Progress is persisted per unique submission (`batch_results`), so
+a job interrupted by a restart can be resumed and only the missing submissions are graded again.
+The hidden test suites are pinned when the job is created: the problem store is in-memory and
+LRU-capped, and a resumed job must not switch its submissions from test-based to LLM-only
+grading partway through.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from database import db
+from llm_scheduler import Priority
+from problem_store import get_problem_tests
+from solution_evaluator import EvaluateRequest, evaluate_submission
+import metrics
+
+BATCH_EVAL_CONCURRENCY = 8
+MAX_BATCH_ITEMS = 10000
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+BATCH_ITEMS = metrics.Counter("batch_eval_items_total", "Batch-evaluated submissions by outcome.", ("outcome",))
+BATCH_RETRIES = metrics.Counter("batch_eval_retries_total", "Retried batch evaluation attempts.")
+
+MAX_RETAINED_JOBS = 100
+# Documents per insert_many when storing a job
+STORE_CHUNK_SIZE = 500
+
+JOBS: Dict[str, "BatchJob"] = {}
+
+
+def submission_key(item: EvaluateRequest) -> str:
+    """Identity of a submission for dedup; whitespace at line ends and line endings don't matter."""
+    code = "\n".join(line.rstrip() for line in item.user_code.replace("\r\n", "\n").strip().split("\n"))
+    problem = item.problem_id or f"{item.problem_title}\n{item.problem_description}"
+    digest = hashlib.sha1()
+    for part in (problem, item.language.lower(), code, str(item.detailed_feedback)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def pin_suites(requests) -> Dict[str, Optional[dict]]:
+    """problem_id -> hidden suite as the problem store has it now (None: graded by the LLM)."""
+    suites = {}
+    for request in requests:
+        if request.problem_id and request.problem_id not in suites:
+            tests = get_problem_tests(request.problem_id)
+            suites[request.problem_id] = (
+                {"function_name": tests["function_name"], "cases": tests["cases"]} if tests else None)
+    return suites
+
+
+class BatchJob:
+    def __init__(self, job_id: str, items: List[dict], concurrency: int = BATCH_EVAL_CONCURRENCY,
+                 suites: Optional[Dict[str, Optional[dict]]] = None):
+        """items: [{"item_id": str, "request": EvaluateRequest}]; suites: see pin_suites."""
+        self.job_id = job_id
+        self.items = items
+        self.concurrency = max(1, min(concurrency, 32))
+        self.unique: Dict[str, EvaluateRequest] = {}
+        self.item_ids: Dict[str, List[str]] = {}
+        for item in items:
+            key = submission_key(item["request"])
+            self.unique.setdefault(key, item["request"])
+            self.item_ids.setdefault(key, []).append(item["item_id"])
+        self.suites = pin_suites(self.unique.values()) if suites is None else suites
+        # Completed results in completion order; streams read by offset
+        self.results: List[dict] = []
+        self.done_keys = set()
+        self.status = "pending"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._pending_writes = set()
+
+    def progress(self) -> dict:
+        failed = sum(1 for r in self.results if r.get("error"))
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "items": len(self.items),
+            "unique_submissions": len(self.unique),
+            "completed": len(self.results),
+            "failed": failed,
+            "concurrency": self.concurrency,
+            "elapsed_s": round((self.finished_at or time.time()) - self.created_at, 2),
+        }
+
+    async def store(self):
+        """
+        Writes the job so it can be resumed; raises if any part could not be written. The job
+        document goes last, so one that exists always has all its submissions and suites.
+        """
+        # Only the unique submissions are stored; item ids map back onto them
+        submissions = [{"_id": f"{self.job_id}:{key}", "job_id": self.job_id, "key": key,
+                        "request": request.model_dump(), "item_ids": self.item_ids[key]}
+                       for key, request in self.unique.items()]
+        suites = [{"_id": f"{self.job_id}:{problem_id}", "job_id": self.job_id, "problem_id": problem_id,
+                   "suite": suite}
+                  for problem_id, suite in self.suites.items()]
+        for collection, documents in ((db.batch_items, submissions), (db.batch_suites, suites)):
+            for start in range(0, len(documents), STORE_CHUNK_SIZE):
+                await collection.insert_many(documents[start:start + STORE_CHUNK_SIZE], ordered=False)
+        await db.batch_jobs.insert_one({
+            "_id": self.job_id,
+            "created_at": datetime.fromtimestamp(self.created_at, tz=timezone.utc),
+            "status": self.status,
+            "concurrency": self.concurrency,
+            "items": len(self.items),
+            "unique_submissions": len(self.unique),
+        })
+
+    async def _persist_result(self, result: dict):
+        await _db_safe(db.batch_results.replace_one({"_id": f"{self.job_id}:{result['key']}"},
+                                                    {**result, "job_id": self.job_id}, upsert=True))
+
+    async def _evaluate_with_retry(self, key: str) -> dict:
+        request = self.unique[key]
+        started = time.perf_counter()
+        if request.problem_id and request.problem_id not in self.suites:
+            BATCH_ITEMS.inc(outcome="failed")
+            return {"key": key, "item_ids": self.item_ids[key], "attempts": 0, "seconds": 0.0,
+                    "error": f"Hidden test suite for problem {request.problem_id} is no longer available; "
+                             f"not re-grading with a different method"}
+        suite = self.suites.get(request.problem_id) if request.problem_id else None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                verdict = await evaluate_submission(request, priority=Priority.BACKGROUND, tests=suite)
+                BATCH_ITEMS.inc(outcome="ok")
+                return {"key": key, "item_ids": self.item_ids[key], "result": verdict.model_dump(),
+                        "attempts": attempt, "seconds": round(time.perf_counter() - started, 3)}
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e) or type(e).__name__
+                if attempt == MAX_ATTEMPTS:
+                    BATCH_ITEMS.inc(outcome="failed")
+                    return {"key": key, "item_ids": self.item_ids[key], "error": error,
+                            "attempts": attempt, "seconds": round(time.perf_counter() - started, 3)}
+                BATCH_RETRIES.inc()
+                # Full jitter keeps a cohort of retries from hitting the providers in lockstep
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, delay))
+
+    def _record(self, result: dict):
+        self.results.append(result)
+        self.done_keys.add(result["key"])
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _run(self):
+        self.status = "running"
+        await _db_safe(db.batch_jobs.update_one({"_id": self.job_id}, {"$set": {"status": self.status}}))
+        queue: asyncio.Queue = asyncio.Queue()
+        for key in self.unique:
+            if key not in self.done_keys:
+                queue.put_nowait(key)
+
+        async def worker():
+            while True:
+                try:
+                    key = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._evaluate_with_retry(key)
+                self._record(result)
+                # Progress writes don't hold up the next submission
+                write = asyncio.create_task(self._persist_result(result))
+                self._pending_writes.add(write)
+                write.add_done_callback(self._pending_writes.discard)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes)
+        self.status = "completed"
+        self.finished_at = time.time()
+        self._changed.set()
+        await _db_safe(db.batch_jobs.update_one({"_id": self.job_id}, {"$set": {"status": self.status}}))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self.status = "pending"
+            self.finished_at = None
+            self._task = asyncio.create_task(metrics.with_trace(metrics.new_trace_id(), self._run)())
+
+    async def stream(self, after: int = 0):
+        """Yields results from offset `after` onwards, waiting for new ones until the job finishes."""
+        index = after
+        while True:
+            changed = self._changed
+            while index < len(self.results):
+                yield index, self.results[index]
+                index += 1
+            if self.status == "completed":
+                return
+            await changed.wait()
+
+
+async def _db_safe(awaitable):
+    try:
+        return await awaitable
+    except Exception as e:
+        metrics.log("BATCH EVAL WARNING", f"Database write failed: {e}")
+
+
+async def create_job(items: List[dict], concurrency: int = BATCH_EVAL_CONCURRENCY) -> BatchJob:
+    """Stores and starts a job. Raises if it could not be stored: a job that can't be resumed isn't started."""
+    job = BatchJob(uuid.uuid4().hex, items, concurrency)
+    try:
+        await job.store()
+    except Exception:
+        # Nothing refers to a partly stored job; drop what did get written
+        await _db_safe(db.batch_items.delete_many({"job_id": job.job_id}))
+        await _db_safe(db.batch_suites.delete_many({"job_id": job.job_id}))
+        raise
+    JOBS[job.job_id] = job
+    finished = [job_id for job_id, j in JOBS.items() if j.status == "completed"]
+    for job_id in finished[:max(0, len(JOBS) - MAX_RETAINED_JOBS)]:
+        # Finished jobs remain resumable from Mongo
+        del JOBS[job_id]
+    job.start()
+    return job
+
+
+async def resume_job(job_id: str) -> Optional[BatchJob]:
+    """Restarts a job, in this process or from its persisted state, skipping finished submissions."""
+    job = JOBS.get(job_id)
+    if job is None:
+        stored = await db.batch_jobs.find_one({"_id": job_id})
+        if stored is None:
+            return None
+        if "submissions" in stored:
+            # Jobs stored as a single document, before items and suites had their own collections
+            submissions = [{"request": stored["submissions"][key], "item_ids": item_ids}
+                           for key, item_ids in stored["item_ids"].items()]
+            suites = stored.get("suites")
+        else:
+            submissions = await db.batch_items.find({"job_id": job_id}, {"request": 1, "item_ids": 1}).to_list(None)
+            suites = {document["problem_id"]: document["suite"]
+                      async for document in db.batch_suites.find({"job_id": job_id})}
+        items = [
+            {"item_id": item_id, "request": EvaluateRequest(**submission["request"])}
+            for submission in submissions for item_id in submission["item_ids"]
+        ]
+        if suites is None:
+            # Jobs stored before suites were pinned: only problems still in the store can be graded
+            # the way they were; the rest fail explicitly rather than falling back to the LLM
+            pinned = pin_suites(EvaluateRequest(**submission["request"]) for submission in submissions)
+            suites = {problem_id: tests for problem_id, tests in pinned.items() if tests is not None}
+        job = BatchJob(job_id, items, stored.get("concurrency", BATCH_EVAL_CONCURRENCY), suites)
+        job.created_at = stored["created_at"].timestamp()
+        async for result in db.batch_results.find({"job_id": job_id}, {"_id": 0, "job_id": 0}):
+            # Failed submissions get another chance on resume
+            if not result.get("error"):
+                job.results.append(result)
+                job.done_keys.add(result["key"])
+        JOBS[job_id] = job
+    elif job.status != "completed":
+        return job
+    else:
+        # Retry only the submissions that ran out of attempts
+        job.results = [r for r in job.results if not r.get("error")]
+        job.done_keys = {r["key"] for r in job.results}
+    job.start()
+    return job
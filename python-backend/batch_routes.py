@@ -0,0 +1,81 @@
+"""
+Batch Routes — FastAPI router for offline batch grading of standalone submissions.
+"""
+
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from batch_eval import JOBS, MAX_BATCH_ITEMS, BATCH_EVAL_CONCURRENCY, create_job, resume_job
+from solution_evaluator import EvaluateRequest
+import metrics
+
+router = APIRouter()
+
+
+class BatchItem(EvaluateRequest):
+    item_id: Optional[str] = None
+
+class BatchEvaluateRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: int = BATCH_EVAL_CONCURRENCY
+
+
+async def _stream_results(job, after: int):
+    async for index, result in job.stream(after):
+        yield json.dumps({"index": index, **result}) + "\n"
+    yield json.dumps({"progress": job.progress()}) + "\n"
+
+
+@router.post("/api/batch-evaluate")
+async def start_batch_evaluation(req: BatchEvaluateRequest):
+    """
+    Starts grading many submissions as one background job. Identical submissions are graded
+    once; follow progress with GET /api/batch-evaluate/{job_id}/results.
+    """
+    if not req.items:
+        raise HTTPException(status_code=400, detail="No items to evaluate")
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    items = [
+        {"item_id": item.item_id or str(index), "request": EvaluateRequest(**item.model_dump(exclude={"item_id"}))}
+        for index, item in enumerate(req.items)
+    ]
+    try:
+        job = await create_job(items, req.concurrency)
+    except Exception as e:
+        metrics.log("BATCH EVAL ERROR", f"Could not store batch job: {e}")
+        raise HTTPException(status_code=503, detail="Could not store the batch job; nothing was started")
+    return job.progress()
+
+
+@router.get("/api/batch-evaluate/{job_id}")
+async def get_batch_progress(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.progress()
+
+
+@router.get("/api/batch-evaluate/{job_id}/results")
+async def stream_batch_results(job_id: str, after: int = Query(0, ge=0)):
+    """
+    Streams results as NDJSON in completion order, starting at offset `after`, and keeps the
+    connection open until the job finishes. Reconnect with the last index + 1 to continue.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return StreamingResponse(_stream_results(job, after), media_type="application/x-ndjson")
+
+
+@router.post("/api/batch-evaluate/{job_id}/resume")
+async def resume_batch_evaluation(job_id: str):
+    """Resumes an interrupted job (e.g. after a restart); finished submissions are not graded again."""
+    job = await resume_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.progress()
@@ -0,0 +1,189 @@
+"""
+End-to-end load test — simulates N candidates running a full interview against the API.
+
+Each simulated candidate runs start-session → chat ×K (with sync-code between turns) →
+submit-code → end-session, with think time between steps. By default the FastAPI app is
+served in-process by uvicorn with mock LLM/TTS providers and the proctor disabled, so
+the run is fully offline; pass --url to target an already running server instead.
+
+    python benchmarks/load_test.py --candidates 50 --concurrency 20 --chats 4
+    MOCK_GEMINI_LATENCY_MS=300,900 python benchmarks/load_test.py --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+
+CANDIDATE_CODE = "def two_sum(nums, target):\n    seen = {}\n    for i, n in enumerate(nums):\n        if target - n in seen:\n            return [seen[target - n], i]\n        seen[n] = i\n    return []\n"
+CHAT_LINES = [
+    "I think I can use a hash map to remember values I've already seen.",
+    "First I iterate once, then for each element I check whether the complement exists.",
+    "That would be O(n) time and O(n) extra space.",
+    "For an empty array I would just return an empty list.",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, method: str, endpoint: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, endpoint, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if not ok:
+            self.errors[endpoint] += 1
+        return response.json() if ok else None
+
+
+async def run_candidate(index: int, client: httpx.AsyncClient, recorder: Recorder, args, problem_id):
+    think = lambda: asyncio.sleep(random.uniform(0, 2 * args.think_ms / 1000.0))
+
+    start = await recorder.call(client, "POST", "/api/start-session", json={
+        "candidate_name": f"Load Candidate {index}",
+        "role": "Software Engineer",
+        "experience_years": random.randint(0, 10),
+        "languages": ["python"],
+        "problem_title": "Two Sum",
+        "difficulty_level": random.choice(["easy", "medium", "hard"]),
+        "problem_id": problem_id,
+    })
+    if not start:
+        return
+    session_id = start["session_id"]
+
+    code = "def two_sum(nums, target):\n    pass\n"
+    for turn in range(args.chats):
+        await think()
+        code = CANDIDATE_CODE[: int(len(CANDIDATE_CODE) * (turn + 1) / args.chats)]
+        await recorder.call(client, "POST", "/api/sync-code", json={"session_id": session_id, "code": code})
+        await recorder.call(client, "POST", "/api/chat", json={
+            "session_id": session_id,
+            "message": CHAT_LINES[turn % len(CHAT_LINES)],
+            "code": code,
+            "history": [],
+        })
+
+    await think()
+    await recorder.call(client, "POST", "/api/submit-code", json={
+        "session_id": session_id, "code": CANDIDATE_CODE, "language": "python"
+    })
+    await think()
+    await recorder.call(client, "POST", "/api/end-session", json={"session_id": session_id})
+
+
+async def run_load(args, base_url: str) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        problem = await recorder.call(client, "POST", "/api/generate-problem", json={"topic": "arrays"})
+        problem_id = problem.get("problem_id") if problem else None
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i):
+            async with semaphore:
+                await run_candidate(i, client, recorder, args, problem_id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(i) for i in range(args.candidates)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, values in recorder.latencies.items():
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(endpoint, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p90_ms": round(percentile(values, 90) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+    total_requests = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "candidates": args.candidates,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "sessions_per_s": round(args.candidates / elapsed, 3) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['candidates']} candidates, concurrency {report['concurrency']}, "
+          f"{report['elapsed_s']}s → {report['throughput_rps']} req/s, {report['sessions_per_s']} sessions/s\n")
+    print(f"{'endpoint':<26}{'reqs':>6}{'errs':>6}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for endpoint, s in sorted(report["endpoints"].items()):
+        print(f"{endpoint:<26}{s['requests']:>6}{s['errors']:>6}{s['p50_ms']:>9}{s['p90_ms']:>9}"
+              f"{s['p95_ms']:>9}{s['p99_ms']:>9}{s['max_ms']:>9}")
+    print("(latencies in ms)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--chats", type=int, default=3, help="chat turns per candidate")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean think time between steps")
+    parser.add_argument("--url", help="target an already running server instead of an in-process one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        os.environ.setdefault("LLM_PROVIDER", "mock")
+        os.environ.setdefault("PROCTOR_ENABLED", "0")
+        os.chdir(BACKEND_DIR)
+        import uvicorn
+        from main import app
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        report = await run_load(args, base_url)
+    finally:
+        if server:
+            server.should_exit = True
+            await server_task
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""
+Login throughput benchmark — burst of /api/login calls as at an interview start-time.
+
+Registers --users accounts, then fires --logins concurrent logins while a probe polls a
+cheap endpoint (GET /) to show how much the burst stalls everything else. By default the
+app runs in-process against an in-memory MongoDB stand-in (unique email index enforced);
+pass --mongo-uri to use a real local mongod instead. --inline hashes on the event loop,
+as the API used to, for comparison.
+
+    python benchmarks/login_throughput.py --users 50 --logins 400 --concurrency 50
+    python benchmarks/login_throughput.py --inline
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+from pymongo.errors import DuplicateKeyError
+
+from load_test import percentile
+
+
+class InMemoryCollection:
+    """The subset of a Motor collection the auth endpoints use."""
+
+    def __init__(self):
+        self._docs = []
+        self._unique = set()
+
+    async def create_index(self, key, unique=False, name=None):
+        if unique:
+            self._unique.add(key)
+        return name or key
+
+    async def insert_one(self, document):
+        await asyncio.sleep(0)  # a real driver always yields here
+        for key in self._unique:
+            if any(d.get(key) == document.get(key) for d in self._docs):
+                raise DuplicateKeyError(f"E11000 duplicate key error ({key})")
+        self._docs.append(copy.deepcopy(document))
+
+    async def find_one(self, query, projection=None):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if all(doc.get(k) == v for k, v in query.items()):
+                if projection:
+                    return {k: doc[k] for k in projection if k in doc}
+                return copy.deepcopy(doc)
+        return None
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.users = InMemoryCollection()
+
+
+async def run_benchmark(args, base_url: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        for i in range(args.users):
+            await client.post("/api/register", json={
+                "username": f"user{i}", "email": f"user{i}@example.com", "password": f"password-{i}"
+            })
+        duplicate = await client.post("/api/register", json={
+            "username": "dup", "email": "user0@example.com", "password": "x"
+        })
+
+        login_latencies, probe_latencies, failures = [], [], 0
+        burst_done = asyncio.Event()
+
+        async def probe():
+            while not burst_done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login(i):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/login", json={
+                    "email": f"user{i % args.users}@example.com", "password": f"password-{i % args.users}"
+                })
+                login_latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failures += 1
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        burst_done.set()
+        await probe_task
+
+    ms = lambda values, pct: round(percentile(values, pct) * 1000, 1)
+    return {
+        "mode": "inline" if args.inline else "offloaded",
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "failures": failures,
+        "duplicate_register_status": duplicate.status_code,
+        "elapsed_s": round(elapsed, 2),
+        "logins_per_s": round(args.logins / elapsed, 1),
+        "login_p50_ms": ms(login_latencies, 50),
+        "login_p95_ms": ms(login_latencies, 95),
+        "probe_p50_ms": ms(probe_latencies, 50),
+        "probe_p95_ms": ms(probe_latencies, 95),
+        "probe_max_ms": round(max(probe_latencies, default=0) * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (old behaviour)")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+    os.environ.setdefault("PROCTOR_ENABLED", "0")
+    if args.mongo_uri:
+        os.environ["MONGODB_URI"] = args.mongo_uri
+    os.chdir(BACKEND_DIR)
+    import uvicorn
+    import main as api
+
+    if not args.mongo_uri:
+        stand_in = InMemoryDatabase()
+        api.db = stand_in
+        import database
+        database.db = stand_in
+    if args.inline:
+        async def verify_inline(plain, hashed):
+            return api.pwd_context.verify(plain, hashed)
+
+        async def hash_inline(password):
+            return api.pwd_context.hash(password)
+
+        api.verify_password, api.get_password_hash = verify_inline, hash_inline
+
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        report = await run_benchmark(args, f"http://127.0.0.1:{args.port}")
+    finally:
+        server.should_exit = True
+        await server_task
+
+    for key, value in report.items():
+        print(f"{key:<28}{value}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Proctor backend benchmark — per-frame latency and detection agreement against the baseline.
+
+Runs every fixture image (evidence/*.jpg by default) through the baseline detector
+(ultralytics, 640) and each candidate backend, then reports ms/frame and how often the
+candidate agrees with the baseline: same person-present decision, baseline boxes matched
+at IoU >= 0.5, and the same classify_behavior verdict for the most confident person.
+
+Candidates are backend[:imgsz][:int8][:roi], e.g.
+
+    python benchmarks/proctor_backends.py --candidates onnx:640 onnx:416 onnx:416:int8 ultralytics:416
+    python benchmarks/proctor_backends.py --candidates ultralytics:640:roi onnx:640:int8:roi
+    python benchmarks/proctor_backends.py --images "evidence/*.jpg" --limit 100 --json proctor.json
+
+`roi` runs the detector through RoiTracker; fixture frames are read in name order, so
+consecutive frames of one session exercise tracking as a live camera would.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from load_test import percentile
+
+IOU_MATCH = 0.5
+
+
+def iou(a, b) -> float:
+    ix1, iy1, ix2, iy2 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def parse_candidate(spec: str) -> dict:
+    parts = spec.split(":")
+    return {"spec": spec, "backend": parts[0], "imgsz": int(parts[1]) if len(parts) > 1 else 640,
+            "int8": "int8" in parts[2:], "roi": "roi" in parts[2:]}
+
+
+def build(candidate: dict):
+    from agents import proctor_backends
+    if candidate["backend"] == "onnx":
+        # No silent fallback here: a benchmark of the fallback would be misleading
+        detector = proctor_backends.OnnxDetector(candidate["imgsz"], candidate["int8"])
+    else:
+        detector = proctor_backends.UltralyticsDetector(candidate["imgsz"])
+    return proctor_backends.RoiTracker(detector) if candidate["roi"] else detector
+
+
+def run(detector, frames, warmup: int = 3):
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(detector.detect(frame))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return detections, latencies
+
+
+def behavior(boxes) -> str:
+    from agents.proctor_agent import ProctorAgent
+    if not boxes:
+        return "None"
+    x1, y1, x2, y2, _ = max(boxes, key=lambda b: b[4])
+    return ProctorAgent("benchmark").classify_behavior(x1, y1, x2, y2)
+
+
+def agreement(baseline, candidate) -> dict:
+    presence = sum(bool(b) == bool(c) for b, c in zip(baseline, candidate)) / len(baseline)
+    matched = total = 0
+    for base_boxes, cand_boxes in zip(baseline, candidate):
+        for box in base_boxes:
+            total += 1
+            matched += any(iou(box, other) >= IOU_MATCH for other in cand_boxes)
+    same_behavior = sum(behavior(b) == behavior(c) for b, c in zip(baseline, candidate)) / len(baseline)
+    return {"person_present": round(presence, 3), "box_recall_iou50": round(matched / total, 3) if total else None,
+            "behavior": round(same_behavior, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="evidence/*.jpg")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--baseline", default="ultralytics:640")
+    parser.add_argument("--candidates", nargs="+", default=["onnx:640", "onnx:416", "onnx:416:int8"])
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    import cv2
+    paths = sorted(glob.glob(args.images))[:args.limit]
+    frames = [f for f in (cv2.imread(p) for p in paths) if f is not None]
+    if not frames:
+        parser.error(f"no readable images match {args.images}")
+
+    baseline_spec = parse_candidate(args.baseline)
+    baseline, baseline_ms = run(build(baseline_spec), frames)
+    report = [{"backend": args.baseline, "frames": len(frames), "ms_p50": round(percentile(baseline_ms, 50), 2),
+               "ms_mean": round(statistics.mean(baseline_ms), 2), "speedup": 1.0,
+               "person_present": 1.0, "box_recall_iou50": 1.0, "behavior": 1.0}]
+    for spec in args.candidates:
+        candidate = parse_candidate(spec)
+        try:
+            detections, latencies = run(build(candidate), frames)
+        except Exception as e:
+            report.append({"backend": spec, "error": f"{type(e).__name__}: {e}"})
+            continue
+        report.append({"backend": spec, "frames": len(frames), "ms_p50": round(percentile(latencies, 50), 2),
+                       "ms_mean": round(statistics.mean(latencies), 2),
+                       "speedup": round(statistics.mean(baseline_ms) / statistics.mean(latencies), 2),
+                       **agreement(baseline, detections)})
+
+    print(f"{'backend':<20}{'ms p50':>9}{'ms mean':>9}{'speedup':>9}{'present':>9}{'recall':>9}{'behavior':>9}")
+    for row in report:
+        if "error" in row:
+            print(f"{row['backend']:<20}  failed: {row['error']}")
+            continue
+        print(f"{row['backend']:<20}{row['ms_p50']:>9}{row['ms_mean']:>9}{row['speedup']:>9}"
+              f"{row['person_present']:>9}{str(row['box_recall_iou50']):>9}{row['behavior']:>9}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Session replay — re-drive recorded interviews through the agents to measure latency, token
+usage and score drift after a prompt or agent change.
+
+A recording is a session's event log (see event_log.py): candidate turns with their code,
+code submissions, test results and warnings, with timestamps. Each replay feeds the candidate
+side back through call_brain_agent, the Communication/Reasoning/Code Judge evaluators and
+call_aggregator_agent exactly as chat_routes does, compressing the think time by --speed.
+Many recordings (and --repeat copies of each) run in parallel.
+
+Recordings can come from an NDJSON event export, a session archive (.json.gz), Mongo
+(--session-id) or the built-in --sample. Save a run with --out and compare a later run
+against it with --compare; without --compare, scores are compared to the recorded reports.
+
+    python benchmarks/replay.py --sample 20 --parallel 10 --out baseline.json
+    python benchmarks/replay.py --events recordings/*.ndjson --compare baseline.json
+    python benchmarks/replay.py --session-id 3f2a... --speed 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from load_test import CANDIDATE_CODE, CHAT_LINES, percentile
+
+SCORE_FIELDS = ("final_score_percent", "technical_correctness", "problem_solving", "reasoning",
+                "code_quality", "communication", "integrity_score")
+
+
+# ─── Recordings ───────────────────────────────────────────────────────────
+
+def recording_from_events(recording_id: str, events: list) -> dict:
+    """Normalizes an event-log timeline into the steps a replay drives."""
+    events = sorted(events, key=lambda e: e.get("seq", 0))
+    start_ts = events[0]["ts"] if events else 0.0
+    recording = {"id": recording_id, "candidate": {}, "resume_text": "", "steps": [],
+                 "recorded_report": None, "recorded_evaluations": {}}
+    for event in events:
+        payload, kind = event.get("payload") or {}, event["kind"]
+        at = event.get("ts", start_ts) - start_ts
+        if kind == "session_started":
+            recording["candidate"] = payload.get("candidate") or {}
+            recording["resume_text"] = payload.get("resume_text", "")
+        elif kind in ("candidate_turn", "code_submitted", "proctor_warning"):
+            recording["steps"].append({"at": at, "kind": kind, **payload})
+        elif kind == "browser_warnings":
+            recording["steps"].append({"at": at, "kind": "browser_events", "events": payload["events"]})
+        elif kind == "browser_warning":
+            # Logs from before batched reporting have one event per entry
+            recording["steps"].append({"at": at, "kind": "browser_events", "events": [{
+                "type": payload.get("type"), "message": payload.get("message"),
+                "is_terminal": payload.get("is_terminal", False), "timestamp": event.get("ts"),
+            }]})
+        elif kind == "test_results":
+            # Attach measured results to the submission they belong to
+            for step in reversed(recording["steps"]):
+                if step["kind"] == "code_submitted":
+                    step["test_results"] = payload.get("test_results")
+                    step["complexity_profile"] = payload.get("complexity_profile")
+                    break
+        elif kind == "evaluation":
+            recording["recorded_evaluations"][payload["agent"]] = payload.get("result")
+        elif kind == "session_ended":
+            recording["recorded_report"] = payload.get("report")
+    return recording
+
+
+def recording_from_archive(path: Path) -> dict:
+    """Session archives only keep the final state, so turns are spread evenly over the session."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        archived = json.load(f)
+    duration = max((archived.get("ended_at") or archived.get("archived_at", 0)) - archived.get("started_at", 0), 0)
+    turns = archived.get("transcripts", [])
+    gap = duration / (len(turns) + 1) if duration else 0.0
+    steps = [{"at": gap * (i + 1), "kind": "candidate_turn", "text": text, "code": archived.get("latest_code", "")}
+             for i, text in enumerate(turns)]
+    # Archived browser warnings are already coalesced episodes
+    steps += [{"at": gap * (len(turns) + 1), "kind": "browser_episode", "episode": w}
+              for w in archived.get("browser_warnings", [])]
+    steps += [{"at": gap * (len(turns) + 1), "kind": "proctor_warning", "message": m}
+              for m in archived.get("proctor_warnings", [])]
+    if archived.get("latest_code"):
+        steps.append({"at": duration, "kind": "code_submitted", "code": archived["latest_code"],
+                      "language": (archived.get("candidate", {}).get("languages") or ["python"])[0],
+                      "test_results": archived.get("test_results"),
+                      "complexity_profile": archived.get("complexity_profile")})
+    return {"id": archived.get("session_id", path.stem), "candidate": archived.get("candidate", {}),
+            "resume_text": archived.get("resume_text", ""), "steps": sorted(steps, key=lambda s: s["at"]),
+            "recorded_report": archived.get("final_report"), "recorded_evaluations": archived.get("evaluations") or {}}
+
+
+def sample_recording(index: int) -> dict:
+    steps = []
+    for turn, line in enumerate(CHAT_LINES):
+        code = CANDIDATE_CODE[: int(len(CANDIDATE_CODE) * (turn + 1) / len(CHAT_LINES))]
+        steps.append({"at": 45.0 * (turn + 1), "kind": "candidate_turn", "text": line, "code": code})
+    steps.append({"at": 45.0 * len(CHAT_LINES) + 30, "kind": "code_submitted", "code": CANDIDATE_CODE,
+                  "language": "python",
+                  "test_results": {"passed": 5, "total": 5, "failed_cases": [], "runtime_ms": 3.1}})
+    return {"id": f"sample-{index}", "resume_text": "Backend engineer, 3 years of Python.", "steps": steps,
+            "candidate": {"name": f"Sample {index}", "role": "Software Engineer", "experience_years": 3,
+                          "languages": ["python"], "interview_topic": "Two Sum", "difficulty_level": "easy"},
+            "recorded_report": None, "recorded_evaluations": {}}
+
+
+async def load_recordings(args) -> list:
+    recordings = []
+    for path in args.events or []:
+        lines = Path(path).read_text().splitlines()
+        by_session = defaultdict(list)
+        for line in filter(None, lines):
+            event = json.loads(line)
+            by_session[event["session_id"]].append(event)
+        recordings += [recording_from_events(sid, events) for sid, events in by_session.items()]
+    for path in args.archive or []:
+        recordings.append(recording_from_archive(Path(path)))
+    if args.session_id:
+        from event_log import event_log
+        for session_id in args.session_id:
+            recordings.append(recording_from_events(session_id, await event_log.load_session(session_id)))
+    recordings += [sample_recording(i) for i in range(args.sample)]
+    return recordings
+
+
+# ─── Replay ───────────────────────────────────────────────────────────────
+
+class _RecordedProctor:
+    def __init__(self):
+        self.warnings = []
+
+    def get_warnings(self):
+        return self.warnings
+
+
+async def replay_session(recording: dict, speed: float) -> dict:
+    """Drives one recording through the agents the way chat_routes does; returns scores and spans."""
+    import metrics
+    from agents.brain_agent import call_brain_agent
+    from agents.code_judge_agent import call_code_judge_agent
+    from agents.comm_eval_agent import call_comm_eval_agent
+    from agents.reasoning_agent import call_reasoning_agent
+    from agents.aggregator_agent import call_aggregator_agent
+    from report_cache import build_aggregator_payload
+    from browser_infractions import record_events, describe_episode
+    from interview_phases import (INITIAL_PHASE, should_evaluate, should_judge, record_candidate_turn,
+                                  apply_brain_action, on_code_submitted, on_test_results)
+
+    trace_id = metrics.new_trace_id()
+    metrics.set_trace_id(trace_id)
+    session = {
+        "candidate": recording["candidate"], "resume_text": recording["resume_text"],
+        "transcripts": [], "latest_code": "", "test_results": {}, "complexity_profile": None,
+        "evaluations": {"code_judge": None, "comm_eval": None, "reasoning_eval": None},
+        "browser_warnings": [], "proctor_agent": _RecordedProctor(),
+        "phase": INITIAL_PHASE, "phase_turns": 0,
+    }
+    evaluators = []
+    started = time.perf_counter()
+
+    async def evaluate_speech(transcript: str, run_comm: bool, run_reasoning: bool):
+        if run_comm:
+            session["evaluations"]["comm_eval"] = await call_comm_eval_agent({"transcript": transcript})
+        if run_reasoning:
+            session["evaluations"]["reasoning_eval"] = await call_reasoning_agent({
+                "approach_explanation": transcript,
+                "problem": session["candidate"].get("interview_topic", ""),
+                "candidate_steps": transcript,
+            })
+
+    async def judge(step: dict):
+        session["evaluations"]["code_judge"] = await call_code_judge_agent({
+            "code": step["code"],
+            "language": step.get("language", "python"),
+            "problem": session["candidate"].get("interview_topic", ""),
+            "constraints": "O(N) time complexity",
+            "test_results": step.get("test_results") or {},
+            "complexity_profile": step.get("complexity_profile") or {},
+        })
+
+    await call_brain_agent({
+        "candidate": session["candidate"], "resume_text": session["resume_text"], "phase": INITIAL_PHASE,
+        "transcript": "Hello, I am ready to begin.", "code_submission": "", "test_results": {},
+        "cheat_warnings": [], "context_summary": "Initial greeting.",
+    })
+    for step in recording["steps"]:
+        if speed > 0:
+            await asyncio.sleep(max(0.0, step["at"] / speed - (time.perf_counter() - started)))
+        if step["kind"] == "candidate_turn":
+            session["latest_code"] = step.get("code", session["latest_code"])
+            session["transcripts"].append(step["text"])
+            evaluators.append(asyncio.create_task(evaluate_speech(
+                step["text"], should_evaluate(session, "comm_eval"), should_evaluate(session, "reasoning_eval"))))
+            phase = record_candidate_turn(session)
+            brain_resp = await call_brain_agent({
+                "candidate": session["candidate"], "resume_text": session["resume_text"], "phase": phase,
+                "transcript": step["text"], "code_submission": session["latest_code"],
+                "test_results": session["test_results"],
+                "cheat_warnings": session["proctor_agent"].warnings + [describe_episode(w) for w in session["browser_warnings"]],
+                "context_summary": f"Recent history size: {len(session['transcripts'])}",
+            })
+            apply_brain_action(session, brain_resp.get("action"))
+        elif step["kind"] == "code_submitted":
+            session["latest_code"] = step["code"]
+            session["test_results"] = step.get("test_results") or {}
+            session["complexity_profile"] = step.get("complexity_profile")
+            on_code_submitted(session)
+            run_judge = should_judge(session, step["code"])
+            on_test_results(session, session["test_results"])
+            if run_judge:
+                evaluators.append(asyncio.create_task(judge(step)))
+        elif step["kind"] == "browser_events":
+            record_events(session, step["events"], now=max(e.get("timestamp") or 0 for e in step["events"]) or None)
+        elif step["kind"] == "browser_episode":
+            session["browser_warnings"].append({"count": 1, **step["episode"]})
+        elif step["kind"] == "proctor_warning":
+            session["proctor_agent"].warnings.append(step["message"])
+
+    await asyncio.gather(*evaluators)
+    report = await call_aggregator_agent(build_aggregator_payload(session))
+    return {
+        "recording_id": recording["id"],
+        "wall_s": round(time.perf_counter() - started, 3),
+        "spans": metrics.spans_for_trace(trace_id),
+        "scores": {field: (report.get("scores") or {}).get(field) for field in SCORE_FIELDS},
+        "performance_level": report.get("performance_level"),
+        "recorded_scores": {field: ((recording.get("recorded_report") or {}).get("scores") or {}).get(field)
+                            for field in SCORE_FIELDS} if recording.get("recorded_report") else None,
+        "recorded_performance_level": (recording.get("recorded_report") or {}).get("performance_level"),
+    }
+
+
+# ─── Reporting ────────────────────────────────────────────────────────────
+
+def summarize_agents(results: list) -> dict:
+    per_agent = defaultdict(lambda: {"latency": [], "tokens_in": 0, "tokens_out": 0, "errors": 0})
+    for result in results:
+        for span in result["spans"]:
+            if not span["name"].startswith("llm."):
+                continue
+            stats = per_agent[span["name"][4:]]
+            stats["latency"].append(span["duration_ms"])
+            stats["tokens_in"] += span.get("tokens_in") or 0
+            stats["tokens_out"] += span.get("tokens_out") or 0
+            stats["errors"] += span.get("outcome") != "ok"
+    return {
+        agent: {
+            "calls": len(s["latency"]),
+            "errors": s["errors"],
+            "p50_ms": round(percentile(s["latency"], 50), 1),
+            "p95_ms": round(percentile(s["latency"], 95), 1),
+            "tokens_in_per_call": round(s["tokens_in"] / len(s["latency"]), 1) if s["latency"] else 0,
+            "tokens_out_per_call": round(s["tokens_out"] / len(s["latency"]), 1) if s["latency"] else 0,
+        }
+        for agent, s in sorted(per_agent.items())
+    }
+
+
+def score_drift(pairs: list) -> dict:
+    """pairs: [(scores, performance_level, reference_scores, reference_level)] for the same recording."""
+    drift = {}
+    for field in SCORE_FIELDS:
+        diffs = [cur[field] - ref[field] for cur, _, ref, _ in pairs
+                 if isinstance(cur.get(field), (int, float)) and isinstance(ref.get(field), (int, float))]
+        if diffs:
+            drift[field] = {"mean_diff": round(statistics.mean(diffs), 2),
+                            "mean_abs_diff": round(statistics.mean(abs(d) for d in diffs), 2),
+                            "max_abs_diff": round(max(abs(d) for d in diffs), 2), "pairs": len(diffs)}
+    levels = [(level, ref_level) for _, level, _, ref_level in pairs if ref_level]
+    if levels:
+        drift["performance_level_agreement"] = round(sum(a == b for a, b in levels) / len(levels), 3)
+    return drift
+
+
+def build_report(results: list, baseline: dict = None) -> dict:
+    report = {"replays": len(results), "agents": summarize_agents(results),
+              "wall_s_p50": round(percentile([r["wall_s"] for r in results], 50), 3)}
+    if baseline:
+        reference = defaultdict(list)
+        for r in baseline["results"]:
+            reference[r["recording_id"]].append(r)
+        pairs = [(r["scores"], r["performance_level"], ref["scores"], ref["performance_level"])
+                 for r in results for ref in reference.get(r["recording_id"], [])[:1]]
+        report["score_drift_vs_baseline"] = score_drift(pairs)
+        report["baseline_agents"] = baseline["report"]["agents"]
+    else:
+        pairs = [(r["scores"], r["performance_level"], r["recorded_scores"], r["recorded_performance_level"])
+                 for r in results if r["recorded_scores"]]
+        report["score_drift_vs_recorded"] = score_drift(pairs)
+    by_recording = defaultdict(list)
+    for r in results:
+        by_recording[r["recording_id"]].append(r)
+    # With --repeat, run-to-run noise of the same recording (each repeat vs the first)
+    repeats = [(r["scores"], r["performance_level"], runs[0]["scores"], runs[0]["performance_level"])
+               for runs in by_recording.values() for r in runs[1:]]
+    if repeats:
+        report["score_drift_between_repeats"] = score_drift(repeats)
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n{report['replays']} replays, median wall time {report['wall_s_p50']}s\n")
+    baseline_agents = report.get("baseline_agents", {})
+    print(f"{'agent':<22}{'calls':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'tok in':>9}{'tok out':>9}"
+          + (f"{'Δp50':>9}{'Δp95':>9}{'Δtok':>8}" if baseline_agents else ""))
+    for agent, s in report["agents"].items():
+        line = (f"{agent:<22}{s['calls']:>7}{s['errors']:>6}{s['p50_ms']:>10}{s['p95_ms']:>10}"
+                f"{s['tokens_in_per_call']:>9}{s['tokens_out_per_call']:>9}")
+        base = baseline_agents.get(agent)
+        if base:
+            tokens = s["tokens_in_per_call"] + s["tokens_out_per_call"]
+            base_tokens = base["tokens_in_per_call"] + base["tokens_out_per_call"]
+            line += (f"{s['p50_ms'] - base['p50_ms']:>+9.1f}{s['p95_ms'] - base['p95_ms']:>+9.1f}"
+                     f"{tokens - base_tokens:>+8.1f}")
+        print(line)
+    for key, label in (("score_drift_vs_baseline", "vs baseline run"), ("score_drift_vs_recorded", "vs recorded reports"),
+                       ("score_drift_between_repeats", "between repeats")):
+        drift = report.get(key)
+        if not drift:
+            continue
+        print(f"\nscore drift {label}")
+        for field, d in drift.items():
+            if isinstance(d, dict):
+                print(f"  {field:<24} mean {d['mean_diff']:+.2f}  |mean| {d['mean_abs_diff']:.2f}  "
+                      f"max {d['max_abs_diff']:.2f}  (n={d['pairs']})")
+        if "performance_level_agreement" in drift:
+            print(f"  performance_level agreement {drift['performance_level_agreement']:.1%}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", nargs="*", help="NDJSON event-log exports")
+    parser.add_argument("--archive", nargs="*", help="session archives (.json.gz)")
+    parser.add_argument("--session-id", nargs="*", help="load recorded sessions from Mongo")
+    parser.add_argument("--sample", type=int, default=0, help="add N built-in sample sessions")
+    parser.add_argument("--repeat", type=int, default=1, help="replay each recording N times")
+    parser.add_argument("--parallel", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=0, help="time compression factor; 0 skips think time")
+    parser.add_argument("--out", help="write this run (results + report) to a JSON file")
+    parser.add_argument("--compare", help="a previous --out file to compare against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_PROVIDER", "mock")
+    os.environ.setdefault("PROCTOR_ENABLED", "0")
+    os.chdir(BACKEND_DIR)
+    import metrics
+    # Keep every span of the run for the report, not just the most recent few thousand
+    metrics.RECENT_SPANS = deque()
+
+    recordings = await load_recordings(args)
+    if not recordings:
+        parser.error("no recordings: pass --events, --archive, --session-id or --sample")
+
+    semaphore = asyncio.Semaphore(args.parallel)
+
+    async def bounded(recording):
+        async with semaphore:
+            return await replay_session(recording, args.speed)
+
+    results = await asyncio.gather(*(bounded(r) for r in recordings for _ in range(args.repeat)))
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    report = build_report(results, baseline)
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps({"results": results, "report": report}, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Cold-start benchmark — import time, server start-up and first-request latency.
+
+Each run spawns a fresh interpreter that imports `main`, starts uvicorn in-process and
+times the first start-session and chat requests, then waits for the background component
+warm-up (LLM clients, YOLO model) to finish. Runs use mock LLM/TTS providers by default.
+
+    python benchmarks/startup_time.py --runs 5
+    PROCTOR_ENABLED=1 python benchmarks/startup_time.py --runs 3 --json startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+async def measure_once(port: int) -> dict:
+    """Runs inside the child interpreter."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(BACKEND_DIR)
+
+    start = time.perf_counter()
+    from main import app
+    import_s = time.perf_counter() - start
+
+    import httpx
+    import uvicorn
+    from registry import components
+
+    start = time.perf_counter()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    startup_s = time.perf_counter() - start
+
+    timings = {"import_s": import_s, "startup_s": startup_s}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120.0) as client:
+        start = time.perf_counter()
+        response = await client.post("/api/start-session", json={
+            "candidate_name": "Cold Start", "role": "Software Engineer", "experience_years": 3,
+            "languages": ["python"], "problem_title": "Two Sum", "difficulty_level": "easy",
+        })
+        timings["first_start_session_s"] = time.perf_counter() - start
+        session_id = response.json()["session_id"]
+
+        start = time.perf_counter()
+        await client.post("/api/chat", json={"session_id": session_id, "message": "Hello", "code": ""})
+        timings["first_chat_s"] = time.perf_counter() - start
+
+        # Wait for the background warm-up so its duration is reported too
+        start = time.perf_counter()
+        while True:
+            snapshot = (await client.get("/api/components")).json()
+            wanted = [c for name, c in snapshot.items() if name != "proctor_detector" or os.getenv("PROCTOR_ENABLED") != "0"]
+            if all(c["built"] for c in wanted) or time.perf_counter() - start > 120:
+                break
+            await asyncio.sleep(0.05)
+        timings["components"] = {name: c["build_seconds"] for name, c in components.snapshot().items() if c["built"]}
+
+        await client.post("/api/end-session", json={"session_id": session_id})
+
+    server.should_exit = True
+    await server_task
+    return timings
+
+
+def run_child(port: int) -> dict:
+    env = dict(os.environ)
+    env.setdefault("LLM_PROVIDER", "mock")
+    env.setdefault("PROCTOR_ENABLED", "0")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--port", str(port)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    keys = ["import_s", "startup_s", "first_start_session_s", "first_chat_s"]
+    summary = {}
+    for key in keys:
+        values = [r[key] * 1000 for r in runs]
+        summary[key[:-2] + "_ms"] = {
+            "median": round(statistics.median(values), 1),
+            "min": round(min(values), 1),
+            "max": round(max(values), 1),
+        }
+    component_names = sorted({name for r in runs for name in r["components"]})
+    summary["component_build_ms"] = {
+        name: round(statistics.median(r["components"][name] * 1000 for r in runs if name in r["components"]), 1)
+        for name in component_names
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", help="also write the summary to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure_once(args.port))))
+        return
+
+    runs = [run_child(args.port) for _ in range(args.runs)]
+    summary = summarize(runs)
+
+    print(f"\nCold start over {args.runs} runs (ms)\n")
+    print(f"{'phase':<24}{'median':>9}{'min':>9}{'max':>9}")
+    for key, s in summary.items():
+        if key != "component_build_ms":
+            print(f"{key:<24}{s['median']:>9}{s['min']:>9}{s['max']:>9}")
+    print("\nbackground component builds (median ms)")
+    for name, ms in summary["component_build_ms"].items():
+        print(f"  {name:<22}{ms:>9}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"runs": runs, "summary": summary}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
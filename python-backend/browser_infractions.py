@@ -0,0 +1,92 @@
+"""
+Browser Infractions — coalesced, rate-limited ingestion of browser security events.
+
+Rapid focus changes or paste attempts arrive as bursts of near-identical events. Instead of
+one `browser_warnings` entry per event, repeats of the same type within
+COALESCE_WINDOW_SECONDS of each other are folded into one episode with a count, so the
+Brain prompt and the Aggregator see "tab switch ×12" once rather than twelve warnings.
+Each session has a token bucket for report requests and a cap on stored episodes.
+"""
+
+import time
+from typing import List
+
+import metrics
+
+COALESCE_WINDOW_SECONDS = 10.0
+MAX_EPISODES_PER_SESSION = 200
+MAX_EVENTS_PER_BATCH = 100
+# Report requests per session: bursts of RATE_LIMIT_BURST, refilled at RATE_LIMIT_PER_SECOND
+RATE_LIMIT_BURST = 10
+RATE_LIMIT_PER_SECOND = 1.0
+# Client clocks drift; timestamps further off than this are replaced by the server's
+MAX_CLIENT_CLOCK_SKEW_SECONDS = 300
+
+BROWSER_EVENTS = metrics.Counter("browser_infraction_events_total", "Browser infraction events by outcome.",
+                                 ("outcome",))
+
+
+def allow_report(session: dict, now: float = None) -> float:
+    """Takes a token from the session's bucket. Returns 0 if allowed, else seconds until the next token."""
+    now = now or time.time()
+    bucket = session.setdefault("infraction_bucket", {"tokens": float(RATE_LIMIT_BURST), "updated": now})
+    bucket["tokens"] = min(RATE_LIMIT_BURST, bucket["tokens"] + (now - bucket["updated"]) * RATE_LIMIT_PER_SECOND)
+    bucket["updated"] = now
+    if bucket["tokens"] < 1:
+        return (1 - bucket["tokens"]) / RATE_LIMIT_PER_SECOND
+    bucket["tokens"] -= 1
+    return 0.0
+
+
+def _event_time(timestamp, now: float) -> float:
+    if timestamp is None or abs(timestamp - now) > MAX_CLIENT_CLOCK_SKEW_SECONDS:
+        return now
+    return timestamp
+
+
+def record_events(session: dict, events: List[dict], now: float = None) -> List[dict]:
+    """
+    Folds events ({"type", "message", "is_terminal", "timestamp"?}) into the session's episodes.
+    Returns the events that were accepted, with their resolved timestamps.
+    """
+    now = now or time.time()
+    episodes = session["browser_warnings"]
+    accepted = sorted(
+        ({**event, "timestamp": _event_time(event.get("timestamp"), now)} for event in events[:MAX_EVENTS_PER_BATCH]),
+        key=lambda e: e["timestamp"],
+    )
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        BROWSER_EVENTS.inc(len(events) - MAX_EVENTS_PER_BATCH, outcome="truncated")
+
+    for event in accepted:
+        # An episode of the same type the event falls within a window of (batches can arrive out of order)
+        episode = next((e for e in reversed(episodes) if e["type"] == event["type"]
+                        and e["timestamp"] - COALESCE_WINDOW_SECONDS <= event["timestamp"]
+                        <= e["last_seen"] + COALESCE_WINDOW_SECONDS), None)
+        if episode is not None:
+            episode["count"] += 1
+            episode["timestamp"] = min(episode["timestamp"], event["timestamp"])
+            episode["last_seen"] = max(episode["last_seen"], event["timestamp"])
+            episode["is_terminal"] = episode["is_terminal"] or event["is_terminal"]
+            BROWSER_EVENTS.inc(outcome="coalesced")
+            continue
+        if len(episodes) >= MAX_EPISODES_PER_SESSION:
+            session["browser_warnings_dropped"] = session.get("browser_warnings_dropped", 0) + 1
+            BROWSER_EVENTS.inc(outcome="dropped")
+            continue
+        episodes.append({
+            "type": event["type"],
+            "message": event["message"],
+            "is_terminal": event["is_terminal"],
+            "timestamp": event["timestamp"],
+            "last_seen": event["timestamp"],
+            "count": 1,
+        })
+        BROWSER_EVENTS.inc(outcome="episode")
+    return accepted
+
+
+def describe_episode(episode: dict) -> str:
+    """One line per episode for prompts: the message, with the repeat count if it repeated."""
+    count = episode.get("count", 1)
+    return episode["message"] if count == 1 else f"{episode['message']} (x{count})"
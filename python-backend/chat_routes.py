@@ -14,21 +14,32 @@ import uuid
 import time
 import random
 import string
-from openai import AsyncOpenAI
 
 from agents.brain_agent import call_brain_agent
 from agents.code_judge_agent import call_code_judge_agent
 from agents.comm_eval_agent import call_comm_eval_agent
 from agents.reasoning_agent import call_reasoning_agent
-from agents.aggregator_agent import call_aggregator_agent
 from agents.proctor_agent import ProctorAgent
+from report_cache import ReportPrecomputer
+from sandbox import run_tests
+from problem_store import get_problem_tests
+from complexity_profiler import profile_submission
+from llm_scheduler import llm_priority, Priority
+from session_manager import SESSION_STORE, touch, mark_ended, memory_report
+from stuck_detector import record_code, analyze_stuck
+from hint_cache import get_hint, code_fingerprint, MAX_HINT_LEVEL
+from event_log import event_log
+from report_store import save_report
+from similarity_index import similarity_index, problem_key_for
+from browser_infractions import allow_report, record_events, describe_episode
+from interview_phases import (INITIAL_PHASE, should_evaluate, should_judge, record_candidate_turn,
+                              apply_brain_action, on_code_submitted, on_test_results)
+import metrics
+
+from registry import components
+from mock_providers import MOCK_PROVIDERS_ENABLED
 
 router = APIRouter()
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# ─── In-Memory Session Store (For Demo Purposes) ──────────────────────────
-# In production, this would be a MongoDB collection
-SESSION_STORE = {}
 
 # ─── Request/Response Models ──────────────────────────────────────────────
 
@@ -40,6 +51,7 @@ class StartSessionRequest(BaseModel):
     problem_title: str
     difficulty_level: str
     resume_text: str = ""
+    problem_id: Optional[str] = None
 
 class StartSessionResponse(BaseModel):
     session_id: str
@@ -60,6 +72,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
     audio_base64: Optional[str] = None
+    phase: Optional[str] = None
 
 class CodeSubmitRequest(BaseModel):
     session_id: str
@@ -75,6 +88,7 @@ class EndSessionRequest(BaseModel):
 
 class EndSessionResponse(BaseModel):
     report: Dict[str, Any]
+    report_freshness: Dict[str, Any] = {}
 
 class ReportCheatRequest(BaseModel):
     session_id: str
@@ -82,24 +96,42 @@ class ReportCheatRequest(BaseModel):
     message: str
     is_terminal: bool
 
+class CheatEvent(BaseModel):
+    warning_type: str
+    message: str
+    is_terminal: bool = False
+    timestamp: Optional[float] = None  # client epoch seconds; coalescing uses it when sane
+
+class ReportCheatBatchRequest(BaseModel):
+    session_id: str
+    events: List[CheatEvent]
+
 
 # ─── Utility: OpenAI TTS ─────────────────────────────────────────────────
 
 async def generate_speech(text: str) -> Optional[str]:
     """Generate speech audio (MP3) from text using OpenAI's TTS API."""
-    if not os.getenv("OPENAI_API_KEY"):
+    if not os.getenv("OPENAI_API_KEY") and not MOCK_PROVIDERS_ENABLED:
         return None
 
+    start = time.perf_counter()
     try:
+        # Shares the OpenAI client the LLM router uses
+        openai_client = await components.aget("openai_client")
         response = await openai_client.audio.speech.create(
             model="tts-1",
             voice="nova", # Female voice instead of 'echo'
             input=text
         )
         audio_data = response.read()
+        elapsed = time.perf_counter() - start
+        metrics.TTS_SECONDS.observe(elapsed, outcome="ok")
+        metrics.TTS_BYTES.observe(len(audio_data))
+        metrics.record_span("tts", elapsed, bytes=len(audio_data))
         return base64.b64encode(audio_data).decode("utf-8")
     except Exception as e:
-        print(f"[TTS ERROR] Failed to generate OpenAI speech: {e}")
+        metrics.TTS_SECONDS.observe(time.perf_counter() - start, outcome="error")
+        metrics.log("TTS ERROR", f"Failed to generate OpenAI speech: {e}")
         return None
 
 
@@ -117,6 +149,15 @@ async def text_to_speech(req: TTSRequest):
 
 # ─── Endpoints ────────────────────────────────────────────────────────────
 
+def _get_session(session_id: str) -> dict:
+    """Looks up a live session and records activity on it."""
+    session = SESSION_STORE.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    touch(session)
+    return session
+
+
 @router.post("/api/start-session", response_model=StartSessionResponse)
 async def start_session(req: StartSessionRequest, background_tasks: BackgroundTasks):
     """
@@ -124,9 +165,12 @@ async def start_session(req: StartSessionRequest, background_tasks: BackgroundTa
     """
     session_id = str(uuid.uuid4())
     join_code = ''.join(random.choices(string.digits, k=6))
+    trace_id = metrics.new_trace_id()
+    metrics.set_trace_id(trace_id)
     
     SESSION_STORE[session_id] = {
         "join_code": join_code,
+        "trace_id": trace_id,
         "candidate": {
             "name": req.candidate_name,
             "role": req.role,
@@ -136,25 +180,42 @@ async def start_session(req: StartSessionRequest, background_tasks: BackgroundTa
             "difficulty_level": req.difficulty_level
         },
         "resume_text": req.resume_text,
-        "phase": "warmup",
+        "phase": INITIAL_PHASE,
+        "phase_turns": 0,
+        "problem_id": req.problem_id,
         "transcripts": [],
         "latest_code": "",
+        "problem_tests": get_problem_tests(req.problem_id),
+        "test_results": {},
+        "complexity_profile": None,
         "evaluations": {
             "code_judge": None,
             "comm_eval": None,
             "reasoning_eval": None
         },
         "proctor_agent": ProctorAgent(session_id),
-        "browser_warnings": []
+        "browser_warnings": [],
+        "started_at": time.time()
     }
+    touch(SESSION_STORE[session_id])
+    SESSION_STORE[session_id]["report_precomputer"] = ReportPrecomputer(SESSION_STORE[session_id])
+    # New proctor warnings feed the draft report too
+    SESSION_STORE[session_id]["proctor_agent"].on_warning = SESSION_STORE[session_id]["report_precomputer"].invalidate
+    metrics.SESSIONS_STARTED.inc()
+    metrics.SESSIONS_ACTIVE.set(len(SESSION_STORE))
+    event_log.append(session_id, "session_started", {
+        "candidate": SESSION_STORE[session_id]["candidate"],
+        "resume_text": req.resume_text,
+        "problem_id": req.problem_id,
+    })
 
     # Start the webcam cheating monitor loop in the background
-    background_tasks.add_task(SESSION_STORE[session_id]["proctor_agent"].start_monitoring)
+    background_tasks.add_task(metrics.with_trace(trace_id, SESSION_STORE[session_id]["proctor_agent"].start_monitoring))
 
     payload = {
         "candidate": SESSION_STORE[session_id]["candidate"],
         "resume_text": req.resume_text,
-        "phase": "warmup",
+        "phase": INITIAL_PHASE,
         "transcript": "Hello, I am ready to begin.",
         "code_submission": "",
         "test_results": {},
@@ -165,6 +226,8 @@ async def start_session(req: StartSessionRequest, background_tasks: BackgroundTa
     # Call Brain Agent for initial greeting
     brain_resp = await call_brain_agent(payload)
     reply_text = brain_resp.get("utterance", f"Hello {req.candidate_name}, let's begin your interview.")
+    event_log.append(session_id, "interviewer_turn", {"text": reply_text, "action": brain_resp.get("action"),
+                                                      "phase": INITIAL_PHASE})
     
     # Generate Audio
     audio_b64 = await generate_speech(reply_text)
@@ -181,55 +244,70 @@ async def start_session(req: StartSessionRequest, background_tasks: BackgroundTa
 async def chat_with_interviewer(req: ChatRequest, background_tasks: BackgroundTasks):
     """
     Interactive chat with the AI Interviewer Brain.
-    Also triggers background reasoning and communication evaluators.
+    Also triggers the background evaluators the current interview phase calls for.
     """
-    if req.session_id not in SESSION_STORE:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    session = SESSION_STORE[req.session_id]
+    session = _get_session(req.session_id)
+    metrics.set_trace_id(session["trace_id"])
     session["latest_code"] = req.code
+    record_code(session, req.code)
     session["transcripts"].append(req.message)
+    event_log.append(req.session_id, "candidate_turn", {"text": req.message, "code": req.code})
+
+    # 1. Trigger the background evaluators of the phase the candidate is answering in
+    run_comm = should_evaluate(session, "comm_eval")
+    run_reasoning = should_evaluate(session, "reasoning_eval")
 
-    # 1. Trigger background Communication and Reasoning Evaluators
     async def evaluate_speech_async(transcript: str, session_id: str):
         # Comm Eval
-        comm_res = await call_comm_eval_agent({"transcript": transcript})
-        SESSION_STORE[session_id]["evaluations"]["comm_eval"] = comm_res
-        
+        if run_comm:
+            comm_res = await call_comm_eval_agent({"transcript": transcript})
+            session["evaluations"]["comm_eval"] = comm_res
+            session["report_precomputer"].invalidate()
+            event_log.append(session_id, "evaluation", {"agent": "comm_eval", "result": comm_res})
+
         # Reasoning Eval
-        reason_res = await call_reasoning_agent({
-            "approach_explanation": transcript,
-            "problem": session["candidate"]["interview_topic"],
-            "candidate_steps": transcript
-        })
-        SESSION_STORE[session_id]["evaluations"]["reasoning_eval"] = reason_res
+        if run_reasoning:
+            reason_res = await call_reasoning_agent({
+                "approach_explanation": transcript,
+                "problem": session["candidate"]["interview_topic"],
+                "candidate_steps": transcript
+            })
+            session["evaluations"]["reasoning_eval"] = reason_res
+            session["report_precomputer"].invalidate()
+            event_log.append(session_id, "evaluation", {"agent": "reasoning_eval", "result": reason_res})
 
     # Kick off evaluation of this transcript chunk in the background without blocking the chat response
-    background_tasks.add_task(evaluate_speech_async, req.message, req.session_id)
+    if run_comm or run_reasoning:
+        background_tasks.add_task(metrics.with_trace(session["trace_id"], evaluate_speech_async), req.message, req.session_id)
+    phase = record_candidate_turn(session, req.session_id)
 
     # Get any recent cheating warnings from the background proctor
     recent_warnings = session["proctor_agent"].get_warnings()
-    all_warnings = recent_warnings + [w["message"] for w in session["browser_warnings"]]
+    all_warnings = recent_warnings + [describe_episode(w) for w in session["browser_warnings"]]
 
     # 2. Call the Brain Agent for the next conversational turn
     payload = {
         "candidate": session["candidate"],
         "resume_text": session.get("resume_text", ""),
-        "phase": "coding", # Defaulting to coding phase for now
+        "phase": phase,
         "transcript": req.message,
         "code_submission": req.code,
-        "test_results": {},
+        "test_results": session["test_results"],
         "cheat_warnings": all_warnings,
         "context_summary": f"Recent history size: {len(req.history)}"
     }
 
     brain_resp = await call_brain_agent(payload)
     reply_text = brain_resp.get("utterance", "Let's keep going.")
-    
+    event_log.append(req.session_id, "interviewer_turn", {"text": reply_text, "action": brain_resp.get("action"),
+                                                          "phase": phase})
+    # The Brain's action decides which phase the candidate's next turn belongs to
+    next_phase = apply_brain_action(session, brain_resp.get("action"), req.session_id)
+
     # Generate Audio
     audio_b64 = await generate_speech(reply_text)
 
-    return ChatResponse(reply=reply_text, audio_base64=audio_b64)
+    return ChatResponse(reply=reply_text, audio_base64=audio_b64, phase=next_phase)
 
 
 @router.post("/api/submit-code", response_model=CodeSubmitResponse)
@@ -237,26 +315,68 @@ async def submit_code(req: CodeSubmitRequest, background_tasks: BackgroundTasks)
     """
     Triggered when candidate formally submits code for testing/evaluation.
     """
-    if req.session_id not in SESSION_STORE:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    session = SESSION_STORE[req.session_id]
+    session = _get_session(req.session_id)
+    metrics.set_trace_id(session["trace_id"])
     session["latest_code"] = req.code
+    record_code(session, req.code)
+    event_log.append(req.session_id, "code_submitted", {"code": req.code, "language": req.language})
+    on_code_submitted(session, req.session_id)
+    # Decided now: passing tests may move the phase on before the judge would run
+    run_judge = should_judge(session, req.code)
 
     async def run_judge_async(code: str, session_id: str):
-        # Fake test results for demo integration
-        test_results = {"passed": 3, "total": 5, "failed_cases": ["Edge case empty array"]}
-        
+        # Run the submission against real test cases in the local sandbox
+        # Only the server-side hidden suite counts; the candidate never supplies tests
+        problem_tests = session.get("problem_tests") or get_problem_tests(session["problem_id"]) or {}
+        function_name = problem_tests.get("function_name")
+        test_cases = problem_tests.get("cases") or []
+        if function_name and test_cases:
+            test_results = await run_tests(code, req.language, function_name, test_cases)
+        else:
+            test_results = {"passed": 0, "total": 0, "failed_cases": [], "runtime_ms": 0,
+                            "note": "No test cases available for this problem"}
+        session["test_results"] = test_results
+        on_test_results(session, test_results, session_id)
+
+        # Measure real complexity on growing inputs once the code actually works
+        complexity_profile = None
+        if test_results["passed"] > 0 and problem_tests.get("input_generator"):
+            complexity_profile = await profile_submission(
+                code, req.language, function_name, problem_tests["input_generator"]
+            )
+            complexity_profile["reference_complexity"] = problem_tests.get("reference_complexity")
+            session["complexity_profile"] = complexity_profile
+            session["report_precomputer"].invalidate()
+        event_log.append(session_id, "test_results", {
+            "test_results": test_results, "complexity_profile": complexity_profile
+        })
+
+        # Nearest prior submissions to the same problem from other candidates
+        similarity = await similarity_index.check_and_add(
+            problem_key_for(session), session_id, code, session["candidate"]["name"], req.language
+        )
+        previous = session.get("code_similarity")
+        # Keep the most suspicious submission of the session, not just the latest
+        if previous is None or similarity["max_similarity"] >= previous["max_similarity"]:
+            session["code_similarity"] = similarity
+            session["report_precomputer"].invalidate()
+        event_log.append(session_id, "code_similarity", similarity)
+
+        if not run_judge:
+            return
         judge_res = await call_code_judge_agent({
             "code": code,
             "language": req.language,
             "problem": session["candidate"]["interview_topic"],
             "constraints": "O(N) time complexity",
-            "test_results": test_results
+            "test_results": test_results,
+            "complexity_profile": complexity_profile or {}
         })
-        SESSION_STORE[session_id]["evaluations"]["code_judge"] = judge_res
+        session["evaluations"]["code_judge"] = judge_res
+        session["report_precomputer"].invalidate()
+        event_log.append(session_id, "evaluation", {"agent": "code_judge", "result": judge_res})
 
-    background_tasks.add_task(run_judge_async, req.code, req.session_id)
+    background_tasks.add_task(metrics.with_trace(session["trace_id"], run_judge_async), req.code, req.session_id)
 
     return CodeSubmitResponse(
         status="evaluating",
@@ -265,49 +385,59 @@ async def submit_code(req: CodeSubmitRequest, background_tasks: BackgroundTasks)
 
 
 @router.post("/api/end-session", response_model=EndSessionResponse)
-async def end_session(req: EndSessionRequest):
+async def end_session(req: EndSessionRequest, background_tasks: BackgroundTasks):
     """
-    Ends the interview and compiles the final structured evaluation report via the Aggregator Agent.
+    Ends the interview and returns the final structured evaluation report.
+    The Aggregator Agent only runs here if the background draft is stale.
     """
-    if req.session_id not in SESSION_STORE:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    session = SESSION_STORE[req.session_id]
-
-    # Stop background monitoring thread
-    proctor = session.get("proctor_agent")
-    if proctor:
-        proctor.stop_monitoring()
-
-    payload = {
-        "code_judge": session["evaluations"]["code_judge"] or {},
-        "communication_eval": session["evaluations"]["comm_eval"] or {},
-        "reasoning_eval": session["evaluations"]["reasoning_eval"] or {},
-        "proctor_warnings": proctor.get_warnings() if proctor else [],
-        "browser_warnings": session["browser_warnings"],
-        "session_summary": f"Interview complete for {session['candidate']['name']} on {session['candidate']['interview_topic']}."
-    }
-
-    final_report = await call_aggregator_agent(payload)
-
-    return EndSessionResponse(report=final_report)
+    session = _get_session(req.session_id)
+    metrics.set_trace_id(session["trace_id"])
+
+    # Usually served from the draft pre-aggregated in the background as evaluator results landed
+    # The candidate is waiting on this one, so any remaining Aggregator work jumps the queue
+    with llm_priority(Priority.INTERACTIVE):
+        final_report, freshness = await session["report_precomputer"].finalize()
+    metrics.SESSIONS_ENDED.inc()
+    event_log.append(req.session_id, "session_ended", {"report": final_report, "report_freshness": freshness})
+
+    # Stops the proctor loop and archives the session; the sweeper evicts it after a grace period
+    await mark_ended(req.session_id, session, final_report)
+    # Persisted after the response so Mongo latency isn't on the candidate's critical path
+    background_tasks.add_task(metrics.with_trace(session["trace_id"], save_report), req.session_id, session, final_report)
+
+    return EndSessionResponse(report=final_report, report_freshness=freshness)
+
+def _ingest_cheat_events(session_id: str, events: List[CheatEvent]) -> dict:
+    session = _get_session(session_id)
+    # A terminal infraction ends the session and must never be lost to rate limiting
+    retry_after = 0 if any(e.is_terminal for e in events) else allow_report(session)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many infraction reports for this session",
+                            headers={"Retry-After": str(max(1, round(retry_after)))})
+    accepted = record_events(session, [
+        {"type": e.warning_type, "message": e.message, "is_terminal": e.is_terminal, "timestamp": e.timestamp}
+        for e in events
+    ])
+    if accepted:
+        session["report_precomputer"].invalidate()
+        event_log.append(session_id, "browser_warnings", {"events": accepted})
+    return {"status": "recorded", "accepted": len(accepted), "episodes": len(session["browser_warnings"])}
 
 @router.post("/api/report-cheat")
 async def report_cheat(req: ReportCheatRequest):
     """
     Receives browser-level security infractions (Tab Switch, Fullscreen Exit, Paste).
     """
-    if req.session_id not in SESSION_STORE:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    SESSION_STORE[req.session_id]["browser_warnings"].append({
-        "type": req.warning_type,
-        "message": req.message,
-        "is_terminal": req.is_terminal,
-        "timestamp": time.time()
-    })
+    event = CheatEvent(warning_type=req.warning_type, message=req.message, is_terminal=req.is_terminal)
+    return _ingest_cheat_events(req.session_id, [event])
 
-    return {"status": "recorded"}
+@router.post("/api/report-cheat/batch")
+async def report_cheat_batch(req: ReportCheatBatchRequest):
+    """
+    Receives a batch of browser infractions collected client-side. Repeats of the same
+    type in quick succession are coalesced into one counted episode.
+    """
+    return _ingest_cheat_events(req.session_id, req.events)
 
 # ─── Real-Time Code Sync ──────────────────────────────────────────────────
 
@@ -318,9 +448,11 @@ class SyncCodeRequest(BaseModel):
 @router.post("/api/sync-code")
 async def sync_code(req: SyncCodeRequest):
     """Called periodically by the candidate's editor to sync live code to the session."""
-    if req.session_id not in SESSION_STORE:
-        raise HTTPException(status_code=404, detail="Session not found")
-    SESSION_STORE[req.session_id]["latest_code"] = req.code
+    session = _get_session(req.session_id)
+    session["latest_code"] = req.code
+    # Only changed code is logged; the editor syncs every few seconds regardless
+    if record_code(session, req.code):
+        event_log.append(req.session_id, "code_snapshot", {"code": req.code})
     return {"status": "synced"}
 
 
@@ -346,6 +478,88 @@ async def get_session_state(join_code: str):
     raise HTTPException(status_code=404, detail="Invalid Join Code or Session Ended")
 
 
+@router.get("/api/sessions/memory")
+async def get_sessions_memory():
+    """Approximate memory retained by each in-memory session, largest first."""
+    return memory_report()
+
+
+# ─── Stuck Detection ──────────────────────────────────────────────────────
+
+class AnalyzeStuckRequest(BaseModel):
+    code: str
+    problem_title: str
+    problem_description: str = ""
+    language: str = "python"
+    time_since_last_edit_seconds: int = 0
+    session_id: Optional[str] = None
+
+class AnalyzeStuckResponse(BaseModel):
+    is_stuck: bool
+    suggestion: str = ""
+    source: str = "local"
+
+@router.post("/api/analyze-stuck", response_model=AnalyzeStuckResponse)
+async def analyze_stuck_endpoint(req: AnalyzeStuckRequest):
+    """
+    Polled by the candidate's editor. Decided locally from the edit timeline in most cases;
+    the LLM is only consulted when the heuristic is ambiguous.
+    """
+    session = SESSION_STORE.get(req.session_id) if req.session_id else None
+    if session is not None:
+        metrics.set_trace_id(session["trace_id"])
+    verdict = await analyze_stuck(
+        req.code, req.problem_title, req.problem_description, req.language,
+        req.time_since_last_edit_seconds, session=session
+    )
+    return AnalyzeStuckResponse(**verdict)
+
+
+# ─── Hints ────────────────────────────────────────────────────────────────
+
+class HintRequest(BaseModel):
+    code: str
+    problem_title: str
+    problem_description: str = ""
+    language: str = "python"
+    session_id: Optional[str] = None
+    level: Optional[int] = None
+
+class HintResponse(BaseModel):
+    hint: str
+    level: int
+    source: str
+
+@router.post("/api/hint", response_model=HintResponse)
+async def request_hint(req: HintRequest):
+    """
+    Progressive hint for the candidate's current code. Repeated requests on unchanged code
+    move up a level; identical (problem, code, level) requests are served from the shared cache.
+    """
+    session = SESSION_STORE.get(req.session_id) if req.session_id else None
+    # Clamped like get_hint does, so the response names the level actually served
+    level = max(1, min(req.level or 1, MAX_HINT_LEVEL))
+    problem_id = None
+    if session is not None:
+        touch(session)
+        metrics.set_trace_id(session["trace_id"])
+        problem_id = session.get("problem_id")
+        if req.level is None:
+            fingerprint = code_fingerprint(req.code, req.language)
+            progress = session.get("hint_progress") or {}
+            level = min(progress.get("level", 0) + 1, MAX_HINT_LEVEL) if progress.get("fingerprint") == fingerprint else 1
+            session["hint_progress"] = {"fingerprint": fingerprint, "level": level}
+        session["hints_used"] = session.get("hints_used", 0) + 1
+
+    hint, source = await get_hint(
+        req.problem_title, req.problem_description, req.language, req.code,
+        level=level, problem_id=problem_id
+    )
+    if not hint:
+        raise HTTPException(status_code=500, detail="Hint generation failed")
+    return HintResponse(hint=hint, level=level, source=source)
+
+
 # ─── MJPEG Video Feed Streaming ────────────────────────────────────────────
 import asyncio
 
@@ -0,0 +1,120 @@
+"""
+Complexity Profiler — empirical time/space complexity estimation for submissions.
+
+Runs the candidate's function in the sandbox on inputs of geometrically increasing
+size (built by the problem's `make_input(n)` generator), fits the runtime curve
+against the usual complexity classes and reports peak memory. The Judge and
+Aggregator receive the result as hard data instead of guessing from the code.
+"""
+
+import math
+from typing import List, Dict, Any, Optional
+
+from sandbox import run_job
+
+PROFILE_SIZES = [2 ** k for k in range(4, 18)]   # 16 … 131072
+PROFILE_REPEATS = 3
+SIZE_TIMEOUT_SECONDS = 1.0
+# Sub-10µs timings are dominated by timer noise and call overhead
+MIN_FIT_RUNTIME_MS = 0.01
+
+# Ordered from simplest to most complex; ties go to the simpler class
+COMPLEXITY_MODELS = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+
+
+def _fit_model(samples: List[dict], f) -> Optional[float]:
+    """
+    Least-squares fit of runtime ≈ a + b·f(n) with b ≥ 0.
+    Returns the mean squared log-error of the fit, or None if it is degenerate.
+    """
+    xs = [f(s["n"]) for s in samples]
+    ys = [s["runtime_ms"] for s in samples]
+    count = len(xs)
+    mean_x = sum(xs) / count
+    mean_y = sum(ys) / count
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        a, b = mean_y, 0.0
+    else:
+        b = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x)
+        a = max(0.0, mean_y - b * mean_x)
+    error = 0.0
+    for x, y in zip(xs, ys):
+        predicted = a + b * x
+        if predicted <= 0:
+            return None
+        error += (math.log(y) - math.log(predicted)) ** 2
+    return error / count
+
+
+def estimate_complexity(samples: List[dict]) -> Dict[str, Any]:
+    """Picks the complexity class whose curve best explains the measured runtimes."""
+    usable = [s for s in samples if s["runtime_ms"] >= MIN_FIT_RUNTIME_MS]
+    if len(usable) < 3:
+        # Too fast to measure at every size we tried: effectively constant/logarithmic
+        return {"estimated_complexity": "O(1)", "fit_error": None, "loglog_slope": None}
+
+    errors = {}
+    for name, f in COMPLEXITY_MODELS:
+        error = _fit_model(usable, f)
+        if error is not None:
+            errors[name] = error
+
+    best_error = min(errors.values())
+    # Accept the simplest model within 10% of the best fit to avoid over-fitting noise
+    estimate = next(name for name, _ in COMPLEXITY_MODELS
+                    if name in errors and errors[name] <= best_error * 1.1 + 1e-12)
+
+    first, last = usable[0], usable[-1]
+    slope = math.log(last["runtime_ms"] / first["runtime_ms"]) / math.log(last["n"] / first["n"])
+    return {
+        "estimated_complexity": estimate,
+        "fit_error": round(errors[estimate], 4),
+        "loglog_slope": round(slope, 2),
+    }
+
+
+async def profile_submission(code: str, language: str, function_name: str, generator: str,
+                             sizes: List[int] = PROFILE_SIZES) -> Dict[str, Any]:
+    """
+    Profiles `function_name` on make_input(n) for each n in `sizes`, stopping at the
+    first size that exceeds SIZE_TIMEOUT_SECONDS.
+
+    Returns {"estimated_complexity", "fit_error", "loglog_slope", "max_n_profiled",
+             "peak_memory_kb", "samples": [{"n", "runtime_ms", "peak_memory_kb"}]}
+    or {"error": ...} when the submission cannot be profiled.
+    """
+    job = {
+        "mode": "profile",
+        "code": code,
+        "function_name": function_name,
+        "generator": generator,
+        "sizes": sizes,
+        "repeats": PROFILE_REPEATS,
+        "case_timeout_s": SIZE_TIMEOUT_SECONDS,
+    }
+    wall_timeout = SIZE_TIMEOUT_SECONDS * (len(sizes) + 2) + 2.0
+    raw = await run_job(language, job, wall_timeout)
+
+    samples = raw.get("samples") or []
+    if not samples:
+        return {"error": raw.get("error") or "No sizes could be profiled"}
+
+    profile = estimate_complexity(samples)
+    profile.update({
+        "max_n_profiled": samples[-1]["n"],
+        "peak_memory_kb": max(s["peak_memory_kb"] for s in samples),
+        "samples": samples,
+    })
+    if raw.get("stopped_at"):
+        profile["timed_out_at_n"] = raw["stopped_at"]
+    if raw.get("error"):
+        profile["error"] = raw["error"]
+    return profile
@@ -0,0 +1,70 @@
+"""
+Database — the shared MongoDB client and the indexes the API relies on.
+"""
+
+import os
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import metrics
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+client_mongo = AsyncIOMotorClient(MONGODB_URI, serverSelectionTimeoutMS=5000, tlsAllowInvalidCertificates=True)
+db = client_mongo.interview_app_db
+
+
+# (collection, keys, options). Each is created on its own so one failure doesn't skip the rest
+INDEXES = [
+    # Unique so registration can't race two accounts onto one email
+    ("users", "email", {"unique": True, "name": "users_email_unique"}),
+    ("interview_events", [("session_id", 1), ("seq", 1)], {"name": "events_session_seq"}),
+    # Report exports page on (created_at, _id), optionally narrowed by one equality filter
+    ("interview_reports", [("created_at", 1), ("_id", 1)], {"name": "reports_created"}),
+    *(("interview_reports", [(field, 1), ("created_at", 1), ("_id", 1)], {"name": f"reports_{field}_created"})
+      for field in ("role", "difficulty", "performance_level")),
+    ("batch_results", "job_id", {"name": "batch_results_job"}),
+    ("batch_items", "job_id", {"name": "batch_items_job"}),
+    ("batch_suites", "job_id", {"name": "batch_suites_job"}),
+    # One summary document per (dimension, key); dashboards read a whole dimension at once
+    ("analytics_summaries", [("dimension", 1), ("key", 1)], {"unique": True, "name": "summaries_dimension_key"}),
+    ("code_signatures", [("problem_key", 1), ("submitted_at", 1)], {"name": "signatures_problem"}),
+]
+EMAIL_INDEX = "users_email_unique"
+
+# Names of the indexes confirmed to exist in this process
+READY_INDEXES = set()
+# A failed email index build scans all of users, so retries back off instead of running per request
+EMAIL_INDEX_RETRY_MIN_SECONDS = 30
+EMAIL_INDEX_RETRY_MAX_SECONDS = 900
+_email_index_retry = {"at": 0.0, "delay": 0.0}
+
+
+async def _create_index(collection: str, keys, options: dict) -> bool:
+    try:
+        await db[collection].create_index(keys, **options)
+    except Exception as e:
+        metrics.log("DATABASE WARNING", f"Could not ensure index {options['name']}: {e}")
+        return False
+    READY_INDEXES.add(options["name"])
+    return True
+
+
+async def ensure_indexes():
+    """Creates indexes at startup; a no-op when they already exist."""
+    for collection, keys, options in INDEXES:
+        await _create_index(collection, keys, options)
+
+
+async def ensure_email_index() -> bool:
+    """Whether users.email is known to be unique, trying to build the index if not yet confirmed."""
+    if EMAIL_INDEX in READY_INDEXES:
+        return True
+    if time.monotonic() < _email_index_retry["at"]:
+        return False
+    collection, keys, options = INDEXES[0]
+    if await _create_index(collection, keys, options):
+        return True
+    delay = min(EMAIL_INDEX_RETRY_MAX_SECONDS, max(EMAIL_INDEX_RETRY_MIN_SECONDS, _email_index_retry["delay"] * 2))
+    _email_index_retry.update(at=time.monotonic() + delay, delay=delay)
+    return False
@@ -0,0 +1,157 @@
+"""
+Event Log — append-only, write-behind record of everything that happens in an interview.
+
+Hot paths (code sync, chat turns, cheat reports, evaluator callbacks) call `append()`, which
+only touches an in-memory buffer. A background flusher writes batches to the
+`interview_events` collection with insert_many when EVENT_LOG_BATCH_SIZE events are pending
+or every EVENT_LOG_FLUSH_SECONDS, whichever comes first.
+
+Loss bound: on a crash at most the last EVENT_LOG_FLUSH_SECONDS of events (or one batch) are
+lost while Mongo is healthy. While it is unreachable the buffer grows up to
+EVENT_LOG_MAX_BUFFER events, then the oldest are dropped and counted. Every event gets its
+unique _id when it is appended, so retried batches never create duplicates. `seq` comes from
+one process-wide counter: it orders a session's events even if some are appended after the
+session was evicted (late evaluator or evidence callbacks), without per-session state.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from database import db
+import metrics
+
+EVENT_LOG_BATCH_SIZE = int(os.getenv("EVENT_LOG_BATCH_SIZE", "200"))
+EVENT_LOG_FLUSH_SECONDS = float(os.getenv("EVENT_LOG_FLUSH_SECONDS", "1.0"))
+EVENT_LOG_MAX_BUFFER = int(os.getenv("EVENT_LOG_MAX_BUFFER", "20000"))
+MAX_RETRY_DELAY_SECONDS = 30.0
+DUPLICATE_KEY_ERROR = 11000
+
+EVENTS_APPENDED = metrics.Counter("event_log_appended_total", "Interview events appended.", ("kind",))
+EVENTS_FLUSHED = metrics.Counter("event_log_flushed_total", "Interview events written to Mongo.")
+EVENTS_DROPPED = metrics.Counter("event_log_dropped_total", "Interview events dropped because the buffer was full.")
+EVENTS_DUPLICATES = metrics.Counter("event_log_duplicates_total",
+                                    "Events rejected as duplicates on their first write attempt.")
+EVENTS_PENDING = metrics.Gauge("event_log_pending", "Interview events buffered but not yet written.")
+FLUSH_SECONDS = metrics.Histogram("event_log_flush_seconds", "insert_many latency per flushed batch.")
+
+
+class EventLog:
+    def __init__(self, collection=None):
+        self._collection = collection
+        self._buffer: List[dict] = []
+        self._seq = itertools.count()
+        # _ids of events whose batch failed once; only for these is a duplicate key expected
+        self._retrying = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._retry_delay = 0.0
+
+    @property
+    def collection(self):
+        return self._collection if self._collection is not None else db.interview_events
+
+    def append(self, session_id: str, kind: str, payload: dict):
+        """Buffers one event. Never blocks and never raises."""
+        seq = next(self._seq)
+        self._buffer.append({
+            "_id": ObjectId(),
+            "session_id": session_id,
+            "seq": seq,
+            "kind": kind,
+            "ts": time.time(),
+            "trace_id": metrics.get_trace_id(),
+            "payload": payload,
+        })
+        EVENTS_APPENDED.inc(kind=kind)
+        if len(self._buffer) > EVENT_LOG_MAX_BUFFER:
+            overflow = len(self._buffer) - EVENT_LOG_MAX_BUFFER
+            self._retrying.difference_update(event["_id"] for event in self._buffer[:overflow])
+            del self._buffer[:overflow]
+            EVENTS_DROPPED.inc(overflow)
+        EVENTS_PENDING.set(len(self._buffer))
+        if len(self._buffer) >= EVENT_LOG_BATCH_SIZE and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _write(self, batch: List[dict]):
+        start = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+                raise
+            # Events already written by an earlier, partly failed attempt are fine; anything else is a bug
+            unexpected = [err for err in errors if batch[err["index"]]["_id"] not in self._retrying]
+            if unexpected:
+                EVENTS_DUPLICATES.inc(len(unexpected))
+                metrics.log("EVENT LOG ERROR", f"{len(unexpected)} events rejected as duplicates on first write")
+        self._retrying.difference_update(event["_id"] for event in batch)
+        FLUSH_SECONDS.observe(time.perf_counter() - start)
+
+    async def flush(self) -> int:
+        """Writes everything currently buffered, one batch at a time. Returns the number written."""
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:EVENT_LOG_BATCH_SIZE]
+            del self._buffer[:len(batch)]
+            try:
+                await self._write(batch)
+            except Exception:
+                # Put the batch back in front of anything appended meanwhile
+                self._buffer[:0] = batch
+                self._retrying.update(event["_id"] for event in batch)
+                raise
+            written += len(batch)
+            EVENTS_FLUSHED.inc(len(batch))
+            EVENTS_PENDING.set(len(self._buffer))
+        return written
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(EVENT_LOG_FLUSH_SECONDS, self._retry_delay))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                self._retry_delay = 0.0
+            except Exception as e:
+                self._retry_delay = min(max(self._retry_delay * 2, EVENT_LOG_FLUSH_SECONDS), MAX_RETRY_DELAY_SECONDS)
+                metrics.log("EVENT LOG ERROR", f"Flush failed ({len(self._buffer)} pending), "
+                                               f"retrying in {self._retry_delay:.1f}s: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stops the flusher and makes a final attempt to write what's left."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            metrics.log("EVENT LOG ERROR", f"Final flush failed, {len(self._buffer)} events lost: {e}")
+
+    async def load_session(self, session_id: str) -> List[dict]:
+        """All persisted events for a session in order, plus any still buffered."""
+        cursor = self.collection.find({"session_id": session_id}).sort("seq", 1)
+        events = [event async for event in cursor]
+        seen = {event["_id"] for event in events}
+        events.extend(e for e in self._buffer if e["session_id"] == session_id and e["_id"] not in seen)
+        return events
+
+
+event_log = EventLog()
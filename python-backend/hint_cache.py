@@ -0,0 +1,125 @@
+"""
+Hint Cache — shared progressive hints behind /api/hint.
+
+Hints are keyed by (problem, normalized code fingerprint, hint level), so candidates stuck at
+the same point on the same problem get an instant answer. Concurrent identical requests share
+one LLM call, and after a hint is served the remaining levels for that code are generated in
+the background so the next Ctrl+H is a cache hit too.
+"""
+
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ai_interviewer import format_hint_prompt, HINT_LEVEL_GUIDANCE
+from llm_manager import generate_content_with_fallback
+from llm_scheduler import Priority
+import metrics
+
+MAX_HINT_LEVEL = len(HINT_LEVEL_GUIDANCE)
+HINT_CACHE_MAX_ENTRIES = 5000
+
+HintKey = Tuple[str, str, int]
+
+HINT_CACHE: "OrderedDict[HintKey, str]" = OrderedDict()
+_in_flight: Dict[HintKey, asyncio.Task] = {}
+_background_tasks = set()
+
+HINT_REQUESTS = metrics.Counter("hint_requests_total", "Hint requests by how they were served.", ("source",))
+
+# String literals are matched first and kept, so comment markers inside strings survive
+_STRINGS = r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"
+_HASH_COMMENTS = re.compile(rf"({_STRINGS})|#[^\n]*")
+_C_COMMENTS = re.compile(rf"({_STRINGS}|`(?:\\.|[^`\\])*`)|//[^\n]*|/\*.*?\*/", re.DOTALL)
+# `//` is floor division in Python, so comment syntax has to follow the submission's language
+COMMENT_PATTERNS = {
+    **dict.fromkeys(("python", "python3", "py", "ruby", "rb"), _HASH_COMMENTS),
+    **dict.fromkeys(("javascript", "js", "node", "typescript", "ts", "java", "c", "cpp", "c++", "csharp", "c#",
+                     "go", "golang", "kotlin", "swift", "rust", "scala"), _C_COMMENTS),
+}
+
+
+def strip_comments(code: str, language: str) -> str:
+    """Removes comments for known languages; code in other languages is left as is."""
+    pattern = COMMENT_PATTERNS.get((language or "").lower())
+    if pattern is None:
+        return code or ""
+    return pattern.sub(lambda m: m.group(1) or "", code or "")
+
+
+def code_fingerprint(code: str, language: str) -> str:
+    """Hash of the code with comments and whitespace stripped."""
+    normalized = strip_comments(code, language)
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def problem_key(problem_id: Optional[str], problem_title: str) -> str:
+    return problem_id or "title:" + problem_title.strip().lower()
+
+
+def _store(key: HintKey, hint: str):
+    HINT_CACHE[key] = hint
+    HINT_CACHE.move_to_end(key)
+    while len(HINT_CACHE) > HINT_CACHE_MAX_ENTRIES:
+        HINT_CACHE.popitem(last=False)
+
+
+async def _generate(key: HintKey, problem_title: str, problem_description: str, language: str,
+                    code: str, priority: Priority) -> str:
+    prompt = format_hint_prompt(problem_title, problem_description, language, code, level=key[2])
+    hint = (await generate_content_with_fallback(prompt, agent="hint", priority=priority)).strip()
+    if hint:
+        _store(key, hint)
+    return hint
+
+
+def _generate_shared(key: HintKey, problem_title: str, problem_description: str, language: str,
+                     code: str, priority: Priority) -> asyncio.Task:
+    """Returns the in-flight generation for this key, starting one if needed."""
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate(key, problem_title, problem_description, language, code, priority))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _t: _in_flight.pop(key, None))
+    return task
+
+
+def _precompute_next_levels(key: HintKey, problem_title: str, problem_description: str,
+                            language: str, code: str):
+    for level in range(key[2] + 1, MAX_HINT_LEVEL + 1):
+        next_key = (key[0], key[1], level)
+        if next_key in HINT_CACHE or next_key in _in_flight:
+            continue
+        task = _generate_shared(next_key, problem_title, problem_description, language, code, Priority.BACKGROUND)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        # Precompute failures only cost a cache miss later
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def get_hint(problem_title: str, problem_description: str, language: str, code: str,
+                   level: int = 1, problem_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Returns (hint, source) where source is "cached", "shared" or "generated".
+    Raises HTTPException(500) / LLMShedError like the other LLM calls when generation fails.
+    """
+    level = max(1, min(level, MAX_HINT_LEVEL))
+    key = (problem_key(problem_id, problem_title), code_fingerprint(code, language), level)
+
+    hint = HINT_CACHE.get(key)
+    if hint is not None:
+        HINT_CACHE.move_to_end(key)
+        source = "cached"
+    else:
+        source = "shared" if key in _in_flight else "generated"
+        # Shielded so a disconnecting client doesn't cancel a call other candidates are waiting on
+        hint = await asyncio.shield(
+            _generate_shared(key, problem_title, problem_description, language, code, Priority.INTERACTIVE)
+        )
+
+    _precompute_next_levels(key, problem_title, problem_description, language, code)
+    HINT_REQUESTS.inc(source=source)
+    return hint, source
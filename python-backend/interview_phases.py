@@ -0,0 +1,118 @@
+"""
+Interview Phases — the server-side phase state machine.
+
+A session moves forward through the phases the Brain prompt describes:
+
+    warmup → problem_statement → clarification → coding → explanation → followup → hr → end
+
+and never back. Transitions come from the Brain's `action` on each reply (request_code,
+analyze, end_session), from code submissions, and from per-phase turn budgets so a phase
+the Brain lingers in still ends. Coding has no budget: it only ends once a submission has
+test results. Each phase declares which evaluators run during it; a reasoning eval of
+warmup small talk is skipped instead of spending an LLM call. The judge is the exception:
+code it hasn't seen yet is always judged, so a late final submission still counts. The
+prompt's "evaluation" phase is the Aggregator's job at end-session and is not a
+conversational phase here.
+"""
+
+import hashlib
+from typing import NamedTuple, Optional, Tuple
+
+import metrics
+from event_log import event_log
+
+
+class Phase(NamedTuple):
+    evaluators: Tuple[str, ...]
+    # Candidate turns before moving on even if the Brain hasn't; None waits for the Brain
+    max_turns: Optional[int]
+
+
+PHASES = {
+    "warmup": Phase(("comm_eval",), 3),
+    "problem_statement": Phase(("comm_eval",), 1),
+    "clarification": Phase(("comm_eval", "reasoning_eval"), 3),
+    "coding": Phase(("comm_eval", "reasoning_eval", "code_judge"), None),
+    "explanation": Phase(("comm_eval", "reasoning_eval", "code_judge"), 3),
+    "followup": Phase(("comm_eval", "reasoning_eval", "code_judge"), 3),
+    "hr": Phase(("comm_eval",), 2),
+    "end": Phase((), None),
+}
+PHASE_ORDER = list(PHASES)
+INITIAL_PHASE = PHASE_ORDER[0]
+
+PHASE_TRANSITIONS = metrics.Counter("interview_phase_transitions_total", "Interview phase transitions.",
+                                    ("phase", "reason"))
+EVALUATOR_SKIPS = metrics.Counter("evaluator_calls_skipped_total", "Evaluator calls skipped by the phase gate.",
+                                  ("agent", "phase"))
+
+
+def should_evaluate(session: dict, agent: str) -> bool:
+    """Whether `agent` runs in the session's current phase; skips are counted."""
+    phase = session["phase"]
+    if agent in PHASES[phase].evaluators:
+        return True
+    EVALUATOR_SKIPS.inc(agent=agent, phase=phase)
+    return False
+
+
+def should_judge(session: dict, code: str) -> bool:
+    """The judge runs on any code it hasn't judged yet, and on re-submissions where the phase allows."""
+    digest = hashlib.sha1((code or "").encode("utf-8")).hexdigest()
+    if session.get("judged_code") != digest:
+        session["judged_code"] = digest
+        return True
+    return should_evaluate(session, "code_judge")
+
+
+def advance(session: dict, phase: str, reason: str, session_id: str = None) -> bool:
+    """Moves the session forward to `phase`. Never moves backwards; returns whether it moved."""
+    current = session["phase"]
+    if PHASE_ORDER.index(phase) <= PHASE_ORDER.index(current):
+        return False
+    session["phase"] = phase
+    session["phase_turns"] = 0
+    PHASE_TRANSITIONS.inc(phase=phase, reason=reason)
+    if session_id:
+        event_log.append(session_id, "phase_changed", {"from": current, "to": phase, "reason": reason})
+    return True
+
+
+def record_candidate_turn(session: dict, session_id: str = None) -> str:
+    """
+    Counts a candidate turn in the current phase and, once the phase's turn budget is spent,
+    moves on so the Brain's reply belongs to the next phase. Returns the phase to reply in.
+    """
+    session["phase_turns"] = session.get("phase_turns", 0) + 1
+    phase = session["phase"]
+    max_turns = PHASES[phase].max_turns
+    if max_turns is not None and session["phase_turns"] >= max_turns:
+        advance(session, PHASE_ORDER[PHASE_ORDER.index(phase) + 1], "turn_budget", session_id)
+    return session["phase"]
+
+
+def apply_brain_action(session: dict, action: Optional[str], session_id: str = None) -> str:
+    """Applies the Brain's reply action to the phase the next candidate turn is in."""
+    phase = session["phase"]
+    if action == "end_session":
+        advance(session, "end", "brain", session_id)
+    elif action == "request_code":
+        advance(session, "coding", "brain", session_id)
+    elif action == "analyze" and phase == "coding" and (session.get("test_results") or {}).get("total"):
+        # The Brain is reviewing submitted, tested code: time to have the candidate explain it.
+        # Before a submission, analyze is a review of the approach and coding goes on.
+        advance(session, "explanation", "brain", session_id)
+    return session["phase"]
+
+
+def on_code_submitted(session: dict, session_id: str = None) -> str:
+    """A formal submission means the candidate is coding, whatever the Brain last said."""
+    advance(session, "coding", "code_submitted", session_id)
+    return session["phase"]
+
+
+def on_test_results(session: dict, test_results: dict, session_id: str = None) -> str:
+    """Code that passes every test ends the coding phase."""
+    if session["phase"] == "coding" and test_results.get("total") and test_results["passed"] == test_results["total"]:
+        advance(session, "explanation", "tests_passed", session_id)
+    return session["phase"]
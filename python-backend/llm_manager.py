@@ -1,66 +1,117 @@
 import os
-import json
-from google import genai
-from google.genai import types
-from openai import AsyncOpenAI
-from fastapi import HTTPException
+from typing import List, Optional, Tuple
 
-# Initialize Gemini
-os.environ["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
-gemini_client = genai.Client()
+from llm_router import ProviderRouter
+from llm_scheduler import scheduler, Priority, resolve_priority
+from registry import components
 
-# Initialize OpenAI
-openai_api_key = os.getenv("OPENAI_API_KEY", "")
-openai_client = AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
+from mock_providers import MOCK_PROVIDERS_ENABLED, FakeGeminiClient, FakeOpenAIClient
 
-async def generate_content_with_fallback(prompt: str, expect_json: bool = False) -> str:
+
+# The SDKs are slow to import, so clients are built on first use (or during startup warm-up)
+def _build_gemini_client():
+    if MOCK_PROVIDERS_ENABLED:
+        # Offline stand-ins for benchmarking (LLM_PROVIDER=mock)
+        return FakeGeminiClient()
+    from google import genai
+    os.environ["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
+    return genai.Client()
+
+
+def _build_openai_client():
+    if MOCK_PROVIDERS_ENABLED:
+        return FakeOpenAIClient()
+    from openai import AsyncOpenAI
+    openai_api_key = os.getenv("OPENAI_API_KEY", "")
+    return AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
+
+
+components.register("gemini_client", _build_gemini_client)
+components.register("openai_client", _build_openai_client)
+
+
+async def _call_gemini(messages: List[dict], expect_json: bool, temperature: Optional[float]) -> Tuple[str, object]:
+    gemini_client = await components.aget("gemini_client")
+    if gemini_client is None:
+        raise RuntimeError("Gemini client unavailable")
+    if MOCK_PROVIDERS_ENABLED:
+        config_cls = dict  # keeps mock runs from importing the Gemini SDK at all
+    else:
+        from google.genai import types
+        config_cls = types.GenerateContentConfig
+
+    config_kwargs = {}
+    if expect_json:
+        config_kwargs["response_mime_type"] = "application/json"
+    if temperature is not None:
+        config_kwargs["temperature"] = temperature
+
+    # The async client keeps the event loop free while Gemini is thinking
+    response = await gemini_client.aio.models.generate_content(
+        model='gemini-2.5-flash',
+        contents=[{"role": m["role"], "parts": [{"text": m["text"]}]} for m in messages],
+        config=config_cls(**config_kwargs),
+    )
+    return response.text, response
+
+
+async def _call_openai(messages: List[dict], expect_json: bool, temperature: Optional[float]) -> Tuple[str, object]:
+    openai_client = await components.aget("openai_client")
+    chat_messages = [
+        {"role": "assistant" if m["role"] == "model" else "user", "content": m["text"]}
+        for m in messages
+    ]
+
+    response_format = None
+    if expect_json:
+        response_format = {"type": "json_object"}
+        # OpenAI requires the word "json" in the prompt if response_format is json_object
+        if not any("json" in m["content"].lower() for m in chat_messages):
+            chat_messages.append({"role": "system", "content": "Respond strictly in JSON format."})
+
+    kwargs = {}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    completion = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=chat_messages,
+        response_format=response_format,
+        **kwargs
+    )
+    return completion.choices[0].message.content, completion
+
+
+# Gemini is preferred; the router demotes it automatically when it is slow or failing
+router = ProviderRouter()
+router.register("gemini", _call_gemini)
+if MOCK_PROVIDERS_ENABLED or os.getenv("OPENAI_API_KEY"):
+    router.register("openai", _call_openai)
+
+
+async def generate_chat_with_fallback(messages: List[dict], expect_json: bool = False,
+                                      temperature: Optional[float] = None, agent: str = "general",
+                                      priority: Priority = Priority.INTERACTIVE) -> str:
     """
-    Tries to generate content using Gemini-2.5-flash.
-    If it fails (e.g. Rate Limit 429), it falls back to OpenAI (gpt-4o-mini).
-    
+    Multi-turn generation, admitted through the priority scheduler and routed across providers.
+    messages: [{"role": "user"|"model", "text": "..."}]
+    priority: default class for this call; an enclosing llm_priority() block overrides it.
+
+    Returns the resulting text; raises HTTPException(500) if every provider fails
+    and LLMShedError if the call was shed under load.
+    """
+    return await scheduler.run(
+        resolve_priority(priority),
+        lambda: router.generate(messages, expect_json=expect_json, temperature=temperature, agent=agent)
+    )
+
+
+async def generate_content_with_fallback(prompt: str, expect_json: bool = False, agent: str = "general",
+                                         priority: Priority = Priority.INTERACTIVE) -> str:
+    """
+    Generates content for a single prompt via the scheduler and provider router
+    (Gemini-2.5-flash preferred, OpenAI gpt-4o-mini as the alternative).
+
     Returns the resulting text.
     """
-    # 1. Try Gemini
-    try:
-        config_kwargs = {}
-        if expect_json:
-            config_kwargs["response_mime_type"] = "application/json"
-            
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(**config_kwargs),
-        )
-        return response.text
-    except Exception as gemini_err:
-        print(f"[LLM WARNING] Gemini failed: {gemini_err}. Attempting OpenAI fallback...")
-        
-        # 2. Try OpenAI Fallback
-        if not openai_client:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Gemini AI Failed and no OPENAI_API_KEY provided for fallback. Gemini error: {str(gemini_err)}"
-            )
-            
-        try:
-            messages = [{"role": "user", "content": prompt}]
-            
-            response_format = None
-            if expect_json:
-                response_format = {"type": "json_object"}
-                # OpenAI requires the word "json" in the prompt if response_format is json_object
-                if "json" not in prompt.lower():
-                    messages.append({"role": "system", "content": "Respond strictly in JSON format."})
-                    
-            completion = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                response_format=response_format
-            )
-            return completion.choices[0].message.content
-        except Exception as openai_err:
-            print(f"[LLM ERROR] OpenAI fallback also failed: {openai_err}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Both Gemini and OpenAI failed. Gemini: {str(gemini_err)} | OpenAI: {str(openai_err)}"
-            )
+    return await generate_chat_with_fallback([{"role": "user", "text": prompt}], expect_json=expect_json,
+                                             agent=agent, priority=priority)
@@ -0,0 +1,263 @@
+"""
+LLM Router — latency-aware provider selection with circuit breakers and hedged requests.
+
+Tracks an EWMA of latency and error rate per provider and orders providers by expected
+cost. A provider that fails repeatedly has its circuit opened for a cooldown so requests
+skip it instead of paying the failed-call latency first (e.g. during a Gemini 429 storm);
+after the cooldown a single probe request decides whether it closes again. A healthy
+provider that has not been called for RESAMPLE_AFTER_SECONDS (because it ranked lower) gets
+one request first, so a single slow early sample can't demote it for the life of the process.
+Optionally, if the first provider hasn't answered by its p95 latency, a hedged request is
+sent to the next provider and whichever answers first wins.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from metrics import record_llm_call, log, Counter, Gauge, LLM_FALLBACKS
+
+# (messages, expect_json, temperature) -> (text, raw provider response)
+ProviderCall = Callable[[List[dict], bool, Optional[float]], Awaitable[Tuple[str, object]]]
+
+EWMA_ALPHA = 0.2
+# Error rate decays with time so a demoted provider is retried once it has had a rest
+ERROR_RATE_HALF_LIFE_SECONDS = 60.0
+FAILURES_TO_OPEN = 3
+CIRCUIT_COOLDOWN_SECONDS = 30.0
+MAX_CIRCUIT_COOLDOWN_SECONDS = 300.0
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "0") == "1"
+MIN_SAMPLES_FOR_P95 = 20
+DEFAULT_HEDGE_DELAY_SECONDS = 4.0
+MIN_HEDGE_DELAY_SECONDS = 0.5
+# Lower-ranked providers are re-sampled this often so their EWMA never goes stale
+RESAMPLE_AFTER_SECONDS = float(os.getenv("LLM_RESAMPLE_SECONDS", "60"))
+
+LLM_HEDGES = Counter("llm_hedged_requests_total", "Hedged requests fired to a secondary provider.", ("agent", "winner"))
+LLM_RESAMPLES = Counter("llm_resampled_requests_total", "Requests sent first to a lower-ranked provider to "
+                        "refresh its latency estimate.", ("provider",))
+LLM_CIRCUIT_OPEN = Gauge("llm_circuit_open", "1 while a provider's circuit breaker is open.", ("provider",))
+
+
+def _is_json(text: Optional[str]) -> bool:
+    try:
+        json.loads(text)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class ProviderStats:
+    """Rolling health of one provider plus its circuit-breaker state."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ewma_latency: Optional[float] = None
+        self._error_rate = 0.0
+        self._error_rate_at = time.monotonic()
+        self.latencies = deque(maxlen=200)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = CIRCUIT_COOLDOWN_SECONDS
+        self.probe_in_flight = False
+        # Counts from start-up so the cold-start order (registration order) isn't re-sampled at once
+        self.last_sampled_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.open_until == 0.0:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allows_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probe_in_flight:
+            return True
+        return False
+
+    @property
+    def ewma_error_rate(self) -> float:
+        elapsed = time.monotonic() - self._error_rate_at
+        return self._error_rate * 0.5 ** (elapsed / ERROR_RATE_HALF_LIFE_SECONDS)
+
+    def _update_error_rate(self, failed: bool):
+        self._error_rate = EWMA_ALPHA * float(failed) + (1 - EWMA_ALPHA) * self.ewma_error_rate
+        self._error_rate_at = time.monotonic()
+
+    def p95_latency(self) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES_FOR_P95:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def expected_cost(self) -> float:
+        # Unknown providers look average so they get tried; errors make a provider look slower
+        latency = self.ewma_latency if self.ewma_latency is not None else 2.0
+        return latency * (1.0 + 4.0 * self.ewma_error_rate)
+
+    def record_success(self, latency: float):
+        self.last_sampled_at = time.monotonic()
+        self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency)
+        self._update_error_rate(False)
+        self.consecutive_failures = 0
+        if self.open_until:
+            log("LLM ROUTER", f"Circuit for {self.name} closed")
+        self.open_until = 0.0
+        self.cooldown = CIRCUIT_COOLDOWN_SECONDS
+        LLM_CIRCUIT_OPEN.set(0, provider=self.name)
+
+    def record_failure(self):
+        self.last_sampled_at = time.monotonic()
+        self._update_error_rate(True)
+        self.consecutive_failures += 1
+        if self.state == "half_open":
+            # Failed probe: re-open with exponential backoff
+            self.cooldown = min(self.cooldown * 2, MAX_CIRCUIT_COOLDOWN_SECONDS)
+            self._open()
+        elif self.consecutive_failures >= FAILURES_TO_OPEN and self.state == "closed":
+            self._open()
+
+    def _open(self):
+        self.open_until = time.monotonic() + self.cooldown
+        LLM_CIRCUIT_OPEN.set(1, provider=self.name)
+        log("LLM ROUTER", f"Circuit for {self.name} opened for {self.cooldown:.0f}s "
+                          f"after {self.consecutive_failures} consecutive failures")
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "ewma_latency_s": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "ewma_error_rate": round(self.ewma_error_rate, 3),
+            "p95_latency_s": self.p95_latency(),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderRouter:
+    def __init__(self):
+        self._providers: Dict[str, ProviderCall] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+
+    def register(self, name: str, call: ProviderCall):
+        """Providers registered first are preferred until latency data says otherwise."""
+        self._providers[name] = call
+        self.stats[name] = ProviderStats(name)
+
+    def _ranked(self) -> List[str]:
+        names = list(self._providers)
+        healthy = [n for n in names if self.stats[n].allows_request()]
+        healthy.sort(key=lambda n: (self.stats[n].expected_cost(), names.index(n)))
+        if healthy:
+            now = time.monotonic()
+            stale = next((n for n in healthy[1:] if now - self.stats[n].last_sampled_at > RESAMPLE_AFTER_SECONDS), None)
+            if stale is not None:
+                # Claimed now so concurrent requests don't all re-sample; the leader stays next in line
+                self.stats[stale].last_sampled_at = now
+                LLM_RESAMPLES.inc(provider=stale)
+                healthy.remove(stale)
+                healthy.insert(0, stale)
+            return healthy
+        # Every circuit is open: try the one that reopens soonest rather than failing outright
+        return sorted(names, key=lambda n: self.stats[n].open_until)
+
+    async def _attempt(self, name: str, messages: List[dict], expect_json: bool,
+                       temperature: Optional[float], agent: str) -> str:
+        stats = self.stats[name]
+        probing = stats.state == "half_open"
+        if probing:
+            stats.probe_in_flight = True
+        start = time.perf_counter()
+        try:
+            text, response = await self._providers[name](messages, expect_json, temperature)
+        except asyncio.CancelledError:
+            record_llm_call(agent, name, time.perf_counter() - start, "cancelled")
+            raise
+        except Exception:
+            record_llm_call(agent, name, time.perf_counter() - start, "error")
+            stats.record_failure()
+            raise
+        finally:
+            if probing:
+                stats.probe_in_flight = False
+        elapsed = time.perf_counter() - start
+        # Agents fall back to default scores on unparseable JSON; that must not count as "ok"
+        outcome = "invalid_json" if expect_json and not _is_json(text) else "ok"
+        record_llm_call(agent, name, elapsed, outcome, response)
+        stats.record_success(elapsed)
+        return text
+
+    def _hedge_delay(self, name: str) -> float:
+        p95 = self.stats[name].p95_latency()
+        return max(MIN_HEDGE_DELAY_SECONDS, p95 if p95 is not None else DEFAULT_HEDGE_DELAY_SECONDS)
+
+    async def _hedged(self, primary: str, secondary: str, messages, expect_json, temperature, agent) -> str:
+        tasks = {asyncio.ensure_future(self._attempt(primary, messages, expect_json, temperature, agent)): primary}
+        done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(primary))
+        if not done:
+            tasks[asyncio.ensure_future(self._attempt(secondary, messages, expect_json, temperature, agent))] = secondary
+
+        errors = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            LLM_HEDGES.inc(agent=agent, winner=tasks[task])
+                        return task.result()
+                    errors[tasks[task]] = task.exception()
+                # The primary failed before the hedge fired: fall through to the secondary now
+                if not pending and secondary not in errors and len(tasks) == 1:
+                    LLM_FALLBACKS.inc(agent=agent)
+                    task = asyncio.ensure_future(self._attempt(secondary, messages, expect_json, temperature, agent))
+                    tasks[task] = secondary
+                    pending = {task}
+        finally:
+            for task in pending:
+                task.cancel()
+        raise _AllProvidersFailed(errors)
+
+    async def generate(self, messages: List[dict], expect_json: bool = False,
+                       temperature: Optional[float] = None, agent: str = "general") -> str:
+        """
+        messages: [{"role": "user"|"model", "text": "..."}]
+        Returns the text of the first successful provider; raises HTTPException(500) if all fail.
+        """
+        order = self._ranked()
+        try:
+            if HEDGING_ENABLED and len(order) > 1:
+                return await self._hedged(order[0], order[1], messages, expect_json, temperature, agent)
+
+            errors = {}
+            for index, name in enumerate(order):
+                if index > 0:
+                    LLM_FALLBACKS.inc(agent=agent)
+                    log("LLM WARNING", f"{order[index - 1]} failed. Falling back to {name}...")
+                try:
+                    return await self._attempt(name, messages, expect_json, temperature, agent)
+                except Exception as e:
+                    errors[name] = e
+            raise _AllProvidersFailed(errors)
+        except _AllProvidersFailed as e:
+            detail = " | ".join(f"{name}: {err}" for name, err in e.errors.items()) or "no providers configured"
+            log("LLM ERROR", f"All providers failed. {detail}")
+            raise HTTPException(status_code=500, detail=f"All LLM providers failed. {detail}")
+
+    def snapshot(self) -> dict:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+class _AllProvidersFailed(Exception):
+    def __init__(self, errors: dict):
+        super().__init__("All providers failed")
+        self.errors = errors
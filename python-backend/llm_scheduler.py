@@ -0,0 +1,185 @@
+"""
+LLM Scheduler — admission-controlled, priority-ordered queue in front of the provider router.
+
+Live interview turns, submission judging, background evaluators and report prose all draw
+on the same provider quota. Every LLM call is admitted through this scheduler with a
+priority class; free slots always go to the most urgent waiting class first, each class
+has its own concurrency cap, and when interactive latency is over target, background
+evaluations are deferred and speculative report work is shed outright.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from metrics import Counter, Gauge, Histogram, log
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0   # Brain turns the candidate is waiting on
+    SUBMISSION = 1    # Code judge after /api/submit-code
+    BACKGROUND = 2    # Comm / reasoning evaluators
+    REPORT = 3        # Speculative report drafts
+
+
+TOTAL_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+CLASS_CONCURRENCY = {
+    Priority.INTERACTIVE: TOTAL_CONCURRENCY,
+    Priority.SUBMISSION: max(1, TOTAL_CONCURRENCY // 2),
+    Priority.BACKGROUND: max(1, TOTAL_CONCURRENCY // 4),
+    Priority.REPORT: max(1, TOTAL_CONCURRENCY // 8),
+}
+INTERACTIVE_LATENCY_TARGET_SECONDS = float(os.getenv("LLM_INTERACTIVE_TARGET_SECONDS", "4.0"))
+MAX_DEFER_SECONDS = 30.0
+DEFER_POLL_SECONDS = 0.5
+LATENCY_EWMA_ALPHA = 0.2
+# Without fresh interactive samples there is no evidence of overload
+LATENCY_STALE_SECONDS = 30.0
+
+QUEUE_DEPTH = Gauge("llm_queue_depth", "LLM calls waiting for admission.", ("priority",))
+IN_FLIGHT = Gauge("llm_in_flight", "LLM calls currently running.", ("priority",))
+QUEUE_WAIT_SECONDS = Histogram("llm_queue_wait_seconds", "Time LLM calls waited for admission.", ("priority",))
+SHED = Counter("llm_shed_total", "LLM calls dropped by load shedding.", ("priority",))
+DEFERRED = Counter("llm_deferred_total", "LLM calls deferred while interactive latency was over target.", ("priority",))
+
+_priority_override: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar("llm_priority", default=None)
+
+
+class LLMShedError(Exception):
+    """Raised when a low-priority LLM call is dropped because the system is overloaded."""
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Forces every LLM call made inside the block onto `priority` (e.g. a report the user is waiting on)."""
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def resolve_priority(default: Priority) -> Priority:
+    override = _priority_override.get()
+    return override if override is not None else default
+
+
+class LLMScheduler:
+    def __init__(self, total: int = TOTAL_CONCURRENCY, per_class: Optional[dict] = None):
+        self.total = total
+        self.per_class = dict(per_class or CLASS_CONCURRENCY)
+        self.running = {p: 0 for p in Priority}
+        self._waiters = []   # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.interactive_latency: Optional[float] = None
+        self._latency_at = 0.0
+
+    @property
+    def overloaded(self) -> bool:
+        return (self.interactive_latency is not None
+                and self.interactive_latency > INTERACTIVE_LATENCY_TARGET_SECONDS
+                and time.monotonic() - self._latency_at < LATENCY_STALE_SECONDS)
+
+    def _has_capacity(self, priority: Priority) -> bool:
+        return sum(self.running.values()) < self.total and self.running[priority] < self.per_class[priority]
+
+    def _grant(self, priority: Priority):
+        self.running[priority] += 1
+        IN_FLIGHT.set(self.running[priority], priority=priority.name.lower())
+
+    def _dispatch(self):
+        """Hands free slots to waiters in priority order, skipping classes at their cap."""
+        skipped = []
+        while self._waiters and sum(self.running.values()) < self.total:
+            priority, seq, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            if self.running[priority] >= self.per_class[priority]:
+                skipped.append((priority, seq, future))
+                continue
+            self._grant(priority)
+            future.set_result(None)
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+        self._update_depth()
+
+    def _update_depth(self):
+        for p in Priority:
+            depth = sum(1 for w in self._waiters if w[0] == p and not w[2].done())
+            QUEUE_DEPTH.set(depth, priority=p.name.lower())
+
+    async def _admit(self, priority: Priority):
+        if self.overloaded and priority == Priority.REPORT:
+            SHED.inc(priority=priority.name.lower())
+            raise LLMShedError("Report work shed: interactive latency over target")
+
+        if self.overloaded and priority == Priority.BACKGROUND:
+            DEFERRED.inc(priority=priority.name.lower())
+            deadline = time.monotonic() + MAX_DEFER_SECONDS
+            while self.overloaded and time.monotonic() < deadline:
+                await asyncio.sleep(DEFER_POLL_SECONDS)
+
+        ahead = any(w[0] <= priority and not w[2].done() for w in self._waiters)
+        if not ahead and self._has_capacity(priority):
+            self._grant(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._update_depth()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we got cancelled: give it back
+                self._release(priority)
+            raise
+
+    def _release(self, priority: Priority):
+        self.running[priority] -= 1
+        IN_FLIGHT.set(self.running[priority], priority=priority.name.lower())
+        self._dispatch()
+
+    def _record_interactive(self, seconds: float):
+        previous_overload = self.overloaded
+        if self.interactive_latency is None:
+            self.interactive_latency = seconds
+        else:
+            self.interactive_latency = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * self.interactive_latency
+        self._latency_at = time.monotonic()
+        if self.overloaded != previous_overload:
+            state = "over" if self.overloaded else "back under"
+            log("LLM SCHEDULER", f"Interactive latency {self.interactive_latency:.2f}s is {state} "
+                                 f"the {INTERACTIVE_LATENCY_TARGET_SECONDS:.1f}s target")
+
+    async def run(self, priority: Priority, call: Callable[[], Awaitable[T]]) -> T:
+        """Waits for admission at `priority`, then runs `call()` inside a slot."""
+        queued_at = time.perf_counter()
+        await self._admit(priority)
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at, priority=priority.name.lower())
+        try:
+            return await call()
+        finally:
+            self._release(priority)
+            if priority == Priority.INTERACTIVE:
+                # Queueing + provider time is what the candidate actually experiences
+                self._record_interactive(time.perf_counter() - queued_at)
+
+    def snapshot(self) -> dict:
+        return {
+            "running": {p.name.lower(): n for p, n in self.running.items()},
+            "queued": {p.name.lower(): sum(1 for w in self._waiters if w[0] == p and not w[2].done()) for p in Priority},
+            "interactive_latency_s": round(self.interactive_latency, 3) if self.interactive_latency is not None else None,
+            "overloaded": self.overloaded,
+        }
+
+
+scheduler = LLMScheduler()
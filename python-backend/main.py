@@ -1,22 +1,27 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 from passlib.context import CryptContext
 import jwt
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import pdfplumber
 import io
 import os
 import json
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from llm_manager import generate_content_with_fallback
+from problem_store import store_problem, get_problem_tests
+from solution_evaluator import EvaluateRequest, EvaluateResponse, evaluate_submission
+import metrics
 
 app = FastAPI(title="Resume Parser API")
 
@@ -29,6 +34,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Every request gets a trace id; session endpoints rebind it to the session's own id
+    metrics.set_trace_id(request.headers.get("x-trace-id") or metrics.new_trace_id())
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        # Use the route template (/api/session/{join_code}) to keep label cardinality bounded
+        route_path = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, route=route_path, status=status
+        )
+
 # Serve generated avatar videos
 media_dir = Path(__file__).parent / "generated_media"
 media_dir.mkdir(exist_ok=True)
@@ -47,9 +70,113 @@ async def get_avatar():
 from chat_routes import router as chat_router
 app.include_router(chat_router)
 
-MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-client_mongo = AsyncIOMotorClient(MONGODB_URI, serverSelectionTimeoutMS=5000, tlsAllowInvalidCertificates=True)
-db = client_mongo.interview_app_db
+from reports_routes import router as reports_router
+app.include_router(reports_router)
+
+from batch_routes import router as batch_router
+app.include_router(batch_router)
+
+from fastapi.responses import PlainTextResponse
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+from llm_manager import router as llm_router
+from llm_scheduler import scheduler as llm_scheduler
+
+@app.get("/api/llm-status")
+def get_llm_status():
+    """Provider health (circuit state, EWMA latency) and scheduler queue depths."""
+    return {"providers": llm_router.snapshot(), "scheduler": llm_scheduler.snapshot()}
+
+@app.get("/api/trace/{trace_id}")
+def get_trace(trace_id: str):
+    """Recent spans (LLM calls, TTS, evaluators) recorded under a trace id."""
+    return {"trace_id": trace_id, "spans": metrics.spans_for_trace(trace_id)}
+
+from sandbox import warm_pools
+from session_manager import run_sweeper
+from registry import components
+from agents.proctor_agent import PROCTOR_ENABLED, PROCTOR_WORKERS
+from agents.proctor_pool import get_pool, shutdown_pool
+import asyncio
+
+@app.on_event("startup")
+async def warm_sandbox():
+    # Pre-spawn code-execution workers so the first submission doesn't pay interpreter start-up
+    warm_pools()
+
+_component_warmup = None
+
+@app.on_event("startup")
+async def warm_components():
+    # Build LLM clients and the YOLO model after the server is already accepting requests
+    global _component_warmup
+    # With a proctor pool the model lives in the worker processes instead
+    local_detector = PROCTOR_ENABLED and not PROCTOR_WORKERS
+    names = ["gemini_client", "openai_client"] + (["proctor_detector"] if local_detector else [])
+    _component_warmup = components.warm_up(names)
+
+@app.on_event("startup")
+async def start_proctor_pool():
+    # Workers load the model in parallel while the server is already accepting requests
+    if PROCTOR_ENABLED and PROCTOR_WORKERS:
+        get_pool()
+
+@app.on_event("shutdown")
+async def stop_proctor_pool():
+    shutdown_pool()
+
+@app.get("/api/proctor/pool")
+async def get_proctor_pool():
+    """Worker processes of the proctor pool and how many sessions each one serves."""
+    if not (PROCTOR_ENABLED and PROCTOR_WORKERS):
+        return {"workers": 0}
+    return get_pool().snapshot()
+
+@app.get("/api/components")
+def get_components():
+    """Which shared clients/models have been built and how long each took."""
+    return components.snapshot()
+
+_session_sweeper = None
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    # Evicts abandoned and ended sessions so proctor loops and camera frames don't pile up
+    global _session_sweeper
+    _session_sweeper = asyncio.create_task(run_sweeper())
+
+from database import db, ensure_indexes, ensure_email_index
+from event_log import event_log
+from similarity_index import similarity_index
+
+_index_setup = None
+
+@app.on_event("startup")
+async def create_indexes():
+    # In the background so an unreachable Mongo doesn't hold up start-up for the selection timeout
+    global _index_setup
+    _index_setup = asyncio.create_task(ensure_indexes())
+
+_similarity_load = None
+
+@app.on_event("startup")
+async def load_similarity_index():
+    # Rebuild the per-problem LSH tables from persisted signatures without holding up start-up
+    global _similarity_load
+    _similarity_load = asyncio.create_task(similarity_index.load())
+
+@app.on_event("startup")
+async def start_event_log():
+    event_log.start()
+
+@app.on_event("shutdown")
+async def flush_event_log():
+    # Write whatever interview events are still buffered before the process exits
+    await event_log.close()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
@@ -57,11 +184,18 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# pbkdf2 is deliberately slow; hashing runs on a bounded pool so login bursts don't stall the event loop
+# (hashlib releases the GIL while deriving keys, so threads scale across cores)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+
+async def verify_password(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -100,16 +234,8 @@ class GenerateResponse(BaseModel):
     description: str
     starting_code: str
     language: str
-
-class EvaluateRequest(BaseModel):
-    problem_title: str
-    problem_description: str
-    user_code: str
-    language: str
-
-class EvaluateResponse(BaseModel):
-    passed: bool
-    feedback: str
+    problem_id: Optional[str] = None
+    has_hidden_tests: bool = False
 
 @app.post("/api/parse-resume", response_model=ResumeResponse)
 async def parse_resume(file: UploadFile = File(...)):
@@ -154,65 +280,74 @@ Respond strictly in JSON format matching this schema:
   "title": "String, short problem name",
   "description": "String, detailed problem description, constraints, and examples formatted nicely",
   "starting_code": "String, initial code template (e.g., function definition) in Python or JS based on the topic",
-  "language": "String, either 'python' or 'javascript'"
+  "language": "String, either 'python' or 'javascript'",
+  "function_name": "String, name of the function the candidate implements, exactly as defined in starting_code",
+  "reference_solution": "String, a complete and correct solution in the same language defining function_name",
+  "test_cases": [
+    {{"args": ["JSON array of positional arguments passed to function_name"], "expected": "JSON value the function must return"}}
+  ],
+  "input_generator": "String, code in the same language defining make_input(n) that deterministically returns the args array for a valid input of size n"
 }}
+Provide 8-12 test_cases covering typical inputs and edge cases (empty input, single element, duplicates, large values).
+Every argument and expected value must be plain JSON. Do not mention the test cases in the description.
 """
     try:
-        response_text = await generate_content_with_fallback(prompt, expect_json=True)
+        response_text = await generate_content_with_fallback(prompt, expect_json=True, agent="problem_generator")
         data = json.loads(response_text)
-        return GenerateResponse(**data)
+        problem = GenerateResponse(**data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI Generation Failed: {str(e)}")
 
-@app.post("/api/evaluate-solution", response_model=EvaluateResponse)
-async def evaluate_solution(req: EvaluateRequest):
-    prompt = f"""You are an expert technical interviewer evaluating a candidate's code submission.
-Problem: {req.problem_title}
-Description: {req.problem_description}
-Language: {req.language}
-Candidate Code:
-{req.user_code}
-
-Evaluate the code for correctness. Check if it solves the problem, handles edge cases, and doesn't have major syntax errors.
-Respond strictly in JSON format matching this schema:
-{{
-  "passed": boolean (true if the code is a basically correct solution, false otherwise),
-  "feedback": "String, short encouraging feedback explaining what is right or wrong, max 3 sentences"
-}}
-"""
+    # Validate the hidden test suite once against the reference solution and keep it server-side
     try:
-        response_text = await generate_content_with_fallback(prompt, expect_json=True)
-        data = json.loads(response_text)
-        return EvaluateResponse(**data)
+        problem.problem_id = await store_problem(
+            problem.model_dump(include={"title", "description", "starting_code", "language"}),
+            reference_solution=data.get("reference_solution", ""),
+            function_name=data.get("function_name", ""),
+            test_cases=data.get("test_cases") or [],
+            input_generator=data.get("input_generator", "")
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI Evaluation Failed: {str(e)}")
+        # The problem itself is fine; it is just graded without hidden tests
+        metrics.log("PROBLEM STORE ERROR", f"Could not validate hidden tests for '{problem.title}': {e}")
+        problem.problem_id = None
+    problem.has_hidden_tests = get_problem_tests(problem.problem_id) is not None
+    return problem
+
+@app.post("/api/evaluate-solution", response_model=EvaluateResponse)
+async def evaluate_solution(req: EvaluateRequest):
+    return await evaluate_submission(req)
 
 @app.post("/api/register")
 async def register(user: UserCreate):
     try:
-        existing_user = await db.users.find_one({"email": user.email})
-        if existing_user:
+        # Checked before hashing so a duplicate sign-up doesn't spend a hash in the pool
+        if await db.users.find_one({"email": user.email}, {"_id": 1}):
             raise HTTPException(status_code=400, detail="Email already registered")
-        
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         user_dict = {
             "username": user.username,
             "email": user.email,
             "hashed_password": hashed_password
         }
+        # With the unique index on users.email, the insert is the (atomic) duplicate check; without
+        # it (still building, or blocked by existing duplicates) only the racy pre-check above stands
+        await ensure_email_index()
         await db.users.insert_one(user_dict)
         return {"message": "User registered successfully"}
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Registration error: {e}")
+        metrics.log("REGISTER ERROR", str(e))
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.post("/api/login", response_model=TokenResponse)
 async def login(user: UserLogin):
     try:
-        db_user = await db.users.find_one({"email": user.email})
-        if not db_user or not verify_password(user.password, db_user["hashed_password"]):
+        db_user = await db.users.find_one({"email": user.email}, {"email": 1, "hashed_password": 1})
+        if not db_user or not await verify_password(user.password, db_user["hashed_password"]):
             raise HTTPException(status_code=401, detail="Invalid credentials")
             
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -223,7 +358,7 @@ async def login(user: UserLogin):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Login error: {e}")
+        metrics.log("LOGIN ERROR", str(e))
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/")
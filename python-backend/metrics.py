@@ -0,0 +1,258 @@
+"""
+Metrics — in-process latency/throughput instrumentation exposed in Prometheus text format.
+
+Provides thread-safe Counter/Gauge/Histogram primitives, the metric definitions used
+across the backend, and per-session trace ids (a ContextVar) that follow requests into
+background tasks so every span and log line can be tied back to an interview session.
+"""
+
+import bisect
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Tuple, Optional, List
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_prometheus() -> str:
+    """Renders every registered metric in the Prometheus text exposition format (v0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ─── Metric Definitions ──────────────────────────────────────────────────
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+AGENT_CALL_SECONDS = Histogram(
+    "agent_call_duration_seconds", "LLM call latency per agent and provider.", ("agent", "provider", "outcome"))
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens consumed per agent, provider and direction (in/out).", ("agent", "provider", "direction"))
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total", "Calls served by a provider other than the first-ranked one.", ("agent",))
+TTS_SECONDS = Histogram(
+    "tts_duration_seconds", "Text-to-speech generation latency.", ("outcome",))
+TTS_BYTES = Histogram(
+    "tts_audio_bytes", "Size of generated TTS audio.", (),
+    buckets=(8_000, 16_000, 32_000, 64_000, 128_000, 256_000, 512_000, 1_048_576))
+PROCTOR_INFERENCES = Counter("proctor_inferences_total", "Proctor detector runs by full frame or tracked region.",
+                             ("mode",))
+PROCTOR_INFERENCE_SECONDS = Histogram(
+    "proctor_inference_duration_seconds", "YOLO inference time per proctored frame.", ("backend",),
+    buckets=(0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0))
+PROCTOR_FPS = Gauge(
+    "proctor_fps", "Frames per second processed by each session's proctor loop.", ("session_id",))
+SESSIONS_ACTIVE = Gauge(
+    "interview_sessions_active", "Interview sessions currently held in memory.")
+SESSIONS_STARTED = Counter(
+    "interview_sessions_started_total", "Interview sessions started.")
+SESSIONS_ENDED = Counter(
+    "interview_sessions_ended_total", "Interview sessions ended via /api/end-session.")
+
+
+# ─── Trace Ids ────────────────────────────────────────────────────────────
+
+_trace_id: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+
+# Recent spans, queryable per trace id for ad-hoc debugging
+RECENT_SPANS: deque = deque(maxlen=5000)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_trace_id() -> str:
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: str):
+    _trace_id.set(trace_id)
+
+
+def with_trace(trace_id: str, fn):
+    """
+    Wraps a coroutine function so it runs under `trace_id`.
+    Use when handing work to BackgroundTasks, which don't inherit the handler's context.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _trace_id.set(trace_id)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _trace_id.reset(token)
+    return wrapper
+
+
+def record_span(name: str, seconds: float, **attributes):
+    RECENT_SPANS.append({
+        "trace_id": get_trace_id(),
+        "name": name,
+        "duration_ms": round(seconds * 1000, 2),
+        "at": time.time(),
+        **attributes
+    })
+
+
+def spans_for_trace(trace_id: str) -> List[dict]:
+    return [s for s in list(RECENT_SPANS) if s["trace_id"] == trace_id]
+
+
+def log(tag: str, message: str):
+    """print()-style log line carrying the current trace id."""
+    print(f"[{tag}] [trace={get_trace_id()}] {message}")
+
+
+# ─── LLM Call Helpers ─────────────────────────────────────────────────────
+
+def _usage_tokens(response) -> Tuple[Optional[int], Optional[int]]:
+    """Extracts (input, output) token counts from a Gemini or OpenAI response."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        return getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    return None, None
+
+
+def record_llm_call(agent: str, provider: str, seconds: float, outcome: str, response=None):
+    AGENT_CALL_SECONDS.observe(seconds, agent=agent, provider=provider, outcome=outcome)
+    tokens_in, tokens_out = _usage_tokens(response) if response is not None else (None, None)
+    if tokens_in:
+        LLM_TOKENS.inc(tokens_in, agent=agent, provider=provider, direction="in")
+    if tokens_out:
+        LLM_TOKENS.inc(tokens_out, agent=agent, provider=provider, direction="out")
+    record_span(f"llm.{agent}", seconds, provider=provider, outcome=outcome,
+                tokens_in=tokens_in, tokens_out=tokens_out)
@@ -0,0 +1,228 @@
+"""
+Mock Providers — offline stand-ins for Gemini, OpenAI chat and OpenAI TTS.
+
+Enabled with LLM_PROVIDER=mock. The fakes mimic the client surfaces the backend uses
+(`client.aio.models.generate_content`, `chat.completions.create`, `audio.speech.create`),
+sleep for a latency drawn from a configurable log-normal distribution, and return canned
+JSON shaped like each agent's schema, so the whole interview flow can be load-tested
+without network access or API keys.
+
+Latency is configured as "median_ms,p95_ms" per provider:
+    MOCK_GEMINI_LATENCY_MS=800,2500  MOCK_OPENAI_LATENCY_MS=600,1500  MOCK_TTS_LATENCY_MS=400,900
+Failure injection: MOCK_GEMINI_ERROR_RATE=0.2 (fraction of calls raising a fake 429).
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+from typing import Tuple
+
+MOCK_PROVIDERS_ENABLED = os.getenv("LLM_PROVIDER", "").lower() == "mock"
+
+
+def _parse_latency(env_name: str, default: str) -> Tuple[float, float]:
+    median_ms, p95_ms = (float(v) for v in os.getenv(env_name, default).split(","))
+    return median_ms / 1000.0, max(p95_ms, median_ms) / 1000.0
+
+
+class LatencyModel:
+    """Log-normal latency parameterised by its median and 95th percentile."""
+
+    def __init__(self, median_s: float, p95_s: float, error_rate: float = 0.0):
+        self.median_s = median_s
+        self.sigma = math.log(p95_s / median_s) / 1.645 if median_s > 0 and p95_s > median_s else 0.0
+        self.error_rate = error_rate
+
+    @classmethod
+    def from_env(cls, prefix: str, default: str) -> "LatencyModel":
+        median_s, p95_s = _parse_latency(f"MOCK_{prefix}_LATENCY_MS", default)
+        return cls(median_s, p95_s, float(os.getenv(f"MOCK_{prefix}_ERROR_RATE", "0")))
+
+    def sample(self) -> float:
+        return self.median_s * math.exp(self.sigma * random.gauss(0.0, 1.0))
+
+    async def wait(self):
+        await asyncio.sleep(self.sample())
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (mock)")
+
+
+# ─── Canned Responses ─────────────────────────────────────────────────────
+
+MOCK_PROBLEM = {
+    "title": "Two Sum",
+    "description": "Given an array of integers nums and an integer target, return the indices of the two numbers that add up to target. Exactly one solution exists.",
+    "starting_code": "def two_sum(nums, target):\n    pass\n",
+    "language": "python",
+    "function_name": "two_sum",
+    "reference_solution": "def two_sum(nums, target):\n    seen = {}\n    for i, n in enumerate(nums):\n        if target - n in seen:\n            return [seen[target - n], i]\n        seen[n] = i\n    return []\n",
+    "test_cases": [
+        {"args": [[2, 7, 11, 15], 9], "expected": [0, 1]},
+        {"args": [[3, 2, 4], 6], "expected": [1, 2]},
+        {"args": [[3, 3], 6], "expected": [0, 1]},
+        {"args": [[-1, -2, -3, -4, -5], -8], "expected": [2, 4]},
+        {"args": [[0, 4, 3, 0], 0], "expected": [0, 3]},
+    ],
+    "input_generator": "def make_input(n):\n    return [list(range(n)), 2 * n - 3]\n",
+}
+
+# First marker found in the prompt decides which agent schema to answer with
+_AGENT_MARKERS = [
+    ("Final Evaluation Aggregator", "aggregator"),
+    ("Technical Code Judge", "code_judge"),
+    ("Communication Evaluator", "comm_eval"),
+    ("Reasoning Analyzer", "reasoning"),
+    ("Senior Technical Interviewer", "brain"),
+    ("Generate a coding problem", "problem"),
+    ("evaluating a candidate's code submission", "evaluate"),
+    ("appears stuck", "stuck"),
+    ("nudge", "hint"),
+]
+
+
+def _canned_response(agent: str) -> dict:
+    score = lambda: random.randint(4, 9)
+    if agent == "brain":
+        return {
+            "utterance": random.choice([
+                "Okay, walk me through your approach before you start coding.",
+                "What would happen if the input is empty?",
+                "Interesting. What's the time complexity of that?",
+            ]),
+            "tone": "neutral",
+            "action": random.choice(["ask_question", "ask_question", "request_code", "analyze"]),
+        }
+    if agent == "code_judge":
+        return {"technical_correctness": score(), "code_quality": score(), "efficiency_rating": score(),
+                "edge_case_handling": score(), "issues_detected": [], "optimization_suggestions": []}
+    if agent == "comm_eval":
+        return {"communication_score": score(), "clarity_score": score(), "structure_score": score(),
+                "confidence_score": score(), "issues_detected": [], "positive_signals": ["Structured answer"]}
+    if agent == "reasoning":
+        return {"problem_solving_score": score(), "reasoning_score": score(), "complexity_awareness": score(),
+                "debugging_skill": score(), "analysis_notes": ["Explained approach step by step"]}
+    if agent == "aggregator":
+        return {
+            "summary": "Solid problem solving with clear communication.",
+            "scores": {"technical_correctness": score(), "problem_solving": score(), "reasoning": score(),
+                       "code_quality": score(), "communication": score(), "integrity_score": 100,
+                       "final_score_percent": random.randint(40, 95)},
+            "justifications": {"technical_correctness": "mock", "communication": "mock", "reasoning": "mock"},
+            "actionable_recommendations": ["Discuss edge cases earlier."],
+            "performance_level": random.choice(["Hire", "Strong Hire", "Borderline", "No Hire"]),
+        }
+    if agent == "problem":
+        return MOCK_PROBLEM
+    if agent == "evaluate":
+        return {"passed": True, "feedback": "Looks correct. Consider the empty input case."}
+    if agent == "stuck":
+        return {"is_stuck": True, "suggestion": "Try walking through a small example by hand."}
+    return {"hint": "Think about what you need to remember as you iterate."}
+
+
+def _detect_agent(text: str) -> str:
+    for marker, agent in _AGENT_MARKERS:
+        if marker in text:
+            return agent
+    return "hint"
+
+
+def _response_text(prompt_text: str, expect_json: bool) -> str:
+    agent = _detect_agent(prompt_text)
+    payload = _canned_response(agent)
+    if agent == "hint" and not expect_json:
+        return payload["hint"]
+    return json.dumps(payload)
+
+
+class _Usage:
+    def __init__(self, prompt_text: str, output_text: str):
+        # Rough 4-characters-per-token estimate
+        self.prompt_token_count = self.prompt_tokens = max(1, len(prompt_text) // 4)
+        self.candidates_token_count = self.completion_tokens = max(1, len(output_text) // 4)
+
+
+# ─── Fake Gemini ──────────────────────────────────────────────────────────
+
+class _FakeGeminiResponse:
+    def __init__(self, text: str, prompt_text: str):
+        self.text = text
+        self.usage_metadata = _Usage(prompt_text, text)
+
+
+def _contents_text(contents) -> str:
+    if isinstance(contents, str):
+        return contents
+    return "\n".join(part.get("text", "") for item in contents for part in item.get("parts", []))
+
+
+def _expects_json(config) -> bool:
+    mime = config.get("response_mime_type") if isinstance(config, dict) else getattr(config, "response_mime_type", None)
+    return mime == "application/json"
+
+
+class _FakeGeminiAsyncModels:
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+
+    async def generate_content(self, model: str, contents, config=None):
+        await self._latency.wait()
+        prompt_text = _contents_text(contents)
+        return _FakeGeminiResponse(_response_text(prompt_text, _expects_json(config)), prompt_text)
+
+
+class FakeGeminiClient:
+    def __init__(self, latency: LatencyModel = None):
+        latency = latency or LatencyModel.from_env("GEMINI", "800,2500")
+        self.aio = type("FakeGeminiAio", (), {})()
+        self.aio.models = _FakeGeminiAsyncModels(latency)
+
+
+# ─── Fake OpenAI ──────────────────────────────────────────────────────────
+
+class _FakeCompletion:
+    def __init__(self, text: str, prompt_text: str):
+        message = type("Message", (), {"content": text})()
+        self.choices = [type("Choice", (), {"message": message})()]
+        self.usage = _Usage(prompt_text, text)
+
+
+class _FakeChatCompletions:
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+
+    async def create(self, model: str, messages: list, response_format=None, **kwargs):
+        await self._latency.wait()
+        prompt_text = "\n".join(m["content"] for m in messages)
+        expect_json = bool(response_format and response_format.get("type") == "json_object")
+        return _FakeCompletion(_response_text(prompt_text, expect_json), prompt_text)
+
+
+class _FakeSpeechResponse:
+    def __init__(self, audio: bytes):
+        self._audio = audio
+
+    def read(self) -> bytes:
+        return self._audio
+
+
+class _FakeSpeech:
+    # ~1 KB of MP3 per 10 characters is close to tts-1's real output size
+    BYTES_PER_CHAR = 100
+
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+
+    async def create(self, model: str, voice: str, input: str, **kwargs):
+        await self._latency.wait()
+        return _FakeSpeechResponse(b"\x00" * (len(input) * self.BYTES_PER_CHAR))
+
+
+class FakeOpenAIClient:
+    def __init__(self, chat_latency: LatencyModel = None, tts_latency: LatencyModel = None):
+        self.chat = type("FakeChat", (), {})()
+        self.chat.completions = _FakeChatCompletions(chat_latency or LatencyModel.from_env("OPENAI", "600,1500"))
+        self.audio = type("FakeAudio", (), {})()
+        self.audio.speech = _FakeSpeech(tts_latency or LatencyModel.from_env("TTS", "400,900"))
@@ -0,0 +1,93 @@
+"""
+Problem Store — generated problems together with their hidden, validated test suites.
+
+/api/generate-problem asks the LLM for a reference solution and test cases alongside
+the problem. The suite is validated once against the reference solution in the
+sandbox; only cases the reference passes are kept. Later evaluations of the same
+problem can then be decided locally instead of by an LLM judgement.
+The problem's `make_input(n)` generator is checked by profiling the reference
+solution once in the background; its complexity becomes the baseline for candidates.
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any
+
+from sandbox import run_tests
+from complexity_profiler import profile_submission
+from metrics import log
+
+# In production, this would be a MongoDB collection
+MAX_STORED_PROBLEMS = 1000
+MIN_VALID_CASES = 3
+
+PROBLEM_STORE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_background_tasks = set()  # strong refs so pending profiling tasks aren't garbage-collected
+
+
+async def validate_test_suite(reference_solution: str, language: str, function_name: str,
+                              test_cases: List[dict]) -> List[dict]:
+    """Returns the subset of test cases the reference solution passes."""
+    cases = [
+        {"args": c.get("args", []), "expected": c.get("expected")}
+        for c in test_cases
+        if isinstance(c, dict) and isinstance(c.get("args", []), list)
+    ]
+    if not reference_solution or not function_name or not cases:
+        return []
+
+    results = await run_tests(reference_solution, language, function_name, cases)
+    if results.get("error"):
+        log("PROBLEM STORE WARNING", f"Reference solution failed to run: {results['error']}")
+        return []
+    return [cases[c["index"]] for c in results["cases"] if c["passed"]]
+
+
+async def _profile_reference(tests: dict, reference_solution: str, language: str):
+    """Profiles the reference once; keeps the generator only if the reference runs on it."""
+    profile = await profile_submission(reference_solution, language, tests["function_name"],
+                                       tests["input_generator"])
+    if profile.get("error") and not profile.get("samples"):
+        log("PROBLEM STORE WARNING", f"Input generator rejected: {profile['error']}")
+        tests["input_generator"] = None
+        return
+    tests["reference_complexity"] = profile["estimated_complexity"]
+
+
+async def store_problem(problem: dict, reference_solution: str, function_name: str,
+                        test_cases: List[dict], input_generator: str = "") -> str:
+    """Validates the generated suite and stores the problem. Returns its problem_id."""
+    valid_cases = await validate_test_suite(reference_solution, problem["language"], function_name, test_cases)
+    tests = None
+    if len(valid_cases) >= MIN_VALID_CASES:
+        tests = {
+            "function_name": function_name,
+            "cases": valid_cases,
+            "input_generator": input_generator or None,
+            "reference_complexity": None
+        }
+        if input_generator:
+            task = asyncio.create_task(_profile_reference(tests, reference_solution, problem["language"]))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+    else:
+        log("PROBLEM STORE WARNING", f"Only {len(valid_cases)} of {len(test_cases)} generated tests validated; "
+                                     f"'{problem['title']}' will fall back to LLM evaluation.")
+
+    problem_id = str(uuid.uuid4())
+    PROBLEM_STORE[problem_id] = {**problem, "tests": tests}
+    if len(PROBLEM_STORE) > MAX_STORED_PROBLEMS:
+        PROBLEM_STORE.popitem(last=False)
+    return problem_id
+
+
+def get_problem_tests(problem_id: Optional[str]) -> Optional[dict]:
+    """
+    Hidden test suite for a stored problem or None:
+    {"function_name", "cases", "input_generator", "reference_complexity"}
+    """
+    if not problem_id or problem_id not in PROBLEM_STORE:
+        return None
+    PROBLEM_STORE.move_to_end(problem_id)
+    return PROBLEM_STORE[problem_id]["tests"]
@@ -0,0 +1,73 @@
+"""
+Component Registry — lazily built, process-wide singletons (LLM clients, YOLO model).
+
+Heavy imports and model loads happen on first use or in a background warm-up after startup,
+never at module import, so workers come up fast and every module shares one instance.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+import metrics
+
+COMPONENT_BUILD_SECONDS = metrics.Gauge("component_build_seconds", "Time taken to build a shared component.",
+                                        ("component",))
+
+
+class ComponentRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Returns the component, building it on first use. Failed builds are cached as None."""
+        if name in self._instances:
+            return self._instances[name]
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                try:
+                    self._instances[name] = self._factories[name]()
+                except Exception as e:
+                    metrics.log("REGISTRY WARNING", f"Could not build {name}: {e}")
+                    self._errors[name] = str(e)
+                    self._instances[name] = None
+                self._build_seconds[name] = time.perf_counter() - start
+                COMPONENT_BUILD_SECONDS.set(round(self._build_seconds[name], 4), component=name)
+        return self._instances[name]
+
+    async def aget(self, name: str) -> Any:
+        """Like get(), but builds off the event loop."""
+        if name in self._instances:
+            return self._instances[name]
+        return await asyncio.to_thread(self.get, name)
+
+    def warm_up(self, names: Iterable[str]) -> asyncio.Task:
+        """Builds the given components in the background, one after another."""
+        async def _warm():
+            for name in names:
+                await self.aget(name)
+        return asyncio.create_task(_warm())
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "built": name in self._instances,
+                "available": self._instances.get(name) is not None,
+                "build_seconds": round(self._build_seconds.get(name, 0.0), 4),
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+components = ComponentRegistry()
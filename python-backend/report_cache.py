@@ -0,0 +1,149 @@
+"""
+Report Pre-Aggregation — speculatively builds the final interview report in the background.
+
+Every time an evaluator result, test profile, similarity check or proctor/browser warning
+lands, the session's draft report is invalidated and a refresh is scheduled. By the time the candidate clicks "end", /api/end-session can
+usually return the cached draft (or await the one already in flight) instead of
+blocking on a full Aggregator call.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Optional, Tuple, Dict, Any
+
+from agents.aggregator_agent import call_aggregator_agent, AGGREGATOR_FALLBACK_SUMMARY
+from metrics import log
+
+# Evaluator results tend to land in bursts (comm + reasoning per chat turn),
+# so wait briefly before rebuilding to coalesce them into one Aggregator call.
+DRAFT_DEBOUNCE_SECONDS = 2.0
+
+
+def _profile_summary(profile: Optional[dict]) -> dict:
+    """The Aggregator only needs the headline numbers, not every sample."""
+    if not profile:
+        return {}
+    return {k: v for k, v in profile.items() if k != "samples"}
+
+
+def _similarity_summary(similarity: Optional[dict]) -> dict:
+    if not similarity:
+        return {}
+    return {
+        "max_similarity": similarity["max_similarity"],
+        "problem_typical_similarity": similarity.get("problem_typical_similarity"),
+        "prior_submissions": similarity.get("problem_submissions", 0),
+        "closest_matches": [m["similarity"] for m in similarity.get("matches", [])],
+        **({"note": similarity["note"]} if similarity.get("note") else {}),
+    }
+
+
+def build_aggregator_payload(session: dict) -> dict:
+    """Snapshot of everything the Aggregator Agent needs for this session."""
+    proctor = session.get("proctor_agent")
+    return {
+        "code_judge": session["evaluations"]["code_judge"] or {},
+        "communication_eval": session["evaluations"]["comm_eval"] or {},
+        "reasoning_eval": session["evaluations"]["reasoning_eval"] or {},
+        "complexity_profile": _profile_summary(session.get("complexity_profile")),
+        "proctor_warnings": list(proctor.get_warnings()) if proctor else [],
+        "browser_warnings": list(session["browser_warnings"]),
+        "code_similarity": _similarity_summary(session.get("code_similarity")),
+        "session_summary": f"Interview complete for {session['candidate']['name']} on {session['candidate']['interview_topic']}."
+    }
+
+
+def _fingerprint(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ReportPrecomputer:
+    """Keeps a draft report for one session up to date with the latest evaluator data."""
+
+    def __init__(self, session: dict):
+        self.session = session
+        self.data_version = 0          # bumped on every new evaluator result
+        self.drafts_built = 0
+        self._draft: Optional[Dict[str, Any]] = None   # {"fingerprint", "report", "built_at"}
+        self._inflight_fingerprint: Optional[str] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def invalidate(self):
+        """Called whenever new evaluator data lands; schedules a background rebuild."""
+        if self._closed:
+            return
+        self.data_version += 1
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while not self._closed:
+            await asyncio.sleep(DRAFT_DEBOUNCE_SECONDS)
+            version = self.data_version
+            payload = build_aggregator_payload(self.session)
+            fingerprint = _fingerprint(payload)
+            if self._draft is None or self._draft["fingerprint"] != fingerprint:
+                try:
+                    await self._build(payload, fingerprint)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log("REPORT CACHE WARNING", f"Draft refresh failed: {e}")
+            # Stop once no new data arrived while we were building
+            if version == self.data_version:
+                return
+
+    async def _build(self, payload: dict, fingerprint: str) -> dict:
+        self._inflight_fingerprint = fingerprint
+        self._inflight = asyncio.ensure_future(call_aggregator_agent(payload))
+        try:
+            report = await self._inflight
+        finally:
+            self._inflight = None
+            self._inflight_fingerprint = None
+        # Never cache the Aggregator's error fallback as a draft
+        if report.get("summary") != AGGREGATOR_FALLBACK_SUMMARY:
+            self._draft = {"fingerprint": fingerprint, "report": report, "built_at": time.time()}
+            self.drafts_built += 1
+        return report
+
+    async def finalize(self) -> Tuple[dict, Dict[str, Any]]:
+        """
+        Returns the final report plus a freshness descriptor.
+        Uses the cached draft when it matches the current data, awaits the in-flight
+        build when that one does, and only otherwise runs a fresh Aggregator call.
+        """
+        self._closed = True
+        payload = build_aggregator_payload(self.session)
+        fingerprint = _fingerprint(payload)
+
+        if self._draft and self._draft["fingerprint"] == fingerprint:
+            source = "cached"
+            report = self._draft["report"]
+        elif self._inflight is not None and self._inflight_fingerprint == fingerprint:
+            source = "in_flight"
+            report = await asyncio.shield(self._inflight)
+        else:
+            source = "recomputed"
+            if self._loop_task and not self._loop_task.done():
+                self._loop_task.cancel()
+            report = await call_aggregator_agent(payload)
+
+        if self._loop_task and not self._loop_task.done():
+            self._loop_task.cancel()
+
+        draft_age = None
+        if source == "cached":
+            draft_age = round(time.time() - self._draft["built_at"], 3)
+
+        freshness = {
+            "source": source,
+            "draft_age_seconds": draft_age,
+            "data_version": self.data_version,
+            "drafts_built": self.drafts_built
+        }
+        return report, freshness
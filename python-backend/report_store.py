@@ -0,0 +1,143 @@
+"""
+Report Store — persisted final interview reports and cursor-paginated reads over them.
+
+Reports are written once per session (idempotent upsert keyed by session id) with the fields
+the hiring team filters on flattened to the top level, so exports can use indexes and
+projections instead of loading whole documents. `created_at` is the first save and never
+moves, so a re-save keeps its place in the export order and its analytics day; `updated_at`
+is the latest save.
+"""
+
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from agents.aggregator_agent import AGGREGATOR_FALLBACK_SUMMARY
+from analytics import SUMMARIES_LOCK, agent_scores, counted_entry, previously_counted, record_report
+from database import db
+import metrics
+
+EXPORT_PAGE_SIZE = 500
+
+# Flat columns, in CSV order
+REPORT_COLUMNS = [
+    "session_id", "created_at", "candidate_name", "role", "difficulty", "topic", "experience_years",
+    "performance_level", "final_score_percent", "integrity_score", "technical_correctness",
+    "problem_solving", "reasoning", "code_quality", "communication", "summary",
+]
+SCORE_FIELDS = ["integrity_score", "technical_correctness", "problem_solving", "reasoning",
+                "code_quality", "communication"]
+
+
+def build_report_document(session_id: str, session: dict, report: dict,
+                          created_at: Optional[datetime] = None) -> dict:
+    candidate = session.get("candidate", {})
+    scores = report.get("scores") or {}
+    now = datetime.now(timezone.utc)
+    document = {
+        "_id": session_id,
+        "created_at": created_at or now,
+        "updated_at": now,
+        "candidate_name": candidate.get("name"),
+        "role": candidate.get("role"),
+        "difficulty": candidate.get("difficulty_level"),
+        "topic": candidate.get("interview_topic"),
+        "experience_years": candidate.get("experience_years"),
+        "performance_level": report.get("performance_level"),
+        "final_score_percent": scores.get("final_score_percent"),
+        "scores": scores,
+        "agent_scores": agent_scores(session.get("evaluations") or {}),
+        "summary": report.get("summary"),
+        "aggregation_failed": report.get("summary") == AGGREGATOR_FALLBACK_SUMMARY,
+        "report": report,
+    }
+    # What this save contributes to the analytics summaries
+    document["counted"] = counted_entry(document)
+    return document
+
+
+async def save_report(session_id: str, session: dict, report: dict) -> Optional[dict]:
+    """
+    Persists the final report and moves the analytics summaries from what an earlier save of
+    this session contributed (if any) to what this one does. Returns the stored document, or
+    None if the write failed.
+    """
+    async with SUMMARIES_LOCK:
+        try:
+            existing = await db.interview_reports.find_one({"_id": session_id}, {"created_at": 1})
+            # A re-save counts towards the day the report was first saved on
+            document = build_report_document(session_id, session, report, existing and existing.get("created_at"))
+            fields = {key: value for key, value in document.items() if key not in ("_id", "created_at")}
+            previous = await db.interview_reports.find_one_and_update(
+                {"_id": session_id},
+                {"$set": fields, "$setOnInsert": {"created_at": document["created_at"]}},
+                projection={"report": 0}, upsert=True,
+            )
+        except Exception as e:
+            metrics.log("REPORT STORE ERROR", f"Could not persist report for {session_id}: {e}")
+            return None
+        await record_report(session_id, previously_counted(previous), document["counted"])
+    return document
+
+
+def build_report_query(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                       role: Optional[str] = None, difficulty: Optional[str] = None,
+                       performance_level: Optional[str] = None) -> dict:
+    query = {"aggregation_failed": {"$ne": True}}
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lt"] = date_to
+    if role:
+        query["role"] = role
+    if difficulty:
+        query["difficulty"] = difficulty
+    if performance_level:
+        query["performance_level"] = performance_level
+    return query
+
+
+async def iter_reports(query: dict, projection: Optional[dict] = None, limit: Optional[int] = None,
+                       page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[dict]:
+    """
+    Yields matching reports oldest first, one page at a time using keyset pagination on
+    (created_at, _id), so no page re-scans what earlier pages already returned and only one
+    page is ever held in memory.
+    """
+    if projection and any(projection.values()):
+        # An inclusion projection must still return the pagination keys
+        projection = {**projection, "created_at": 1}
+    last_created, last_id, yielded = None, None, 0
+    while True:
+        page_query = dict(query)
+        if last_created is not None:
+            after = {"$or": [
+                {"created_at": {"$gt": last_created}},
+                {"created_at": last_created, "_id": {"$gt": last_id}},
+            ]}
+            page_query = {"$and": [query, after]}
+        batch = page_size if limit is None else min(page_size, limit - yielded)
+        if batch <= 0:
+            return
+        cursor = db.interview_reports.find(page_query, projection).sort([("created_at", 1), ("_id", 1)]).limit(batch)
+        count = 0
+        async for document in cursor:
+            count += 1
+            yielded += 1
+            last_created, last_id = document["created_at"], document["_id"]
+            yield document
+        if count < batch:
+            return
+
+
+def flatten_report(document: dict) -> dict:
+    """One CSV row per report."""
+    scores = document.get("scores") or {}
+    row = {column: document.get(column) for column in REPORT_COLUMNS}
+    row["session_id"] = document["_id"]
+    for field in SCORE_FIELDS:
+        row[field] = scores.get(field)
+    if isinstance(row["created_at"], datetime):
+        row["created_at"] = row["created_at"].isoformat()
+    return row
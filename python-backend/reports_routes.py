@@ -0,0 +1,119 @@
+"""
+Reports Routes — FastAPI router for the hiring team: report exports and cohort analytics.
+
+Every route requires the X-Admin-Token header to match ANALYTICS_ADMIN_TOKEN.
+"""
+
+import csv
+import io
+import json
+import os
+import secrets
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from report_store import REPORT_COLUMNS, build_report_query, iter_reports, flatten_report
+from analytics import DIMENSIONS, get_dimension, rebuild_summaries
+
+# Required in X-Admin-Token for every route here (they expose candidate data); unset disables them
+ANALYTICS_ADMIN_TOKEN = os.getenv("ANALYTICS_ADMIN_TOKEN", "")
+
+# Only what each format needs is read from Mongo
+CSV_PROJECTION = {column: 1 for column in REPORT_COLUMNS if column != "session_id"}
+CSV_PROJECTION["scores"] = 1
+NDJSON_PROJECTION = {"aggregation_failed": 0, "counted": 0}
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if not ANALYTICS_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Reports and analytics are disabled (ANALYTICS_ADMIN_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ANALYTICS_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def _ndjson_rows(query: dict, limit: Optional[int], include_full_report: bool):
+    projection = dict(NDJSON_PROJECTION)
+    if not include_full_report:
+        projection["report"] = 0
+    async for document in iter_reports(query, projection, limit=limit):
+        document["session_id"] = document.pop("_id")
+        yield json.dumps(document, default=_json_default) + "\n"
+
+
+async def _csv_rows(query: dict, limit: Optional[int]):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    async for document in iter_reports(query, CSV_PROJECTION, limit=limit):
+        writer.writerow(flatten_report(document))
+        # Hand each row to the client as soon as it's read instead of building the file
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/api/reports/export")
+async def export_reports(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    role: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    performance_level: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    include_full_report: bool = True,
+):
+    """
+    Streams persisted interview reports, oldest first, as NDJSON or CSV.
+    Filters: created_at range (ISO dates), role, difficulty, performance_level.
+    """
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    query = build_report_query(date_from, date_to, role, difficulty, performance_level)
+
+    if format == "csv":
+        return StreamingResponse(
+            _csv_rows(query, limit), media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=interview_reports.csv"}
+        )
+    return StreamingResponse(
+        _ndjson_rows(query, limit, include_full_report), media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=interview_reports.ndjson"}
+    )
+
+
+# ─── Cohort Analytics ─────────────────────────────────────────────────────
+
+@router.get("/api/analytics/dashboard")
+async def analytics_dashboard(dimensions: List[str] = Query(["overall", "role", "difficulty", "topic"]),
+                              days: int = Query(30, ge=1, le=366)):
+    """
+    Cohort averages, integrity distributions and agent score trends, read from the
+    pre-aggregated summaries (cost scales with the number of groups, not sessions).
+    """
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dimensions: {unknown}")
+    dashboard = {dimension: await get_dimension(dimension) for dimension in dimensions if dimension != "day"}
+    dashboard["trend"] = await get_dimension("day", limit=days)
+    return dashboard
+
+
+@router.post("/api/analytics/rebuild")
+async def analytics_rebuild():
+    """Recomputes all summaries from the persisted reports."""
+    return {"reports_processed": await rebuild_summaries()}
@@ -0,0 +1,383 @@
+"""
+Sandbox — local, isolated execution of candidate code against test cases.
+
+Every submission runs in its own interpreter process (Python or Node) with CPU,
+memory and file-size limits and a wall-clock deadline. Interpreters are pre-spawned
+into a small warm pool so the request path never pays interpreter start-up; a worker
+serves exactly one submission and is then discarded, so no state leaks between
+candidates. Worker harnesses live in `sandbox_workers/`.
+
+Candidate code shares its process with the worker harness and can write anything to its
+stdout, so workers only report raw outputs: expected values never leave this process, and
+outputs are compared here.
+
+Isolation beyond the limits and an empty temporary working directory is configured per
+deployment:
+- SANDBOX_NETWORK_ISOLATION (auto|1|0) runs workers in their own network namespace via
+  `unshare -rn`, so candidate code has no network. "auto" falls back, with a warning, to
+  running with the server's network where user namespaces aren't available; "1" refuses to
+  run code instead.
+- SANDBOX_USER runs workers as that (unprivileged) user. Without it candidate code can read
+  every file the server can, `.env` and the server source included, and what it prints ends
+  up in LLM prompts. Switching users needs the server to run as root, and sandbox_workers/
+  and the interpreters must be readable by that user.
+Limits are applied with the `prlimit` command the worker is exec'd through (or, without it,
+with prlimit(2) on the worker's PID before any job is sent to it) rather than in a preexec_fn,
+which isn't safe in a multi-threaded server.
+"""
+
+import asyncio
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import resource  # POSIX only
+    import pwd
+except ImportError:
+    resource = pwd = None
+
+import metrics
+
+WORKER_DIR = Path(__file__).parent / "sandbox_workers"
+POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "2"))
+CPU_LIMIT_SECONDS = int(os.getenv("SANDBOX_CPU_SECONDS", "10"))
+MEMORY_LIMIT_MB = int(os.getenv("SANDBOX_MEMORY_MB", "256"))
+FILE_SIZE_LIMIT_BYTES = 1024 * 1024
+CASE_TIMEOUT_SECONDS = 2.0
+SANDBOX_USER = os.getenv("SANDBOX_USER", "")
+SANDBOX_NETWORK_ISOLATION = os.getenv("SANDBOX_NETWORK_ISOLATION", "auto")
+MAX_FAILED_CASES_REPORTED = 5
+
+LANGUAGE_ALIASES = {
+    "python": "python", "python3": "python", "py": "python",
+    "javascript": "javascript", "js": "javascript", "node": "javascript",
+}
+
+
+def _worker_command(language: str) -> Optional[List[str]]:
+    if language == "python":
+        # -I: isolated mode, -S: skip site-packages, -B: no .pyc writes
+        return [sys.executable, "-I", "-S", "-B", str(WORKER_DIR / "python_worker.py")]
+    node = shutil.which("node")
+    if not node:
+        return None
+    return [node, f"--max-old-space-size={MEMORY_LIMIT_MB}", "--expose-gc", str(WORKER_DIR / "js_worker.js")]
+
+
+def _user_options() -> dict:
+    """subprocess options switching the worker to SANDBOX_USER; none when it isn't set."""
+    if not SANDBOX_USER or pwd is None:
+        return {}
+    entry = pwd.getpwnam(SANDBOX_USER)
+    return {"user": entry.pw_uid, "group": entry.pw_gid, "extra_groups": []}
+
+
+# Probed once: the command prefix, or None when isolation is required but unavailable
+_NETWORK_PREFIX: Dict[str, Optional[List[str]]] = {}
+
+
+def _network_prefix() -> Optional[List[str]]:
+    """Command prefix giving the worker its own (empty) network namespace; None if required but unavailable."""
+    if "prefix" not in _NETWORK_PREFIX:
+        _NETWORK_PREFIX["prefix"] = _probe_network_prefix()
+    return _NETWORK_PREFIX["prefix"]
+
+
+def _probe_network_prefix() -> Optional[List[str]]:
+    if SANDBOX_NETWORK_ISOLATION == "0":
+        return []
+    unshare = shutil.which("unshare")
+    prefix = [unshare, "--map-root-user", "--net"] if unshare else None
+    if prefix:
+        try:
+            probe = subprocess.run([*prefix, "true"], capture_output=True, timeout=5, **_user_options())
+            if probe.returncode != 0:
+                prefix = None
+        except (OSError, subprocess.SubprocessError):
+            prefix = None
+    if prefix is None:
+        if SANDBOX_NETWORK_ISOLATION == "1":
+            metrics.log("SANDBOX ERROR", "Network isolation is required but `unshare -rn` is unavailable")
+            return None
+        metrics.log("SANDBOX WARNING", "`unshare -rn` is unavailable; candidate code runs with network access")
+        prefix = []
+    return prefix
+
+
+def _limits(language: str) -> List[Tuple[str, int, int, int]]:
+    """(prlimit option, resource, soft, hard) for a worker of `language`."""
+    if resource is None:
+        return []
+    limits = [
+        ("--cpu", resource.RLIMIT_CPU, CPU_LIMIT_SECONDS, CPU_LIMIT_SECONDS + 1),
+        ("--fsize", resource.RLIMIT_FSIZE, FILE_SIZE_LIMIT_BYTES, FILE_SIZE_LIMIT_BYTES),
+        ("--core", resource.RLIMIT_CORE, 0, 0),
+    ]
+    # V8 reserves a large virtual address space up front, so Node is capped via
+    # --max-old-space-size instead of RLIMIT_AS.
+    if language == "python":
+        limit = MEMORY_LIMIT_MB * 1024 * 1024
+        limits.append(("--as", resource.RLIMIT_AS, limit, limit))
+    return limits
+
+
+def _limits_prefix(language: str) -> List[str]:
+    """`prlimit` lowering the worker's own limits before it execs the interpreter; [] if not installed."""
+    prlimit = shutil.which("prlimit")
+    if not prlimit:
+        return []
+    return [prlimit, *(f"{option}={soft}:{hard}" for option, _, soft, hard in _limits(language)), "--"]
+
+
+def _apply_limits(pid: int, language: str):
+    """Sets the worker's rlimits by PID. It is still waiting for its job, so no candidate code has run yet."""
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    for _, limit, soft, hard in _limits(language):
+        resource.prlimit(pid, limit, (soft, hard))
+
+
+def _kill(proc: asyncio.subprocess.Process):
+    if proc.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class _WarmPool:
+    """Keeps `size` idle, pre-started interpreters of one language ready to take a job."""
+
+    def __init__(self, language: str, command: List[str], size: int):
+        self.language = language
+        self.command = command
+        self.size = size
+        self._idle: List[Tuple[asyncio.subprocess.Process, str]] = []
+        self._refill_task: Optional[asyncio.Task] = None
+
+    async def _spawn(self) -> Tuple[asyncio.subprocess.Process, str]:
+        # The first call probes `unshare` with a blocking subprocess
+        prefix = _network_prefix() if _NETWORK_PREFIX else await asyncio.to_thread(_network_prefix)
+        if prefix is None:
+            raise RuntimeError("network isolation is required but unavailable")
+        user_options = _user_options()
+        workdir = tempfile.mkdtemp(prefix=f"sandbox_{self.language}_")
+        if user_options:
+            os.chown(workdir, user_options["user"], user_options["group"])
+        limits_prefix = _limits_prefix(self.language)
+        proc = await asyncio.create_subprocess_exec(
+            *limits_prefix, *prefix, *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=workdir,
+            env={"PATH": os.environ.get("PATH", ""), "PYTHONHASHSEED": "0"},
+            start_new_session=True,
+            **user_options,
+        )
+        try:
+            if not limits_prefix:
+                _apply_limits(proc.pid, self.language)
+        except OSError:
+            # Never hand out a worker that would run candidate code without its limits
+            _kill(proc)
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        return proc, workdir
+
+    def _schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self):
+        while len(self._idle) < self.size:
+            try:
+                self._idle.append(await self._spawn())
+            except Exception as e:
+                metrics.log("SANDBOX WARNING", f"Could not pre-spawn {self.language} worker: {e}")
+                return
+
+    async def acquire(self) -> Tuple[asyncio.subprocess.Process, str]:
+        while self._idle:
+            proc, workdir = self._idle.pop()
+            if proc.returncode is None:
+                self._schedule_refill()
+                return proc, workdir
+            shutil.rmtree(workdir, ignore_errors=True)
+        worker = await self._spawn()
+        self._schedule_refill()
+        return worker
+
+    def warm(self):
+        self._schedule_refill()
+
+
+_POOLS: Dict[str, Optional[_WarmPool]] = {}
+
+
+def _get_pool(language: str) -> Optional[_WarmPool]:
+    if language not in _POOLS:
+        command = _worker_command(language)
+        _POOLS[language] = _WarmPool(language, command, POOL_SIZE) if command else None
+    return _POOLS[language]
+
+
+def warm_pools():
+    """Pre-spawns workers for every supported language. Must be called inside the event loop."""
+    for language in set(LANGUAGE_ALIASES.values()):
+        pool = _get_pool(language)
+        if pool:
+            pool.warm()
+
+
+def _matches(actual, expected) -> bool:
+    if isinstance(actual, float) or isinstance(expected, float):
+        try:
+            return math.isclose(float(actual), float(expected), rel_tol=1e-6, abs_tol=1e-9)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(actual, list) and isinstance(expected, list):
+        return len(actual) == len(expected) and all(_matches(a, e) for a, e in zip(actual, expected))
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        return actual.keys() == expected.keys() and all(_matches(actual[k], expected[k]) for k in actual)
+    return actual == expected
+
+
+def _empty_results(total: int, error: str) -> dict:
+    return {"passed": 0, "total": total, "failed_cases": [], "runtime_ms": 0, "cases": [], "error": error}
+
+
+def _describe_failure(case: dict, entry: dict) -> str:
+    args = json.dumps(case.get("args", []))[:200]
+    if entry.get("error"):
+        return f"Case {entry['index'] + 1}: input {args} raised {entry['error']}"
+    expected = json.dumps(case.get("expected"))[:200]
+    actual = json.dumps(entry.get("output"))[:200]
+    return f"Case {entry['index'] + 1}: input {args} expected {expected}, got {actual}"
+
+
+def _valid_entries(raw: dict, total: int) -> Optional[List[dict]]:
+    """The worker's per-case entries, or None if they aren't shaped like the harness writes them."""
+    entries = raw.get("cases", [])
+    if not isinstance(entries, list):
+        return None
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return None
+        index = entry.get("index")
+        if type(index) is not int or not 0 <= index < total or index in seen:
+            return None
+        if not isinstance(entry.get("runtime_ms", 0), (int, float)) or isinstance(entry.get("runtime_ms"), bool):
+            return None
+        seen.add(index)
+    return entries
+
+
+def _summarize(raw: dict, test_cases: List[dict]) -> dict:
+    if raw.get("error") and not raw.get("cases"):
+        return _empty_results(len(test_cases), str(raw["error"]))
+    entries = _valid_entries(raw, len(test_cases))
+    if entries is None:
+        return _empty_results(len(test_cases), "Sandbox returned malformed output")
+
+    cases = []
+    failed = []
+    for entry in entries:
+        case = test_cases[entry["index"]]
+        # Anything the worker claims about passing is ignored: only the raw output counts
+        passed = not entry.get("error") and "output" in entry and _matches(entry["output"], case.get("expected"))
+        case_summary = {
+            "index": entry["index"],
+            "passed": passed,
+            "runtime_ms": round(float(entry.get("runtime_ms", 0)), 3),
+        }
+        if entry.get("error"):
+            case_summary["error"] = str(entry["error"])
+        cases.append(case_summary)
+        if not case_summary["passed"] and len(failed) < MAX_FAILED_CASES_REPORTED:
+            failed.append(_describe_failure(case, entry))
+
+    return {
+        "passed": sum(1 for c in cases if c["passed"]),
+        "total": len(test_cases),
+        "failed_cases": failed,
+        "runtime_ms": round(sum(c["runtime_ms"] for c in cases), 3),
+        "cases": cases,
+    }
+
+
+async def run_job(language: str, job: dict, wall_timeout_s: float) -> dict:
+    """
+    Sends one job to a warm worker and returns its raw JSON result.
+    Never raises for candidate-side failures; those come back as {"error": ...}.
+    """
+    lang = LANGUAGE_ALIASES.get((language or "").lower())
+    if not lang:
+        return {"cases": [], "error": f"Unsupported language '{language}'"}
+    pool = _get_pool(lang)
+    if pool is None:
+        return {"cases": [], "error": f"No {lang} runtime available on the server"}
+
+    try:
+        proc, workdir = await pool.acquire()
+    except Exception as e:
+        metrics.log("SANDBOX ERROR", f"Could not start a {lang} worker: {e}")
+        return {"cases": [], "error": "Sandbox unavailable on the server"}
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate((json.dumps(job) + "\n").encode("utf-8")),
+            timeout=wall_timeout_s
+        )
+        lines = stdout.decode("utf-8", errors="replace").strip().splitlines()
+        if not lines:
+            tail = stderr.decode("utf-8", errors="replace").strip()[-300:]
+            return {"cases": [], "error": f"Sandbox process exited with code {proc.returncode}. {tail}".strip()}
+        result = json.loads(lines[-1])
+        if not isinstance(result, dict):
+            return {"cases": [], "error": "Sandbox returned malformed output"}
+        return result
+    except asyncio.TimeoutError:
+        return {"cases": [], "error": "Time limit exceeded"}
+    except json.JSONDecodeError:
+        return {"cases": [], "error": "Sandbox returned malformed output"}
+    finally:
+        _kill(proc)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def run_tests(code: str, language: str, function_name: str, test_cases: List[dict],
+                    case_timeout_s: float = CASE_TIMEOUT_SECONDS) -> dict:
+    """
+    Runs `function_name` from the candidate's code against each test case
+    ({"args": [...], "expected": ...}) in an isolated worker.
+
+    Returns the Brain/Judge `test_results` shape:
+    {"passed", "total", "failed_cases", "runtime_ms", "cases": [{"index", "passed", "runtime_ms"}]}
+    """
+    if not test_cases:
+        return _empty_results(0, "No test cases provided")
+
+    job = {
+        "code": code,
+        "function_name": function_name,
+        # Inputs only; expected values stay in this process
+        "cases": [{"args": case.get("args", [])} for case in test_cases],
+        "case_timeout_s": case_timeout_s,
+    }
+    # Every case may use its full budget, plus loading the submission and process overhead
+    wall_timeout = case_timeout_s * (len(test_cases) + 1) + 2.0
+    raw = await run_job(language, job, wall_timeout)
+    return _summarize(raw, test_cases)
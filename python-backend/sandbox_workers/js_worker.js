@@ -0,0 +1,135 @@
+/**
+ * JavaScript sandbox worker — pre-spawned by sandbox.py and kept idle until a job arrives.
+ *
+ * Reads exactly one JSON job from stdin, evaluates the candidate's code inside a fresh
+ * `vm` context, runs it on every test case's inputs with a per-case timeout (or, in
+ * "profile" mode, times it on inputs of increasing size), writes one JSON result line
+ * with the raw outputs to stdout and exits. `vm` is not a security boundary, so expected
+ * values are never sent here; sandbox.py compares the outputs. Heap size and CPU time
+ * are limited by the parent process.
+ */
+
+const vm = require('vm');
+
+function describe(e) {
+    return String(e && e.message ? `${e.name}: ${e.message}` : e);
+}
+
+function createContext(logs) {
+    const sandbox = {
+        console: { log: (...a) => logs.push(a.join(' ')), error: (...a) => logs.push(a.join(' ')) },
+        module: { exports: {} },
+    };
+    sandbox.exports = sandbox.module.exports;
+    return vm.createContext(sandbox);
+}
+
+// Evaluates `code` in `context` and returns the named function, or throws
+function loadFunction(context, code, name, timeout) {
+    new vm.Script(code, { filename: 'candidate.js' }).runInContext(context, { timeout });
+    // Top-level const/let bindings are visible to later scripts in the same context
+    const resolver = `(typeof ${name} === 'function') ? ${name}
+        : (module.exports && typeof module.exports.${name} === 'function') ? module.exports.${name}
+        : (typeof Solution === 'function') ? (function () { const s = new Solution(); return s.${name}.bind(s); })()
+        : undefined`;
+    let fn;
+    try {
+        fn = new vm.Script(resolver).runInContext(context, { timeout });
+    } catch (e) {
+        fn = undefined;
+    }
+    if (typeof fn !== 'function') throw new Error(`Function '${name}' is not defined`);
+    return fn;
+}
+
+function runProfile(job) {
+    const timeout = Math.max(1, Math.round((job.case_timeout_s || 2) * 1000));
+    const context = createContext([]);
+    const result = { samples: [] };
+    try {
+        context.__fn = loadFunction(context, job.code, job.function_name, timeout);
+        context.__make = loadFunction(createContext([]), job.generator, 'make_input', timeout);
+    } catch (e) {
+        result.error = describe(e);
+        return result;
+    }
+
+    const call = new vm.Script('__fn(...__args)');
+    for (const n of job.sizes) {
+        try {
+            const payload = JSON.stringify(context.__make(n));
+            let best = Infinity;
+            for (let i = 0; i < (job.repeats || 3); i++) {
+                context.__args = JSON.parse(payload);
+                const start = process.hrtime.bigint();
+                call.runInContext(context, { timeout });
+                best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e6);
+            }
+            // Approximate peak memory as the heap growth across one extra call
+            context.__args = JSON.parse(payload);
+            if (global.gc) global.gc();
+            const before = process.memoryUsage().heapUsed;
+            call.runInContext(context, { timeout });
+            const peak = Math.max(0, process.memoryUsage().heapUsed - before);
+            result.samples.push({ n, runtime_ms: best, peak_memory_kb: Math.round(peak / 102.4) / 10 });
+        } catch (e) {
+            if (e && e.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+                result.stopped_at = n;
+            } else {
+                result.error = `${describe(e)} at n=${n}`;
+            }
+            break;
+        }
+    }
+    return result;
+}
+
+function runJob(job) {
+    const timeout = Math.max(1, Math.round((job.case_timeout_s || 2) * 1000));
+    const logs = [];
+    const context = createContext(logs);
+    const result = { cases: [] };
+
+    try {
+        context.__fn = loadFunction(context, job.code, job.function_name, timeout);
+    } catch (e) {
+        result.error = describe(e);
+        return result;
+    }
+
+    const call = new vm.Script('__fn(...__args)');
+    job.cases.forEach((testCase, index) => {
+        const entry = { index };
+        context.__args = JSON.parse(JSON.stringify(testCase.args || []));
+        const start = process.hrtime.bigint();
+        try {
+            const actual = JSON.parse(JSON.stringify(call.runInContext(context, { timeout }) ?? null));
+            entry.runtime_ms = Number(process.hrtime.bigint() - start) / 1e6;
+            entry.output = actual;
+        } catch (e) {
+            entry.runtime_ms = Number(process.hrtime.bigint() - start) / 1e6;
+            entry.error = e && e.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT' ? 'Time limit exceeded' : describe(e);
+        }
+        result.cases.push(entry);
+    });
+
+    result.stdout = logs.join('\n').slice(-2000);
+    return result;
+}
+
+let input = '';
+process.stdin.setEncoding('utf8');
+process.stdin.on('data', chunk => {
+    input += chunk;
+    const newline = input.indexOf('\n');
+    if (newline === -1) return;
+    process.stdin.pause();
+    let result;
+    try {
+        const job = JSON.parse(input.slice(0, newline));
+        result = job.mode === 'profile' ? runProfile(job) : runJob(job);
+    } catch (e) {
+        result = { cases: [], error: String(e) };
+    }
+    process.stdout.write(JSON.stringify(result) + '\n', () => process.exit(0));
+});
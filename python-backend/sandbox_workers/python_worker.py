@@ -0,0 +1,170 @@
+"""
+Python sandbox worker — pre-spawned by sandbox.py and kept idle until a job arrives.
+
+Reads exactly one JSON job from stdin, runs the candidate's code on every test case's
+inputs with a per-case timer (or, in "profile" mode, on inputs of increasing size),
+writes one JSON result line with the raw outputs to the original stdout and exits.
+Expected values are never sent here; sandbox.py compares the outputs.
+Resource limits (CPU, memory, file size) are applied by the parent before the job is sent.
+"""
+
+import sys
+import io
+import json
+import time
+import signal
+import contextlib
+import tracemalloc
+
+
+class CaseTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise CaseTimeout()
+
+
+def _normalize(value):
+    """Round-trip through JSON so tuples/sets compare like the expected JSON values."""
+    return json.loads(json.dumps(value, default=lambda o: sorted(o) if isinstance(o, (set, frozenset)) else list(o)))
+
+
+def _resolve_function(namespace, function_name):
+    fn = namespace.get(function_name)
+    if callable(fn):
+        return fn
+    # LeetCode-style `class Solution: def twoSum(self, ...)`
+    solution_cls = namespace.get("Solution")
+    if solution_cls is not None:
+        return getattr(solution_cls(), function_name, None)
+    return None
+
+
+def run_job(job):
+    case_timeout = float(job.get("case_timeout_s", 2.0))
+    captured = io.StringIO()
+    namespace = {"__name__": "__candidate__"}
+    result = {"cases": []}
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        with contextlib.redirect_stdout(captured):
+            signal.setitimer(signal.ITIMER_REAL, case_timeout)
+            try:
+                exec(compile(job["code"], "<candidate>", "exec"), namespace)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except CaseTimeout:
+        result["error"] = "Timed out while loading the submission"
+        return result
+    except BaseException as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    fn = _resolve_function(namespace, job["function_name"])
+    if fn is None:
+        result["error"] = f"Function '{job['function_name']}' is not defined"
+        return result
+
+    for index, case in enumerate(job["cases"]):
+        args = json.loads(json.dumps(case.get("args", [])))  # fresh copy, the candidate may mutate it
+        entry = {"index": index}
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(captured):
+                signal.setitimer(signal.ITIMER_REAL, case_timeout)
+                try:
+                    actual = fn(*args)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            entry["runtime_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            entry["output"] = _normalize(actual)
+        except CaseTimeout:
+            entry["runtime_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            entry["error"] = "Time limit exceeded"
+        except BaseException as e:
+            entry["runtime_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            entry["error"] = f"{type(e).__name__}: {e}"
+        result["cases"].append(entry)
+
+    result["stdout"] = captured.getvalue()[-2000:]
+    return result
+
+
+def _load(code, captured, timeout):
+    namespace = {"__name__": "__candidate__"}
+    with contextlib.redirect_stdout(captured):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            exec(compile(code, "<candidate>", "exec"), namespace)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return namespace
+
+
+def run_profile(job):
+    """Times the function on generator inputs of increasing size and records peak memory."""
+    size_timeout = float(job.get("case_timeout_s", 2.0))
+    captured = io.StringIO()
+    result = {"samples": []}
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        fn = _resolve_function(_load(job["code"], captured, size_timeout), job["function_name"])
+        make_input = _load(job["generator"], captured, size_timeout).get("make_input")
+    except BaseException as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    if fn is None or make_input is None:
+        result["error"] = "Function or input generator is not defined"
+        return result
+
+    for n in job["sizes"]:
+        try:
+            with contextlib.redirect_stdout(captured):
+                signal.setitimer(signal.ITIMER_REAL, size_timeout)
+                try:
+                    payload = json.dumps(make_input(n))
+                    best = None
+                    for _ in range(int(job.get("repeats", 3))):
+                        args = json.loads(payload)
+                        start = time.perf_counter()
+                        fn(*args)
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    # Separate run for memory: tracemalloc slows execution and would skew timings
+                    args = json.loads(payload)
+                    tracemalloc.start()
+                    fn(*args)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        except CaseTimeout:
+            tracemalloc.stop()
+            result["stopped_at"] = n
+            break
+        except BaseException as e:
+            tracemalloc.stop()
+            result["error"] = f"{type(e).__name__} at n={n}: {e}"
+            break
+        result["samples"].append({"n": n, "runtime_ms": round(best * 1000, 4), "peak_memory_kb": round(peak / 1024, 1)})
+
+    return result
+
+
+def main():
+    real_stdout = sys.stdout
+    job = json.loads(sys.stdin.readline())
+    sys.stdin = io.StringIO("")
+    try:
+        result = run_profile(job) if job.get("mode") == "profile" else run_job(job)
+    except BaseException as e:
+        result = {"cases": [], "error": f"{type(e).__name__}: {e}"}
+    real_stdout.write(json.dumps(result, default=repr) + "\n")
+    real_stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
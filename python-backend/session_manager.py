@@ -0,0 +1,156 @@
+"""
+Session Manager — lifecycle of in-memory interview sessions.
+
+Owns SESSION_STORE. Tracks last activity per session, archives ended sessions to compact
+gzipped JSON on disk, and runs a background sweeper that evicts ended sessions after a
+short grace period and abandoned (idle) sessions after a TTL, stopping their proctor loop
+so the camera and the buffered evidence frames are released.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List
+
+from event_log import event_log
+import metrics
+
+# In production, this would be a MongoDB collection
+SESSION_STORE: Dict[str, Dict[str, Any]] = {}
+
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+# Ended sessions stay briefly so the interviewer dashboard can still show the final state
+ENDED_SESSION_GRACE_SECONDS = float(os.getenv("ENDED_SESSION_GRACE_SECONDS", "120"))
+SWEEP_INTERVAL_SECONDS = 60.0
+ARCHIVE_DIR = Path(os.getenv("SESSION_ARCHIVE_DIR", Path(__file__).parent / "session_archive"))
+
+# Fields that are runtime machinery rather than interview data
+_NON_ARCHIVED_FIELDS = {"proctor_agent", "report_precomputer"}
+
+
+def touch(session: dict):
+    """Marks activity on a session; call from every endpoint that serves it."""
+    session["last_activity"] = time.time()
+
+
+def _archive_record(session_id: str, session: dict, status: str) -> dict:
+    record = {k: v for k, v in session.items() if k not in _NON_ARCHIVED_FIELDS}
+    proctor = session.get("proctor_agent")
+    record["proctor_warnings"] = list(proctor.get_warnings()) if proctor else []
+    record["session_id"] = session_id
+    record["status"] = status
+    record["archived_at"] = time.time()
+    return record
+
+
+def _write_archive(record: dict) -> Path:
+    day = datetime.fromtimestamp(record["archived_at"], tz=timezone.utc).strftime("%Y-%m-%d")
+    path = ARCHIVE_DIR / day / f"{record['session_id']}.json.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(record, f, separators=(",", ":"), default=str)
+    return path
+
+
+async def archive_session(session_id: str, session: dict, status: str):
+    """Writes the session's interview data to the archive off the event loop."""
+    record = _archive_record(session_id, session, status)
+    try:
+        path = await asyncio.to_thread(_write_archive, record)
+        session["archive_path"] = str(path)
+    except Exception as e:
+        metrics.log("SESSION ARCHIVE ERROR", f"Could not archive {session_id}: {e}")
+
+
+def release_resources(session: dict):
+    """Stops the proctor loop and drops the cached camera frames."""
+    proctor = session.get("proctor_agent")
+    if proctor:
+        proctor.stop_monitoring()
+
+
+async def mark_ended(session_id: str, session: dict, report: dict):
+    """Called when /api/end-session completes: archive now, evict after the grace period."""
+    session["ended_at"] = time.time()
+    session["final_report"] = report
+    release_resources(session)
+    await archive_session(session_id, session, status="ended")
+
+
+async def evict(session_id: str, reason: str):
+    session = SESSION_STORE.pop(session_id, None)
+    if session is None:
+        return
+    release_resources(session)
+    if reason == "idle" and "archive_path" not in session:
+        event_log.append(session_id, "session_abandoned", {"idle_seconds": time.time() - session.get("last_activity", 0)})
+        await archive_session(session_id, session, status="abandoned")
+    metrics.SESSIONS_ACTIVE.set(len(SESSION_STORE))
+    metrics.log("SESSION MANAGER", f"Evicted session {session_id} ({reason})")
+
+
+async def sweep_once(now: float = None):
+    now = now or time.time()
+    for session_id, session in list(SESSION_STORE.items()):
+        ended_at = session.get("ended_at")
+        if ended_at and now - ended_at > ENDED_SESSION_GRACE_SECONDS:
+            await evict(session_id, "ended")
+        elif not ended_at and now - session.get("last_activity", now) > SESSION_IDLE_TTL_SECONDS:
+            await evict(session_id, "idle")
+
+
+async def run_sweeper():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            await sweep_once()
+        except Exception as e:
+            metrics.log("SESSION MANAGER ERROR", f"Sweep failed: {e}")
+
+
+# ─── Memory Footprint ─────────────────────────────────────────────────────
+
+def _deep_size(obj, seen: set) -> int:
+    if id(obj) in seen or isinstance(obj, (asyncio.Future, asyncio.AbstractEventLoop, type)):
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)   # numpy arrays (camera frames)
+    if isinstance(nbytes, int):
+        return sys.getsizeof(obj) + (0 if getattr(obj, "base", None) is not None else nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, (str, bytes)):
+        size += _deep_size(vars(obj), seen)
+    return size
+
+
+def memory_report() -> dict:
+    """Approximate bytes retained per session, largest first."""
+    sessions: List[dict] = []
+    now = time.time()
+    for session_id, session in list(SESSION_STORE.items()):
+        proctor = session.get("proctor_agent")
+        recorder = getattr(proctor, "recorder", None)
+        sessions.append({
+            "session_id": session_id,
+            "total_bytes": _deep_size(session, set()),
+            "frame_bytes": sum(len(jpeg) for _, jpeg in list(recorder.ring)) if recorder else 0,
+            "transcript_turns": len(session.get("transcripts", [])),
+            "idle_seconds": round(now - session.get("last_activity", now), 1),
+            "ended": bool(session.get("ended_at")),
+        })
+    sessions.sort(key=lambda s: s["total_bytes"], reverse=True)
+    return {
+        "session_count": len(sessions),
+        "total_bytes": sum(s["total_bytes"] for s in sessions),
+        "sessions": sessions,
+    }
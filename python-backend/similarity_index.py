@@ -0,0 +1,306 @@
+"""
+Similarity Index — near-duplicate detection for code submissions, per problem.
+
+Every /api/submit-code submission is normalized to a token stream (comments dropped,
+identifiers, numbers and strings replaced by placeholders, so renaming variables doesn't
+hide a copy), cut into overlapping k-token shingles and reduced to a MinHash signature.
+Signatures are banded into an LSH table per problem, so "nearest prior submissions" only
+compares against submissions that collide in at least one band instead of every prior one.
+
+Signatures are persisted in `code_signatures` and loaded back at start-up, each with the
+best match it had when it was checked, so the per-problem typical similarity survives too.
+
+In memory a signature is an array('Q') (1 KB instead of ~5 KB as a list of ints). The number
+of indexed submissions is derived from SIMILARITY_INDEX_MEMORY_MB; past it, the oldest
+submissions of the least recently checked problems are dropped first.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from database import db
+import metrics
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs above ~0.45 Jaccard almost always collide in some band
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Very short solutions converge naturally; too few shingles to say anything
+MIN_SHINGLES = 20
+FLAG_SIMILARITY = 0.8
+MAX_MATCHES = 5
+# Only the prior submissions sharing the most bands get a full signature comparison
+MAX_CANDIDATES = 200
+# Retained bytes per indexed submission (signature, LSH bucket slots, entry), measured with tracemalloc
+ENTRY_BYTES = 4096
+SIMILARITY_INDEX_MEMORY_MB = int(os.getenv("SIMILARITY_INDEX_MEMORY_MB", "256"))
+MAX_INDEXED_SUBMISSIONS = SIMILARITY_INDEX_MEMORY_MB * 1024 * 1024 // ENTRY_BYTES
+MAX_SUBMISSIONS_PER_PROBLEM = min(20000, MAX_INDEXED_SUBMISSIONS)
+MAX_PROBLEMS = 1000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed so persisted signatures stay comparable across restarts
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+
+SIMILARITY_CHECKS = metrics.Counter("similarity_checks_total", "Submissions checked against the similarity index.",
+                                    ("flagged",))
+SIMILARITY_CANDIDATES = metrics.Histogram("similarity_lsh_candidates", "Prior submissions compared per check.",
+                                          buckets=(0, 1, 5, 10, 50, 100, 500, 1000))
+
+# Strings are matched (and kept) before comment markers, which depend on the language:
+# `//` is floor division in Python
+_STRING_PATTERN = r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"
+_HASH_COMMENT_RE = re.compile(rf"\"\"\".*?\"\"\"|'''.*?'''|({_STRING_PATTERN})|#[^\n]*", re.S)
+_C_COMMENT_RE = re.compile(rf"({_STRING_PATTERN}|`(?:\\.|[^`\\])*`)|//[^\n]*|/\*.*?\*/", re.S)
+COMMENT_RES = {
+    **dict.fromkeys(("python", "python3", "py", "ruby", "rb"), _HASH_COMMENT_RE),
+    **dict.fromkeys(("javascript", "js", "node", "typescript", "ts", "java", "c", "cpp", "c++", "csharp", "c#",
+                     "go", "golang", "kotlin", "swift", "rust", "scala"), _C_COMMENT_RE),
+}
+_TOKEN_RE = re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|[A-Za-z_]\w*|\d+(?:\.\d+)?|==|!=|<=|>=|&&|\|\||\+\+|--|->|\S")
+KEYWORDS = frozenset("""
+    and as assert break case catch class const continue def default del do elif else except false
+    final finally for foreach from function if import in is lambda let new none not null or pass
+    private public raise return static struct switch this throw true try var void while with yield
+    int long float double bool boolean char string auto vector map set list dict len range
+    append push pop sort sorted min max abs print enumerate zip
+""".split())
+
+
+def strip_comments(code: str, language: str) -> str:
+    """Drops comments (and Python docstrings) for known languages; others are left as is."""
+    pattern = COMMENT_RES.get((language or "").lower())
+    if pattern is None:
+        return code or ""
+    return pattern.sub(lambda m: m.group(1) or " ", code or "")
+
+
+def normalize_tokens(code: str, language: str = "python") -> List[str]:
+    """Comment-free token stream with names and literals abstracted away."""
+    tokens = []
+    for token in _TOKEN_RE.findall(strip_comments(code, language)):
+        if token[0] in "\"'":
+            tokens.append("STR")
+        elif token[0].isdigit():
+            tokens.append("NUM")
+        elif token[0].isalpha() or token[0] == "_":
+            lowered = token.lower()
+            tokens.append(lowered if lowered in KEYWORDS else "ID")
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def shingles(tokens: List[str]) -> set:
+    grams = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 0))}
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams}
+
+
+def minhash(shingle_hashes: set) -> List[int]:
+    if not shingle_hashes:
+        return [_MERSENNE_PRIME] * NUM_PERMUTATIONS
+    return [min((a * x + b) % _MERSENNE_PRIME for x in shingle_hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERMUTATIONS
+
+
+def signature_for(code: str, language: str = "python") -> dict:
+    """CPU-bound; callers on the event loop run this in a thread."""
+    shingle_hashes = shingles(normalize_tokens(code, language))
+    return {"signature": minhash(shingle_hashes), "shingles": len(shingle_hashes)}
+
+
+def _pack(signature) -> bytes:
+    """Persisted form of a signature: little-endian uint64s."""
+    packed = array("Q", signature)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(stored) -> array:
+    """In-memory form of a persisted signature; ones stored before packing are lists of ints."""
+    if isinstance(stored, (bytes, bytearray)):
+        signature = array("Q")
+        signature.frombytes(stored)
+        if sys.byteorder == "big":
+            signature.byteswap()
+        return signature
+    return array("Q", stored)
+
+
+def _bands(signature: List[int]):
+    for band in range(LSH_BANDS):
+        yield band, hash(tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+
+
+class ProblemIndex:
+    """LSH buckets over the MinHash signatures of one problem's submissions."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Band hash -> entry id, or a set of ids once more than one submission shares it
+        self.buckets: List[Dict[int, object]] = [dict() for _ in range(LSH_BANDS)]
+        # Running mean of each check's best match: how alike honest solutions to this problem tend to be
+        self.nearest_sum = 0.0
+        self.nearest_count = 0
+
+    def add(self, entry: dict):
+        if entry.get("nearest_similarity") is not None:
+            self.nearest_sum += entry["nearest_similarity"]
+            self.nearest_count += 1
+        self.entries[entry["_id"]] = entry
+        for band, key in _bands(entry["signature"]):
+            # Most buckets hold a single id; a set for each would cost more than the signature
+            bucket = self.buckets[band].get(key)
+            if bucket is None:
+                self.buckets[band][key] = entry["_id"]
+            elif isinstance(bucket, str):
+                self.buckets[band][key] = {bucket, entry["_id"]}
+            else:
+                bucket.add(entry["_id"])
+
+    def remove_oldest(self):
+        entry_id, entry = self.entries.popitem(last=False)
+        for band, key in _bands(entry["signature"]):
+            bucket = self.buckets[band].get(key)
+            if bucket == entry_id:
+                del self.buckets[band][key]
+            elif isinstance(bucket, set):
+                bucket.discard(entry_id)
+                if len(bucket) == 1:
+                    self.buckets[band][key] = bucket.pop()
+
+    def nearest(self, signature: List[int], exclude_session: str, limit: int = MAX_MATCHES) -> List[dict]:
+        collisions = Counter()
+        for band, key in _bands(signature):
+            bucket = self.buckets[band].get(key)
+            if isinstance(bucket, str):
+                collisions[bucket] += 1
+            elif bucket:
+                collisions.update(bucket)
+        SIMILARITY_CANDIDATES.observe(len(collisions))
+        matches = []
+        for entry_id, _ in collisions.most_common(MAX_CANDIDATES):
+            entry = self.entries[entry_id]
+            if entry["session_id"] == exclude_session:
+                continue
+            matches.append({
+                "session_id": entry["session_id"],
+                "candidate_name": entry.get("candidate_name"),
+                "submitted_at": entry["submitted_at"],
+                "similarity": round(estimate_similarity(signature, entry["signature"]), 3),
+            })
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches[:limit]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self.problems: "OrderedDict[str, ProblemIndex]" = OrderedDict()
+        self.size = 0
+        self._pending_writes = set()
+
+    def _problem(self, problem_key: str) -> ProblemIndex:
+        index = self.problems.get(problem_key)
+        if index is None:
+            index = self.problems[problem_key] = ProblemIndex()
+            if len(self.problems) > MAX_PROBLEMS:
+                _, dropped = self.problems.popitem(last=False)
+                self.size -= len(dropped.entries)
+        self.problems.move_to_end(problem_key)
+        return index
+
+    def _add(self, index: ProblemIndex, entry: dict):
+        index.add(entry)
+        self.size += 1
+        while len(index.entries) > MAX_SUBMISSIONS_PER_PROBLEM:
+            index.remove_oldest()
+            self.size -= 1
+        while self.size > MAX_INDEXED_SUBMISSIONS:
+            # Least recently checked problem first; `index` was just moved to the end
+            problem_key, oldest = next(iter(self.problems.items()))
+            if oldest.entries:
+                oldest.remove_oldest()
+                self.size -= 1
+            if not oldest.entries:
+                del self.problems[problem_key]
+
+    async def check_and_add(self, problem_key: str, session_id: str, code: str, candidate_name: str = "",
+                            language: str = "python") -> dict:
+        """Nearest prior submissions from other sessions, then indexes this one."""
+        computed = await asyncio.to_thread(signature_for, code, language)
+        index = self._problem(problem_key)
+        result = {"shingles": computed["shingles"], "max_similarity": 0.0, "matches": [],
+                  "problem_submissions": len(index.entries),
+                  "problem_typical_similarity": round(index.nearest_sum / index.nearest_count, 3)
+                  if index.nearest_count else None}
+        if computed["shingles"] < MIN_SHINGLES:
+            result["note"] = "Submission too short for a meaningful similarity check"
+            SIMILARITY_CHECKS.inc(flagged="false")
+            return result
+
+        matches = index.nearest(computed["signature"], exclude_session=session_id)
+        if matches:
+            result["matches"] = matches
+            result["max_similarity"] = matches[0]["similarity"]
+        SIMILARITY_CHECKS.inc(flagged=str(result["max_similarity"] >= FLAG_SIMILARITY).lower())
+
+        entry = {
+            "_id": f"{session_id}:{hashlib.sha1(code.encode('utf-8')).hexdigest()[:16]}",
+            "problem_key": problem_key,
+            "session_id": session_id,
+            "candidate_name": candidate_name,
+            "submitted_at": time.time(),
+            "signature": array("Q", computed["signature"]),
+            # Counted into the problem's typical similarity by add(), here and again on load
+            "nearest_similarity": result["max_similarity"] if index.entries else None,
+        }
+        if entry["_id"] not in index.entries:
+            self._add(index, entry)
+            write = asyncio.create_task(self._persist(entry))
+            self._pending_writes.add(write)
+            write.add_done_callback(self._pending_writes.discard)
+        return result
+
+    async def _persist(self, entry: dict):
+        try:
+            await db.code_signatures.replace_one({"_id": entry["_id"]}, {**entry, "signature": _pack(entry["signature"])},
+                                                 upsert=True)
+        except Exception as e:
+            metrics.log("SIMILARITY INDEX WARNING", f"Could not persist signature {entry['_id']}: {e}")
+
+    async def load(self) -> int:
+        """Rebuilds the in-memory LSH tables from persisted signatures, oldest first."""
+        loaded = 0
+        try:
+            async for entry in db.code_signatures.find({}).sort("submitted_at", 1):
+                entry["signature"] = _unpack(entry["signature"])
+                self._add(self._problem(entry["problem_key"]), entry)
+                loaded += 1
+        except Exception as e:
+            metrics.log("SIMILARITY INDEX WARNING", f"Could not load signatures: {e}")
+        return loaded
+
+
+def problem_key_for(session: dict) -> str:
+    """Generated problems have an id; otherwise submissions are grouped by topic."""
+    if session.get("problem_id"):
+        return session["problem_id"]
+    return re.sub(r"\s+", " ", session["candidate"]["interview_topic"]).strip().lower()
+
+
+similarity_index = SimilarityIndex()
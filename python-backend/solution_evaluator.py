@@ -0,0 +1,96 @@
+"""
+Solution Evaluator — grades a candidate's standalone solution.
+
+Problems with a validated hidden test suite are decided locally in the sandbox; the LLM only
+grades problems without tests, or adds qualitative feedback when asked.
+"""
+
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from llm_manager import generate_content_with_fallback
+from llm_scheduler import Priority
+from problem_store import get_problem_tests
+from sandbox import run_tests
+
+
+class EvaluateRequest(BaseModel):
+    problem_title: str
+    problem_description: str
+    user_code: str
+    language: str
+    problem_id: Optional[str] = None
+    detailed_feedback: bool = False
+
+class EvaluateResponse(BaseModel):
+    passed: bool
+    feedback: str
+    tests_passed: Optional[int] = None
+    tests_total: Optional[int] = None
+    evaluated_locally: bool = False
+
+
+def _local_feedback(results: dict) -> str:
+    if results.get("error"):
+        return f"Your code could not be run: {results['error']}"
+    if results["passed"] == results["total"]:
+        return f"All {results['total']} hidden test cases passed. Nice work!"
+    # Don't leak hidden inputs/expected values back to the candidate
+    return f"{results['passed']} of {results['total']} hidden test cases passed. Re-check your edge cases and try again."
+
+
+async def evaluate_submission(req: EvaluateRequest, priority: Priority = Priority.INTERACTIVE,
+                              tests: Optional[dict] = None) -> EvaluateResponse:
+    """
+    Returns the verdict for one submission. Raises HTTPException(500) if the LLM was needed
+    for the verdict and every provider failed. `tests` overrides the problem store's suite
+    (batch jobs pin the suites they started with).
+    """
+    # Problems with a validated hidden suite are decided locally in the sandbox
+    tests = tests or get_problem_tests(req.problem_id)
+    if tests:
+        results = await run_tests(req.user_code, req.language, tests["function_name"], tests["cases"])
+        local_result = EvaluateResponse(
+            passed=not results.get("error") and results["passed"] == results["total"],
+            feedback=_local_feedback(results),
+            tests_passed=results["passed"],
+            tests_total=results["total"],
+            evaluated_locally=True
+        )
+        if not req.detailed_feedback:
+            return local_result
+
+    prompt = f"""You are an expert technical interviewer evaluating a candidate's code submission.
+Problem: {req.problem_title}
+Description: {req.problem_description}
+Language: {req.language}
+Candidate Code:
+{req.user_code}
+
+Evaluate the code for correctness. Check if it solves the problem, handles edge cases, and doesn't have major syntax errors.
+Respond strictly in JSON format matching this schema:
+{{
+  "passed": boolean (true if the code is a basically correct solution, false otherwise),
+  "feedback": "String, short encouraging feedback explaining what is right or wrong, max 3 sentences"
+}}
+"""
+    if tests:
+        # The verdict is already decided; the LLM only contributes qualitative feedback
+        prompt += f"""
+The code was already run against hidden test cases: {json.dumps({k: results[k] for k in ("passed", "total", "failed_cases")})}
+Set "passed" to {str(local_result.passed).lower()} and focus the feedback on code quality and the failing cases, if any.
+"""
+    try:
+        response_text = await generate_content_with_fallback(prompt, expect_json=True, agent="solution_evaluator",
+                                                             priority=priority)
+        data = json.loads(response_text)
+        if tests:
+            return local_result.model_copy(update={"feedback": data.get("feedback", local_result.feedback)})
+        return EvaluateResponse(**data)
+    except Exception as e:
+        if tests:
+            return local_result
+        raise HTTPException(status_code=500, detail=f"AI Evaluation Failed: {str(e)}")
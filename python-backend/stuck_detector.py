@@ -0,0 +1,144 @@
+"""
+Stuck Detector — cheap local heuristic behind /api/analyze-stuck.
+
+The frontend polls every 30 s. Most polls are decided locally from the session's edit
+timeline (built from /api/sync-code), idle time and whether the code has changed since the
+last verdict. Only ambiguous cases escalate to the LLM with STUCK_ANALYSIS_PROMPT, and at
+most once per ESCALATION_COOLDOWN_SECONDS per session. Callers without a session get no
+cached verdict or cooldown: nothing identifies them apart from other candidates.
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Optional
+
+from ai_interviewer import format_stuck_prompt
+from llm_manager import generate_content_with_fallback
+from llm_scheduler import Priority
+import metrics
+
+# Below this the candidate is still working; above STUCK_IDLE_SECONDS with no progress they clearly aren't
+ACTIVE_IDLE_SECONDS = 90
+STUCK_IDLE_SECONDS = 300
+ESCALATION_COOLDOWN_SECONDS = 120
+# Edit timeline kept per session for velocity
+TIMELINE_WINDOW_SECONDS = 600
+TIMELINE_MAX_ENTRIES = 200
+VELOCITY_WINDOW_SECONDS = 180
+# Characters changed per minute that counts as steady progress
+ACTIVE_CHARS_PER_MINUTE = 40
+
+LOCAL_SUGGESTIONS = [
+    "Try walking through a small example by hand and see where your code gets stuck.",
+    "It might help to talk through your current approach out loud before writing more code.",
+    "Consider what the simplest input is and whether your code handles it yet.",
+]
+
+STUCK_DECISIONS = metrics.Counter("stuck_detector_decisions_total", "Stuck-detection polls by how they were decided.",
+                                  ("source", "is_stuck"))
+
+
+def code_fingerprint(code: str) -> str:
+    """Hash of the code with whitespace collapsed, so reformatting doesn't count as progress."""
+    normalized = re.sub(r"\s+", " ", code or "").strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def record_code(session: dict, code: str) -> bool:
+    """Appends to the session's edit timeline when the code actually changed; returns whether it did."""
+    timeline = session.setdefault("edit_timeline", [])
+    fingerprint = code_fingerprint(code)
+    if timeline and timeline[-1][1] == fingerprint:
+        return False
+    now = time.time()
+    timeline.append([now, fingerprint, len(code or "")])
+    cutoff = now - TIMELINE_WINDOW_SECONDS
+    while len(timeline) > TIMELINE_MAX_ENTRIES or (len(timeline) > 1 and timeline[0][0] < cutoff):
+        timeline.pop(0)
+    return True
+
+
+def _edit_velocity(timeline: list, now: float) -> float:
+    """Approximate characters changed per minute over the recent window."""
+    recent = [entry for entry in timeline if entry[0] >= now - VELOCITY_WINDOW_SECONDS]
+    if len(recent) < 2:
+        return 0.0
+    changed = sum(abs(b[2] - a[2]) or 1 for a, b in zip(recent, recent[1:]))
+    return changed * 60.0 / VELOCITY_WINDOW_SECONDS
+
+
+def _state_for(session: Optional[dict]) -> dict:
+    # Without a session the state is thrown away after the call rather than shared by problem
+    if session is not None:
+        return session.setdefault("stuck_state", {})
+    return {}
+
+
+def _local_verdict(idle_seconds: float, velocity: float, tests_passing: bool) -> Optional[bool]:
+    """True/False when the heuristic is confident, None when it's ambiguous."""
+    if idle_seconds < ACTIVE_IDLE_SECONDS or velocity >= ACTIVE_CHARS_PER_MINUTE:
+        return False
+    if tests_passing:
+        return False
+    if idle_seconds >= STUCK_IDLE_SECONDS:
+        return True
+    return None
+
+
+async def analyze_stuck(code: str, problem_title: str, problem_description: str, language: str,
+                        client_idle_seconds: int, session: Optional[dict] = None) -> dict:
+    """
+    Returns {"is_stuck", "suggestion", "source"} where source is "local", "cached" or "llm".
+    """
+    now = time.time()
+    state = _state_for(session)
+    fingerprint = code_fingerprint(code)
+
+    idle_seconds = client_idle_seconds
+    velocity = 0.0
+    tests_passing = False
+    if session is not None:
+        timeline = session.get("edit_timeline") or []
+        if timeline:
+            # Synced edits arrive every few seconds, so take whichever side saw the most recent change
+            idle_seconds = min(client_idle_seconds, now - timeline[-1][0])
+            velocity = _edit_velocity(timeline, now)
+        results = session.get("test_results") or {}
+        tests_passing = bool(results.get("total")) and results.get("passed") == results.get("total")
+
+    is_stuck = _local_verdict(idle_seconds, velocity, tests_passing)
+
+    # Still ambiguous and the code hasn't changed since the LLM last looked: reuse its verdict
+    if is_stuck is None and state.get("fingerprint") == fingerprint:
+        STUCK_DECISIONS.inc(source="cached", is_stuck=str(state["is_stuck"]).lower())
+        return {"is_stuck": state["is_stuck"], "suggestion": state["suggestion"], "source": "cached"}
+
+    if is_stuck is None and now - state.get("last_escalation", 0) < ESCALATION_COOLDOWN_SECONDS:
+        # Ambiguous but we asked the LLM recently; lean towards not interrupting
+        is_stuck = False
+
+    if is_stuck is not None:
+        suggestion = ""
+        if is_stuck:
+            suggestion = LOCAL_SUGGESTIONS[state.get("local_hints", 0) % len(LOCAL_SUGGESTIONS)]
+            state["local_hints"] = state.get("local_hints", 0) + 1
+        STUCK_DECISIONS.inc(source="local", is_stuck=str(is_stuck).lower())
+        return {"is_stuck": is_stuck, "suggestion": suggestion, "source": "local"}
+
+    state["last_escalation"] = now
+    prompt = format_stuck_prompt(problem_title, problem_description, language, code, int(idle_seconds))
+    try:
+        response_text = await generate_content_with_fallback(prompt, expect_json=True, agent="stuck",
+                                                             priority=Priority.BACKGROUND)
+        data = json.loads(response_text)
+        is_stuck = bool(data.get("is_stuck", False))
+        suggestion = data.get("suggestion", "") if is_stuck else ""
+    except Exception as e:
+        metrics.log("STUCK DETECTOR ERROR", f"LLM escalation failed: {e}")
+        is_stuck, suggestion = False, ""
+
+    state.update({"fingerprint": fingerprint, "is_stuck": is_stuck, "suggestion": suggestion})
+    STUCK_DECISIONS.inc(source="llm", is_stuck=str(is_stuck).lower())
+    return {"is_stuck": is_stuck, "suggestion": suggestion, "source": "llm"}
@@ -0,0 +1,9 @@
+"""Backend modules are imported from python-backend/ with mock providers and no webcam."""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("LLM_PROVIDER", "mock")
+os.environ.setdefault("PROCTOR_ENABLED", "0")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from analytics import counted_entry, previously_counted, summary_updates, describe_summary
+
+
+def _report(final=70, integrity=85, role="backend", level="Hire", failed=False):
+    return {
+        "created_at": datetime(2026, 3, 14, tzinfo=timezone.utc),
+        "role": role,
+        "difficulty": "medium",
+        "topic": "two sum",
+        "performance_level": level,
+        "scores": {"final_score_percent": final, "integrity_score": integrity, "reasoning": 7},
+        "agent_scores": {"code_judge": 8},
+        "aggregation_failed": failed,
+    }
+
+
+def _apply(summaries: dict, updates) -> dict:
+    """Applies $inc updates the way Mongo would, with dotted paths kept flat."""
+    for update in updates:
+        group = summaries.setdefault((update._filter["dimension"], update._filter["key"]), {})
+        for field, value in update._doc["$inc"].items():
+            group[field] = group.get(field, 0) + value
+    return summaries
+
+
+def test_first_save_counts_the_report_in_every_group():
+    summaries = _apply({}, summary_updates(None, counted_entry(_report())))
+    assert set(summaries) == {("overall", "all"), ("role", "backend"), ("difficulty", "medium"),
+                              ("topic", "two sum"), ("role_difficulty", "backend / medium"), ("day", "2026-03-14")}
+    overall = summaries[("overall", "all")]
+    assert overall["count"] == 1
+    assert overall["final_score.sum"] == 70
+    assert overall["integrity_histogram.80"] == 1
+    assert overall["performance_levels.Hire"] == 1
+    assert overall["agents.code_judge.sum"] == 8
+
+
+def test_resave_applies_only_the_difference():
+    first = counted_entry(_report(final=70, level="Borderline"))
+    second = counted_entry(_report(final=90, level="Hire"))
+    summaries = _apply({}, summary_updates(None, first))
+    _apply(summaries, summary_updates(first, second))
+    overall = summaries[("overall", "all")]
+    assert overall["count"] == 1
+    assert overall["final_score.sum"] == 90
+    assert overall["final_score.sum_sq"] == 90 * 90
+    assert overall["performance_levels.Borderline"] == 0
+    assert overall["performance_levels.Hire"] == 1
+
+
+def test_identical_resave_changes_nothing():
+    entry = counted_entry(_report())
+    assert summary_updates(entry, entry) == []
+
+
+def test_report_moving_groups_leaves_the_old_group():
+    first = counted_entry(_report(role="backend"))
+    second = counted_entry(_report(role="frontend"))
+    summaries = _apply({}, summary_updates(None, first))
+    _apply(summaries, summary_updates(first, second))
+    assert summaries[("role", "backend")]["count"] == 0
+    assert summaries[("role", "frontend")]["count"] == 1
+    assert summaries[("overall", "all")]["count"] == 1
+
+
+def test_failed_aggregation_counts_nothing_until_it_succeeds():
+    failed = counted_entry(_report(failed=True))
+    assert failed is None
+    assert summary_updates(None, failed) == []
+    summaries = _apply({}, summary_updates(failed, counted_entry(_report())))
+    assert summaries[("overall", "all")]["count"] == 1
+
+
+def test_reports_saved_before_counted_existed_are_recomputed():
+    legacy = _report()
+    assert previously_counted(legacy) == counted_entry(legacy)
+    assert previously_counted(None) is None
+    assert previously_counted({**legacy, "counted": None}) is None
+
+
+def test_describe_summary_turns_sums_into_averages():
+    summaries = {}
+    for final in (60, 80):
+        _apply(summaries, summary_updates(None, counted_entry(_report(final=final))))
+    flat = summaries[("overall", "all")]
+    summary = {"key": "all", "count": flat["count"],
+               "final_score": {"sum": flat["final_score.sum"], "sum_sq": flat["final_score.sum_sq"],
+                               "count": flat["final_score.count"]},
+               "scores": {"reasoning": {"sum": flat["scores.reasoning.sum"], "count": flat["scores.reasoning.count"]}},
+               "integrity_histogram": {"80": flat["integrity_histogram.80"]}}
+    described = describe_summary(summary)
+    assert described["sessions"] == 2
+    assert described["avg_final_score_percent"] == 70
+    assert described["final_score_stddev"] == pytest.approx(10)
+    assert described["avg_scores"] == {"reasoning": 7}
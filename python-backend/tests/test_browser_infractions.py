@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+
+import browser_infractions
+from browser_infractions import (allow_report, record_events, describe_episode, COALESCE_WINDOW_SECONDS,
+                                 RATE_LIMIT_BURST, MAX_EVENTS_PER_BATCH, MAX_CLIENT_CLOCK_SKEW_SECONDS)
+
+NOW = 1_700_000_000.0
+
+
+def _event(timestamp, kind="tab_switch", terminal=False):
+    return {"type": kind, "message": f"{kind} detected", "is_terminal": terminal, "timestamp": timestamp}
+
+
+def _session():
+    return {"browser_warnings": []}
+
+
+def test_a_burst_of_one_type_is_one_counted_episode():
+    session = _session()
+    record_events(session, [_event(NOW + offset) for offset in (0, 2, 4, 6)], now=NOW)
+    record_events(session, [_event(NOW + 8)], now=NOW)
+    assert len(session["browser_warnings"]) == 1
+    episode = session["browser_warnings"][0]
+    assert episode["count"] == 5 and episode["last_seen"] == NOW + 8
+    assert describe_episode(episode) == "tab_switch detected (x5)"
+
+
+def test_a_gap_longer_than_the_window_starts_a_new_episode():
+    session = _session()
+    record_events(session, [_event(NOW), _event(NOW + COALESCE_WINDOW_SECONDS + 1)], now=NOW)
+    assert [e["count"] for e in session["browser_warnings"]] == [1, 1]
+    assert describe_episode(session["browser_warnings"][0]) == "tab_switch detected"
+
+
+def test_late_batches_fold_into_the_episode_they_belong_to():
+    session = _session()
+    record_events(session, [_event(NOW + 5)], now=NOW)
+    record_events(session, [_event(NOW + 1)], now=NOW)
+    episode, = session["browser_warnings"]
+    assert episode["count"] == 2 and episode["timestamp"] == NOW + 1
+
+
+def test_types_are_kept_apart_and_terminal_sticks():
+    session = _session()
+    record_events(session, [_event(NOW), _event(NOW + 1, kind="paste"), _event(NOW + 2, terminal=True)], now=NOW)
+    by_type = {e["type"]: e for e in session["browser_warnings"]}
+    assert by_type["tab_switch"]["count"] == 2 and by_type["tab_switch"]["is_terminal"]
+    assert by_type["paste"]["count"] == 1 and not by_type["paste"]["is_terminal"]
+
+
+def test_skewed_client_clocks_use_the_server_time():
+    session = _session()
+    accepted = record_events(session, [_event(NOW - MAX_CLIENT_CLOCK_SKEW_SECONDS - 1), _event(None)], now=NOW)
+    assert [e["timestamp"] for e in accepted] == [NOW, NOW]
+
+
+def test_episode_cap_and_batch_truncation(monkeypatch):
+    monkeypatch.setattr(browser_infractions, "MAX_EPISODES_PER_SESSION", 2)
+    session = _session()
+    distinct = [_event(NOW, kind=f"type_{i}") for i in range(MAX_EVENTS_PER_BATCH + 5)]
+    accepted = record_events(session, distinct, now=NOW)
+    assert len(accepted) == MAX_EVENTS_PER_BATCH
+    assert len(session["browser_warnings"]) == 2
+    assert session["browser_warnings_dropped"] == MAX_EVENTS_PER_BATCH - 2
+
+
+def test_report_rate_limit_refills_over_time():
+    session = {}
+    assert all(allow_report(session, now=NOW) == 0 for _ in range(RATE_LIMIT_BURST))
+    assert allow_report(session, now=NOW) == pytest.approx(1.0)
+    assert allow_report(session, now=NOW + 1) == 0
+
+
+def test_terminal_events_bypass_the_rate_limit(monkeypatch):
+    import chat_routes
+
+    class Precomputer:
+        invalidated = 0
+
+        def invalidate(self):
+            self.invalidated += 1
+
+    session = {**_session(), "report_precomputer": Precomputer(),
+               "infraction_bucket": {"tokens": 0.0, "updated": 4_102_444_800.0}}
+    monkeypatch.setitem(chat_routes.SESSION_STORE, "s1", session)
+    monkeypatch.setattr(chat_routes.event_log, "append", lambda *args: None)
+
+    with pytest.raises(HTTPException) as limited:
+        chat_routes._ingest_cheat_events("s1", [chat_routes.CheatEvent(warning_type="paste", message="paste")])
+    assert limited.value.status_code == 429
+
+    result = chat_routes._ingest_cheat_events("s1", [chat_routes.CheatEvent(
+        warning_type="fullscreen_exit", message="left fullscreen", is_terminal=True)])
+    assert result["accepted"] == 1
+    assert session["browser_warnings"][0]["is_terminal"]
+    assert session["report_precomputer"].invalidated == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+import event_log as event_log_module
+from event_log import EventLog, EVENTS_DUPLICATES, DUPLICATE_KEY_ERROR
+
+
+class FakeEvents:
+    """insert_many(ordered=False) with duplicate-key errors, optionally losing the connection partway."""
+
+    def __init__(self):
+        self.docs = {}
+        self.fail_after = None
+
+    async def insert_many(self, batch, ordered=True):
+        errors = []
+        for index, document in enumerate(batch):
+            if self.fail_after is not None and index >= self.fail_after:
+                self.fail_after = None
+                raise ConnectionError("connection lost")
+            if document["_id"] in self.docs:
+                errors.append({"index": index, "code": DUPLICATE_KEY_ERROR})
+            else:
+                self.docs[document["_id"]] = dict(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    def find(self, query):
+        matching = sorted((d for d in self.docs.values() if d["session_id"] == query["session_id"]),
+                          key=lambda d: d["seq"])
+
+        class Cursor:
+            def sort(self, *args):
+                return self
+
+            async def __aiter__(self):
+                for document in matching:
+                    yield document
+
+        return Cursor()
+
+
+def _duplicates() -> float:
+    return EVENTS_DUPLICATES._values.get((), 0.0)
+
+
+def test_seq_keeps_increasing_across_sessions():
+    log = EventLog(FakeEvents())
+    log.append("a", "candidate_turn", {})
+    log.append("b", "candidate_turn", {})
+    log.append("a", "code_snapshot", {})
+    assert [e["seq"] for e in log._buffer] == [0, 1, 2]
+    assert len({e["_id"] for e in log._buffer}) == 3
+
+
+def test_retry_after_a_partial_write_is_not_a_duplicate():
+    events = FakeEvents()
+    log = EventLog(events)
+    for index in range(5):
+        log.append("a", "candidate_turn", {"n": index})
+    events.fail_after = 3
+    before = _duplicates()
+
+    try:
+        asyncio.run(log.flush())
+    except ConnectionError:
+        pass
+    assert len(events.docs) == 3 and len(log._buffer) == 5
+
+    assert asyncio.run(log.flush()) == 5
+    assert len(events.docs) == 5
+    assert _duplicates() == before
+    assert not log._retrying
+
+
+def test_duplicate_on_first_write_is_counted():
+    events = FakeEvents()
+    log = EventLog(events)
+    log.append("a", "candidate_turn", {})
+    events.docs[log._buffer[0]["_id"]] = {}
+    before = _duplicates()
+    asyncio.run(log.flush())
+    assert _duplicates() == before + 1
+
+
+def test_overflow_drops_the_oldest_events(monkeypatch):
+    monkeypatch.setattr(event_log_module, "EVENT_LOG_MAX_BUFFER", 3)
+    log = EventLog(FakeEvents())
+    for index in range(5):
+        log.append("a", "candidate_turn", {"n": index})
+    assert [e["payload"]["n"] for e in log._buffer] == [2, 3, 4]
+
+
+def test_load_session_includes_buffered_events_in_order():
+    events = FakeEvents()
+    log = EventLog(events)
+    log.append("a", "session_started", {})
+    log.append("b", "session_started", {})
+    asyncio.run(log.flush())
+    log.append("a", "candidate_turn", {})
+    loaded = asyncio.run(log.load_session("a"))
+    assert [e["kind"] for e in loaded] == ["session_started", "candidate_turn"]
@@ -0,0 +1,71 @@
+import interview_phases
+from interview_phases import (INITIAL_PHASE, PHASES, should_evaluate, should_judge, record_candidate_turn,
+                              apply_brain_action, on_code_submitted, on_test_results)
+
+
+def _session(phase=INITIAL_PHASE):
+    return {"phase": phase, "phase_turns": 0, "test_results": {}}
+
+
+def test_turn_budget_moves_a_lingering_phase_on():
+    session = _session()
+    phases = [record_candidate_turn(session) for _ in range(PHASES["warmup"].max_turns)]
+    assert phases[-1] == "problem_statement"
+    assert session["phase_turns"] == 0
+
+
+def test_coding_has_no_turn_budget():
+    session = _session("coding")
+    for _ in range(50):
+        assert record_candidate_turn(session) == "coding"
+
+
+def test_phases_never_move_backwards():
+    session = _session("explanation")
+    assert apply_brain_action(session, "request_code") == "explanation"
+    assert on_code_submitted(session) == "explanation"
+    assert apply_brain_action(session, "end_session") == "end"
+
+
+def test_request_code_and_submissions_enter_coding():
+    assert apply_brain_action(_session("clarification"), "request_code") == "coding"
+    assert on_code_submitted(_session("warmup")) == "coding"
+
+
+def test_analyze_leaves_coding_only_after_a_tested_submission():
+    session = _session("coding")
+    assert apply_brain_action(session, "analyze") == "coding"
+    session["test_results"] = {"passed": 1, "total": 3}
+    assert apply_brain_action(session, "analyze") == "explanation"
+
+
+def test_passing_every_test_ends_coding():
+    session = _session("coding")
+    assert on_test_results(session, {"passed": 2, "total": 3}) == "coding"
+    assert on_test_results(session, {"passed": 0, "total": 0}) == "coding"
+    assert on_test_results(session, {"passed": 3, "total": 3}) == "explanation"
+
+
+def test_evaluators_are_gated_by_phase():
+    session = _session("warmup")
+    assert should_evaluate(session, "comm_eval")
+    assert not should_evaluate(session, "reasoning_eval")
+    session["phase"] = "end"
+    assert not should_evaluate(session, "comm_eval")
+
+
+def test_new_code_is_always_judged_repeats_only_where_the_phase_allows():
+    session = _session("hr")
+    assert should_judge(session, "def f(): pass")
+    assert not should_judge(session, "def f(): pass")
+    assert should_judge(session, "def f(): return 1")
+    session["phase"] = "coding"
+    assert should_judge(session, "def f(): return 1")
+
+
+def test_transitions_are_logged_for_the_session(monkeypatch):
+    logged = []
+    monkeypatch.setattr(interview_phases.event_log, "append", lambda *args: logged.append(args))
+    session = _session("clarification")
+    apply_brain_action(session, "request_code", "s1")
+    assert logged == [("s1", "phase_changed", {"from": "clarification", "to": "coding", "reason": "brain"})]
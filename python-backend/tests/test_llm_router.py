@@ -0,0 +1,142 @@
+import asyncio
+import time
+import types
+
+import pytest
+from fastapi import HTTPException
+
+import llm_router
+from llm_router import ProviderRouter, ProviderStats, FAILURES_TO_OPEN, CIRCUIT_COOLDOWN_SECONDS
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the router's monotonic clock without touching the event loop's."""
+    now = [1000.0]
+    monkeypatch.setattr(llm_router, "time", types.SimpleNamespace(monotonic=lambda: now[0],
+                                                                   perf_counter=time.perf_counter))
+    return now
+
+
+@pytest.fixture
+def outcomes(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_router, "record_llm_call",
+                        lambda agent, provider, seconds, outcome, response=None: recorded.append((provider, outcome)))
+    return recorded
+
+
+def _provider(text="ok", fail=False, calls=None):
+    async def call(messages, expect_json, temperature):
+        if calls is not None:
+            calls.append(messages)
+        if fail:
+            raise RuntimeError("provider down")
+        return text, None
+    return call
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes_once(clock):
+    stats = ProviderStats("gemini")
+    for _ in range(FAILURES_TO_OPEN - 1):
+        stats.record_failure()
+    assert stats.state == "closed"
+    stats.record_failure()
+    assert stats.state == "open" and not stats.allows_request()
+
+    clock[0] += CIRCUIT_COOLDOWN_SECONDS + 1
+    assert stats.state == "half_open" and stats.allows_request()
+    stats.probe_in_flight = True
+    assert not stats.allows_request()
+
+
+def test_failed_probe_reopens_with_a_longer_cooldown_and_success_closes(clock):
+    stats = ProviderStats("gemini")
+    for _ in range(FAILURES_TO_OPEN):
+        stats.record_failure()
+    clock[0] += CIRCUIT_COOLDOWN_SECONDS + 1
+    stats.record_failure()
+    assert stats.state == "open"
+    assert stats.cooldown == 2 * CIRCUIT_COOLDOWN_SECONDS
+
+    clock[0] += stats.cooldown + 1
+    stats.record_success(0.5)
+    assert stats.state == "closed"
+    assert stats.cooldown == CIRCUIT_COOLDOWN_SECONDS
+
+
+def test_ewma_latency_and_errors_rank_providers(clock):
+    router = ProviderRouter()
+    router.register("gemini", _provider())
+    router.register("openai", _provider())
+    assert router._ranked() == ["gemini", "openai"]
+
+    for _ in range(5):
+        router.stats["gemini"].record_success(2.0)
+        router.stats["openai"].record_success(1.0)
+    assert router._ranked() == ["openai", "gemini"]
+
+    # Errors inflate the expected cost: 1.0 * (1 + 4 * 0.36) > 2.0
+    router.stats["openai"].record_failure()
+    router.stats["openai"].record_failure()
+    assert router._ranked()[0] == "gemini"
+
+
+def test_error_rate_decays_with_time(clock):
+    stats = ProviderStats("gemini")
+    stats.record_failure()
+    before = stats.ewma_error_rate
+    clock[0] += llm_router.ERROR_RATE_HALF_LIFE_SECONDS
+    assert stats.ewma_error_rate == pytest.approx(before / 2)
+
+
+def test_stale_lower_ranked_provider_is_resampled_once(clock):
+    router = ProviderRouter()
+    router.register("gemini", _provider())
+    router.register("openai", _provider())
+    router.stats["gemini"].record_success(1.0)
+    router.stats["openai"].record_success(5.0)
+
+    clock[0] += llm_router.RESAMPLE_AFTER_SECONDS + 1
+    router.stats["gemini"].record_success(1.0)
+    assert router._ranked() == ["openai", "gemini"]
+    # Claimed by the first request; the next one goes back to the leader
+    assert router._ranked() == ["gemini", "openai"]
+
+
+def test_every_circuit_open_tries_the_one_reopening_first(clock):
+    router = ProviderRouter()
+    router.register("gemini", _provider())
+    router.register("openai", _provider())
+    for _ in range(FAILURES_TO_OPEN):
+        router.stats["gemini"].record_failure()
+    clock[0] += 10
+    for _ in range(FAILURES_TO_OPEN):
+        router.stats["openai"].record_failure()
+    assert router._ranked() == ["gemini", "openai"]
+
+
+def test_generate_falls_back_to_the_next_provider(clock, outcomes):
+    router = ProviderRouter()
+    router.register("gemini", _provider(fail=True))
+    router.register("openai", _provider(text="hello"))
+    assert asyncio.run(router.generate([{"role": "user", "text": "hi"}])) == "hello"
+    assert outcomes == [("gemini", "error"), ("openai", "ok")]
+    assert router.stats["gemini"].consecutive_failures == 1
+
+
+def test_unparseable_json_is_its_own_outcome(clock, outcomes):
+    router = ProviderRouter()
+    router.register("gemini", _provider(text="not json"))
+    assert asyncio.run(router.generate([], expect_json=True)) == "not json"
+    assert outcomes == [("gemini", "invalid_json")]
+
+
+def test_generate_raises_when_every_provider_fails(clock, outcomes):
+    router = ProviderRouter()
+    router.register("gemini", _provider(fail=True))
+    router.register("openai", _provider(fail=True))
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(router.generate([]))
+    assert raised.value.status_code == 500
+    assert "gemini" in raised.value.detail and "openai" in raised.value.detail
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, LLMShedError, Priority, llm_priority, resolve_priority
+
+
+def _overload(scheduler: LLMScheduler):
+    scheduler.interactive_latency = llm_scheduler.INTERACTIVE_LATENCY_TARGET_SECONDS * 2
+    scheduler._latency_at = time.monotonic()
+
+
+def test_report_work_is_shed_while_interactive_latency_is_over_target():
+    scheduler = LLMScheduler(total=4)
+    _overload(scheduler)
+
+    async def call():
+        return "draft"
+
+    with pytest.raises(LLMShedError):
+        asyncio.run(scheduler.run(Priority.REPORT, call))
+    assert asyncio.run(scheduler.run(Priority.INTERACTIVE, call)) == "draft"
+
+
+def test_stale_latency_is_not_overload():
+    scheduler = LLMScheduler(total=4)
+    _overload(scheduler)
+    scheduler._latency_at -= llm_scheduler.LATENCY_STALE_SECONDS + 1
+    assert not scheduler.overloaded
+
+
+def test_background_work_is_deferred_then_admitted(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "MAX_DEFER_SECONDS", 0.05)
+    monkeypatch.setattr(llm_scheduler, "DEFER_POLL_SECONDS", 0.01)
+    scheduler = LLMScheduler(total=4)
+    _overload(scheduler)
+
+    async def call():
+        return "eval"
+
+    started = time.monotonic()
+    assert asyncio.run(scheduler.run(Priority.BACKGROUND, call)) == "eval"
+    assert time.monotonic() - started >= 0.05
+
+
+def test_free_slots_go_to_the_most_urgent_waiter_first():
+    async def scenario():
+        scheduler = LLMScheduler(total=1)
+        release = asyncio.Event()
+        order = []
+
+        async def blocker():
+            await release.wait()
+
+        def call(name):
+            async def run():
+                order.append(name)
+            return run
+
+        holding = asyncio.create_task(scheduler.run(Priority.INTERACTIVE, blocker))
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(scheduler.run(priority, call(priority.name)))
+                   for priority in (Priority.REPORT, Priority.BACKGROUND, Priority.SUBMISSION, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert scheduler.snapshot()["queued"] == {"interactive": 1, "submission": 1, "background": 1, "report": 1}
+        release.set()
+        await asyncio.gather(holding, *waiting)
+        return order
+
+    assert asyncio.run(scenario()) == ["INTERACTIVE", "SUBMISSION", "BACKGROUND", "REPORT"]
+
+
+def test_class_cap_does_not_block_other_classes():
+    async def scenario():
+        scheduler = LLMScheduler(total=4, per_class={**llm_scheduler.CLASS_CONCURRENCY, Priority.BACKGROUND: 1})
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        first = asyncio.create_task(scheduler.run(Priority.BACKGROUND, blocker))
+        second = asyncio.create_task(scheduler.run(Priority.BACKGROUND, blocker))
+        await asyncio.sleep(0)
+        assert scheduler.running[Priority.BACKGROUND] == 1
+
+        async def interactive():
+            return "turn"
+
+        assert await scheduler.run(Priority.INTERACTIVE, interactive) == "turn"
+        release.set()
+        await asyncio.gather(first, second)
+        return scheduler.running
+
+    assert all(count == 0 for count in asyncio.run(scenario()).values())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        scheduler = LLMScheduler(total=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        async def noop():
+            return None
+
+        holding = asyncio.create_task(scheduler.run(Priority.INTERACTIVE, blocker))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(scheduler.run(Priority.SUBMISSION, noop))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holding
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await scheduler.run(Priority.SUBMISSION, noop)
+        return scheduler.running
+
+    assert all(count == 0 for count in asyncio.run(scenario()).values())
+
+
+def test_llm_priority_overrides_the_default():
+    assert resolve_priority(Priority.REPORT) == Priority.REPORT
+    with llm_priority(Priority.INTERACTIVE):
+        assert resolve_priority(Priority.REPORT) == Priority.INTERACTIVE
+    assert resolve_priority(Priority.REPORT) == Priority.REPORT
@@ -0,0 +1,126 @@
+import asyncio
+import types
+
+import pytest
+
+import similarity_index
+from similarity_index import (SimilarityIndex, ProblemIndex, strip_comments, normalize_tokens, signature_for,
+                              estimate_similarity, _pack, _unpack)
+
+TWO_SUM = """
+def two_sum(nums, target):
+    seen = {}
+    for i, n in enumerate(nums):
+        if target - n in seen:
+            return [seen[target - n], i]
+        seen[n] = i
+    return []
+"""
+
+RENAMED = """
+def solve(values, goal):
+    # remember what we have seen
+    lookup = {}
+    for idx, v in enumerate(values):
+        if goal - v in lookup:
+            return [lookup[goal - v], idx]
+        lookup[v] = idx
+    return []
+"""
+
+UNRELATED = """
+def merge_intervals(intervals):
+    intervals.sort(key=lambda pair: pair[0])
+    merged = []
+    for start, end in intervals:
+        if merged and merged[-1][1] >= start:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    persisted = {}
+
+    async def replace_one(query, document, upsert=False):
+        persisted[query["_id"]] = document
+
+    monkeypatch.setattr(similarity_index, "db", types.SimpleNamespace(
+        code_signatures=types.SimpleNamespace(replace_one=replace_one)))
+    return persisted
+
+
+def test_comment_stripping_depends_on_the_language():
+    assert "//" in strip_comments("half = n // 2  # floor", "python")
+    assert "floor" not in strip_comments("half = n // 2  # floor", "python")
+    assert strip_comments("let s = '//'; // note\n/* block */", "javascript").split() == ["let", "s", "=", "'//';"]
+    assert normalize_tokens("x = 1 // 2", "python") == ["ID", "=", "NUM", "/", "/", "NUM"]
+
+
+def test_renaming_and_comments_do_not_hide_a_copy():
+    assert estimate_similarity(signature_for(TWO_SUM)["signature"], signature_for(RENAMED)["signature"]) == 1.0
+    assert estimate_similarity(signature_for(TWO_SUM)["signature"], signature_for(UNRELATED)["signature"]) < 0.3
+
+
+def test_signatures_round_trip_through_storage():
+    signature = signature_for(TWO_SUM)["signature"]
+    assert list(_unpack(_pack(signature))) == signature
+    # Stored as a list of ints before signatures were packed
+    assert list(_unpack(signature)) == signature
+
+
+def test_nearest_finds_other_sessions_only():
+    async def scenario():
+        index = SimilarityIndex()
+        first = await index.check_and_add("two-sum", "alice", TWO_SUM)
+        own = await index.check_and_add("two-sum", "alice", RENAMED)
+        copied = await index.check_and_add("two-sum", "bob", RENAMED)
+        unrelated = await index.check_and_add("two-sum", "carol", UNRELATED)
+        return first, own, copied, unrelated
+
+    first, own, copied, unrelated = asyncio.run(scenario())
+    assert first["matches"] == [] and first["problem_typical_similarity"] is None
+    assert own["max_similarity"] == 0.0
+    assert copied["max_similarity"] == 1.0
+    assert {m["session_id"] for m in copied["matches"]} == {"alice"}
+    assert unrelated["max_similarity"] < similarity_index.FLAG_SIMILARITY
+
+
+def test_short_submissions_are_not_indexed():
+    result = asyncio.run(SimilarityIndex().check_and_add("two-sum", "alice", "def f(): return 1"))
+    assert "note" in result
+
+
+def test_memory_budget_evicts_the_least_recently_checked_problem_first(monkeypatch):
+    monkeypatch.setattr(similarity_index, "MAX_INDEXED_SUBMISSIONS", 3)
+
+    async def scenario():
+        index = SimilarityIndex()
+        await index.check_and_add("two-sum", "alice", TWO_SUM)
+        await index.check_and_add("two-sum", "bob", RENAMED)
+        await index.check_and_add("intervals", "carol", UNRELATED)
+        await index.check_and_add("intervals", "dave", UNRELATED + "\nprint(merge_intervals([]))\n")
+        return index
+
+    index = asyncio.run(scenario())
+    assert index.size == 3
+    assert [e["session_id"] for e in index.problems["two-sum"].entries.values()] == ["bob"]
+    assert len(index.problems["intervals"].entries) == 2
+
+
+def test_removing_entries_keeps_buckets_consistent():
+    problem = ProblemIndex()
+    for session, code in (("alice", TWO_SUM), ("bob", RENAMED), ("carol", UNRELATED)):
+        problem.add({"_id": session, "session_id": session, "submitted_at": 0,
+                     "signature": signature_for(code)["signature"]})
+    problem.remove_oldest()
+
+    indexed = set()
+    for band in problem.buckets:
+        for bucket in band.values():
+            indexed |= {bucket} if isinstance(bucket, str) else bucket
+    assert indexed == {"bob", "carol"}
+    assert [m["session_id"] for m in problem.nearest(signature_for(TWO_SUM)["signature"], "nobody")][0] == "bob"
@@ -175,7 +175,8 @@ function App() {
           problem_title: problemData.title,
           problem_description: problemData.description,
           user_code: userCode,
-          language: problemData.language
+          language: problemData.language,
+          problem_id: problemData.problem_id
         }),
       });
 
@@ -142,7 +142,8 @@ export default function InterviewChat({ userCode, problemData, isActive, resumeD
                 languages: [problemData.language || "python"],
                 problem_title: problemData.title,
                 difficulty_level: problemData.difficulty || "medium",
-                resume_text: resumeData ? resumeData.extracted_text : ""
+                resume_text: resumeData ? resumeData.extracted_text : "",
+                problem_id: problemData.problem_id || null
             };
 
             fetch('http://localhost:8000/api/start-session', {
@@ -260,12 +261,48 @@ export default function InterviewChat({ userCode, problemData, isActive, resumeD
     useStuckDetection({
         code: userCode,
         problemData,
+        sessionId,
         isActive,
         onStuckDetected: handleStuckDetected,
         idleThresholdSeconds: 90, // Increased wait time
     });
 
     // Browser Security Integrations
+    // Infractions are queued and sent in batches; the backend coalesces repeats into episodes
+    const pendingCheatEventsRef = useRef([]);
+
+    // Resolves to the seconds to wait before retrying when rate limited, else 0
+    const flushCheatEvents = useCallback(async () => {
+        if (!sessionId || pendingCheatEventsRef.current.length === 0) return 0;
+        const events = pendingCheatEventsRef.current;
+        pendingCheatEventsRef.current = [];
+        try {
+            const res = await fetch('http://localhost:8000/api/report-cheat/batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ session_id: sessionId, events })
+            });
+            if (res.status === 429) {
+                // Rate limited: keep the events for the next flush
+                pendingCheatEventsRef.current = events.concat(pendingCheatEventsRef.current);
+                return Number(res.headers.get('Retry-After')) || 1;
+            }
+        } catch (err) {
+            console.error("Failed to report cheat to backend", err);
+            pendingCheatEventsRef.current = events.concat(pendingCheatEventsRef.current);
+        }
+        return 0;
+    }, [sessionId]);
+
+    useEffect(() => {
+        if (!sessionId) return;
+        const interval = setInterval(flushCheatEvents, 3000);
+        return () => {
+            clearInterval(interval);
+            flushCheatEvents();
+        };
+    }, [sessionId, flushCheatEvents]);
+
     const handleCheatDetected = async (warning, isTermination, warningCount) => {
         // Display UI Toast
         setActiveToast({
@@ -279,21 +316,16 @@ export default function InterviewChat({ userCode, problemData, isActive, resumeD
             setTimeout(() => setActiveToast(null), 5000);
         }
 
-        // Inform the backend immediately
+        // Queue for the next batch; a terminal infraction is sent right away
         if (sessionId) {
-            try {
-                await fetch('http://localhost:8000/api/report-cheat', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        session_id: sessionId,
-                        warning_type: warning.type,
-                        message: warning.message,
-                        is_terminal: isTermination
-                    })
-                });
-            } catch (err) {
-                console.error("Failed to report cheat to backend", err);
+            pendingCheatEventsRef.current.push({
+                warning_type: warning.type,
+                message: warning.message,
+                is_terminal: isTermination,
+                timestamp: Date.now() / 1000
+            });
+            if (isTermination) {
+                await flushCheatEvents();
             }
         }
 
@@ -351,6 +383,12 @@ export default function InterviewChat({ userCode, problemData, isActive, resumeD
         setMessages(prev => [...prev, endMsg]);
 
         try {
+            // Infractions still queued must reach the session before its report is built
+            const retryAfter = await flushCheatEvents();
+            if (retryAfter) {
+                await new Promise(resolve => setTimeout(resolve, Math.min(retryAfter, 5) * 1000));
+                await flushCheatEvents();
+            }
             const response = await fetch('http://localhost:8000/api/end-session', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
@@ -437,6 +475,7 @@ export default function InterviewChat({ userCode, problemData, isActive, resumeD
                     problem_title: problemData.title,
                     problem_description: problemData.description,
                     language: problemData.language,
+                    session_id: sessionId,
                 }),
             });
 
@@ -7,6 +7,7 @@ import { useRef, useCallback, useEffect } from 'react';
 export function useStuckDetection({
     code,
     problemData,
+    sessionId,
     isActive,
     onStuckDetected,
     idleThresholdSeconds = 60
@@ -41,6 +42,7 @@ export function useStuckDetection({
                     problem_description: problemData.description,
                     language: problemData.language,
                     time_since_last_edit_seconds: idleSeconds,
+                    session_id: sessionId || null,
                 }),
             });
 
@@ -55,7 +57,7 @@ export function useStuckDetection({
             // Silent fail — stuck detection is non-critical
             console.warn('Stuck detection check failed:', err);
         }
-    }, [isActive, problemData, idleThresholdSeconds, onStuckDetected]);
+    }, [isActive, problemData, sessionId, idleThresholdSeconds, onStuckDetected]);
 
     // Poll every 30 seconds
     useEffect(() => {